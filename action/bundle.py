@@ -0,0 +1,109 @@
+"""
+Template Bundle Module
+"""
+
+import hashlib
+import json
+import os
+import zipfile
+
+import jinja2
+from jinja2 import BaseLoader, ModuleLoader, TemplateNotFound
+
+# Name of the index of a bundle: jinja2 version, sandbox and async modes and
+# hash of each template source
+INDEX_NAME = "bundle.json"
+
+
+def write_index(target, checksums, sandboxed=False, is_async=False):
+    """
+    Write the index of a bundle compiled by Environment.compile_templates.
+      Parameters:
+        target (str): zip file or directory of the bundle
+        checksums (dict): sha256 of the source of each compiled template, by name
+        sandboxed (bool): if the templates are compiled by a sandboxed environment
+        is_async (bool): if the templates are compiled for the async mode
+    """
+    content = json.dumps(
+        {
+            "jinja2": jinja2.__version__,
+            "sandbox": sandboxed,
+            "async": is_async,
+            "templates": checksums,
+        },
+        sort_keys=True,
+    )
+    if os.path.isdir(target):
+        with open(os.path.join(target, INDEX_NAME), "w", encoding="utf-8") as f:
+            f.write(content)
+    else:
+        with zipfile.ZipFile(target, "a") as archive:
+            archive.writestr(INDEX_NAME, content)
+
+
+def read_index(path):
+    """Index of a bundle, see write_index"""
+    try:
+        if os.path.isdir(path):
+            with open(os.path.join(path, INDEX_NAME), "rb") as f:
+                return json.loads(f.read())
+        with zipfile.ZipFile(path) as archive:
+            return json.loads(archive.read(INDEX_NAME))
+    except (OSError, KeyError, zipfile.BadZipFile) as e:
+        raise ValueError(f"{path} is not a template bundle") from e
+
+
+class BundleLoader(BaseLoader):
+    """
+    Template loader reading the compiled templates of a bundle, whose
+    source is never parsed nor compiled again. The sources are still read
+    by the given loader: a template missing from the bundle, or modified
+    since it was compiled, is compiled from its source.
+    """
+
+    def __init__(self, path, loader, sandboxed=False, is_async=False):
+        """
+        Parameters:
+          path (str): zip file or directory of the bundle
+          loader (BaseLoader): loader of the template sources
+          sandboxed (bool): if the templates are rendered in a sandboxed environment
+          is_async (bool): if the templates are rendered in async mode
+        """
+        index = read_index(path)
+        if index["jinja2"] != jinja2.__version__:
+            raise ValueError(
+                f"Bundle {path} is compiled for jinja2 {index['jinja2']}, "
+                f"compile it again for jinja2 {jinja2.__version__}"
+            )
+        # The code compiled for a sandbox or for the async mode differs, a
+        # bundle is only used in the modes it is compiled for
+        modes = {"sandbox": sandboxed, "async": is_async}
+        for mode, enabled in modes.items():
+            if index.get(mode, False) != enabled:
+                raise ValueError(
+                    f"Bundle {path} is {'not ' if enabled else ''}compiled "
+                    f"for the {mode} mode"
+                )
+        self.checksums = index["templates"]
+        self.modules = ModuleLoader(path)
+        self.loader = loader
+
+    def get_source(self, environment, template):
+        return self.loader.get_source(environment, template)
+
+    def list_templates(self):
+        return self.loader.list_templates()
+
+    def load(self, environment, name, globals=None):  # pylint: disable=W0622
+        source, _, uptodate = self.loader.get_source(environment, name)
+        checksum = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        if self.checksums.get(name) == checksum:
+            try:
+                template = self.modules.load(environment, name, globals)
+            except TemplateNotFound:
+                pass
+            else:
+                # Reloaded from its source once modified
+                template._uptodate = uptodate  # pylint: disable=W0212
+                return template
+        return super().load(environment, name, globals)
@@ -0,0 +1,107 @@
+"""
+Cache Module
+"""
+
+import os
+import tempfile
+
+import jinja2
+from jinja2.bccache import Bucket, BytecodeCache
+
+# Default size limit of each cache directory, in bytes
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024
+
+
+def prune(directory, max_size):
+    """
+    Remove the least recently used files of a cache directory until
+    the total size of the directory is under max_size bytes.
+    Files are ordered by modification time, which is refreshed on each cache hit.
+    """
+    entries = []
+    total = 0
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_size:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def write_atomic(directory, name, writer):
+    """
+    Write a cache file through a temporary file, so that concurrent
+    readers and writers never see a partial entry.
+      Parameters:
+        directory (str): cache directory
+        name (str): name of the cache file
+        writer (callable): function writing the content in the given binary file
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            writer(f)
+        os.replace(tmp_path, os.path.join(directory, name))
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+class TemplateBytecodeCache(BytecodeCache):
+    """
+    On-disk cache of compiled templates, persistent across runs.
+    Entries are keyed by the jinja2 version, the template name and the hash
+    of its source, so a modified template never hits a stale entry. The code
+    compiled for a sandbox or for the async mode has its own entries.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def get_bucket(self, environment, name, filename, source):
+        checksum = self.get_source_checksum(source)
+        key = f"{jinja2.__version__}:{name}:{checksum}"
+        if environment.sandboxed:
+            key += ":sandbox"
+        if environment.is_async:
+            key += ":async"
+        key = self.get_cache_key(key)
+        bucket = Bucket(environment, key, checksum)
+        self.load_bytecode(bucket)
+        return bucket
+
+    def _get_cache_filename(self, bucket):
+        return os.path.join(self.directory, f"{bucket.key}.cache")
+
+    def load_bytecode(self, bucket):
+        filename = self._get_cache_filename(bucket)
+        try:
+            with open(filename, "rb") as f:
+                bucket.load_bytecode(f)
+        except OSError:
+            return
+        # Mark the entry as recently used for the eviction
+        os.utime(filename)
+
+    def dump_bytecode(self, bucket):
+        write_atomic(self.directory, f"{bucket.key}.cache", bucket.write_bytecode)
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".cache"):
+                os.remove(os.path.join(self.directory, name))
+
+    def prune(self):
+        """Evict the least recently used entries above the size limit"""
+        prune(self.directory, self.max_size)
@@ -0,0 +1,192 @@
+"""
+Lazy Context Module
+"""
+
+import os
+from collections import ChainMap, namedtuple
+from collections.abc import Mapping, MutableMapping
+
+from jinja2 import Template
+from jinja2.runtime import Context, missing
+
+
+class EnvironView(Mapping):
+    """
+    Read-only view of the environment variables, without copy.
+    Once pickled, the view reads the environment of the unpickling process.
+    """
+
+    def __getitem__(self, key):
+        return os.environ[key]
+
+    def __iter__(self):
+        return iter(os.environ)
+
+    def __len__(self):
+        return len(os.environ)
+
+    def __reduce__(self):
+        return EnvironView, ()
+
+
+# A named section declared in a LazyContext, not loaded yet
+PendingSection = namedtuple("PendingSection", "name loader")
+
+
+class LazyContext(MutableMapping):
+    """
+    Context of the templates, whose data sources are only loaded when a
+    template first reads them.
+    Named sections (a GitHub context for example), anonymous sources (data
+    files, urls) and assigned variables are layered in declaration order: as
+    if they updated a dict one after the other, the last declared one wins.
+    A variable is looked up from the last declared layer: a section is only
+    loaded when its name is read, while an anonymous source, which defines
+    unknown top level variables, is loaded when a variable is not found in
+    the layers declared after it.
+    Loaders are called without argument and must be picklable, as the context
+    is sent to the rendering processes.
+    """
+
+    def __init__(self):
+        # Sections, sources and variables, in declaration order: a mapping
+        # once loaded (a section being a mapping of its name), a
+        # PendingSection, or the loader of an anonymous source not loaded yet
+        self._layers = []
+        # Layer of the last assigned variables, extended by the next ones
+        self._variables = None
+        # Index, section name (None for an anonymous source) and loader of
+        # each declared layer, to reload them
+        self._loaders = []
+
+    def __getstate__(self):
+        # The loaders of the loaded layers, and the content they may hold,
+        # are not sent to the rendering processes, which never reload them
+        state = self.__dict__.copy()
+        state["_loaders"] = []
+        return state
+
+    def add_section(self, name, loader):
+        """
+        Declare a named section, loaded on its first access.
+        A loader returning None declares no section.
+        """
+        self._loaders.append((len(self._layers), name, loader))
+        self._layers.append(PendingSection(name, loader))
+
+    def set_section(self, name, value):
+        """Set a named section, already loaded"""
+        self._layers.append({name: value})
+
+    def add_source(self, loader):
+        """Declare an anonymous source: a loader returning a dict of variables"""
+        self._loaders.append((len(self._layers), None, loader))
+        self._layers.append(loader)
+
+    def unload(self, loader):
+        """
+        Unload the sections and sources declared with loader, so that they
+        are loaded again on their next access (when their content changed)
+        """
+        for index, name, declared in self._loaders:
+            if declared == loader:
+                self._layers[index] = (
+                    loader if name is None else PendingSection(name, loader)
+                )
+
+    @property
+    def pending(self):
+        """Check if some sections or sources are not loaded yet"""
+        return any(not isinstance(layer, Mapping) for layer in self._layers)
+
+    def load_all(self):
+        """Load all the pending sections and sources"""
+        for index in range(len(self._layers)):
+            self._load_layer(index)
+
+    def _load_layer(self, index):
+        layer = self._layers[index]
+        if isinstance(layer, PendingSection):
+            value = layer.loader()
+            layer = self._layers[index] = {} if value is None else {layer.name: value}
+        elif not isinstance(layer, Mapping):
+            # A source may be a read-only mapping, loading its values lazily
+            layer = layer()
+            if not isinstance(layer, Mapping):
+                layer = dict(layer)
+            self._layers[index] = layer
+        return layer
+
+    def __getitem__(self, key):
+        for index in reversed(range(len(self._layers))):
+            layer = self._layers[index]
+            if isinstance(layer, PendingSection) and layer.name != key:
+                # A section only defines its name
+                continue
+            layer = self._load_layer(index)
+            if key in layer:
+                return layer[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if not self._layers or self._layers[-1] is not self._variables:
+            self._variables = {}
+            self._layers.append(self._variables)
+        self._variables[key] = value
+
+    def __delitem__(self, key):
+        self.load_all()
+        found = False
+        for index, layer in enumerate(self._layers):
+            if key in layer:
+                if not isinstance(layer, dict):
+                    layer = self._layers[index] = dict(layer)
+                del layer[key]
+                found = True
+        if not found:
+            raise KeyError(key)
+
+    def __iter__(self):
+        self.load_all()
+        seen = set()
+        for layer in reversed(self._layers):
+            for key in layer:
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __bool__(self):
+        """Without loading anything, check if some data is declared"""
+        return bool(self._layers)
+
+
+class RenderContext(Context):
+    """
+    Jinja context never copying the data it is rendered with: the variables
+    set by a template are overlaid on the data when they are passed to an
+    included or imported template, so only the data they read is loaded.
+    """
+
+    def get_all(self):
+        return ChainMap(self.vars, self.parent)
+
+
+class RenderTemplate(Template):
+    """
+    Jinja template passing the local variables to the templates it includes
+    or imports as an overlay of the context, rather than a copy
+    """
+
+    def new_context(
+        self, vars=None, shared=False, locals=None
+    ):  # pylint: disable=W0622
+        if shared and locals:
+            overlay = {
+                key: value for key, value in locals.items() if value is not missing
+            }
+            vars = ChainMap(overlay, {} if vars is None else vars)
+            locals = None
+        return super().new_context(vars, shared, locals)
@@ -0,0 +1,138 @@
+"""
+Template Finder Module
+"""
+
+import os
+from fnmatch import fnmatchcase
+
+# Directories never descended into, whatever their location in the tree
+DEFAULT_EXCLUDE = (
+    ".git",
+    ".hg",
+    ".svn",
+    ".tox",
+    ".nox",
+    ".venv",
+    "venv",
+    "node_modules",
+    "__pycache__",
+    ".mypy_cache",
+    ".pytest_cache",
+)
+
+
+class Pattern:  # pylint: disable=R0903
+    """
+    Glob pattern on a path relative to the searched directory.
+    As in a .gitignore file, a pattern without slash matches the name of a file
+    or directory at any level, a pattern ending with a slash only matches
+    directories and a pattern with another slash is anchored to the searched
+    directory. The `*` wildcard also matches slashes.
+    """
+
+    def __init__(self, pattern):
+        self.directory_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        self.anchored = "/" in pattern
+        self.pattern = pattern.lstrip("/")
+
+    def match(self, name, relative_path, is_dir):
+        """Check if the pattern matches a file or directory"""
+        if self.directory_only and not is_dir:
+            return False
+        if self.anchored:
+            return fnmatchcase(relative_path, self.pattern)
+        return fnmatchcase(name, self.pattern)
+
+
+def read_gitignore(path):
+    """
+    Read the patterns of a .gitignore file.
+    Negated patterns (starting with `!`) are not supported and ignored.
+    """
+    patterns = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return patterns
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith(("#", "!")):
+            patterns.append(line)
+    return patterns
+
+
+class TemplateFinder:  # pylint: disable=R0903
+    """
+    Find the templates of a directory tree.
+    Excluded directories are pruned: they are never descended into.
+    """
+
+    def __init__(  # pylint: disable=R0913
+        self,
+        basepath="./",
+        extensions=(".j2"),
+        include=(),
+        exclude=(),
+        gitignore=False,
+    ):
+        """
+        Parameters:
+          basepath (str): searched directory
+          extensions (str/tuple): extension(s) of the templates
+          include (list): if not empty, only templates matching one of these
+            patterns are found
+          exclude (list): files and directories matching one of these patterns
+            are ignored, in addition to the DEFAULT_EXCLUDE directories
+          gitignore (bool): also ignore files and directories listed in the
+            .gitignore file of the searched directory
+        """
+        self.basepath = basepath
+        self.extensions = extensions
+        self.include = [Pattern(pattern) for pattern in include]
+        exclude = list(exclude)
+        if gitignore:
+            exclude += read_gitignore(os.path.join(basepath, ".gitignore"))
+        self.exclude = [Pattern(pattern) for pattern in exclude]
+        self.default_exclude = frozenset(DEFAULT_EXCLUDE)
+
+    def _is_excluded(self, name, relative_path, is_dir):
+        return any(p.match(name, relative_path, is_dir) for p in self.exclude)
+
+    def _is_included(self, name, relative_path):
+        return any(p.match(name, relative_path, False) for p in self.include)
+
+    def find(self):
+        """Yield the path of each template found, in a stable order"""
+        # Relative paths are only built when some patterns need them
+        need_relative = bool(self.include or self.exclude)
+        pending = [(self.basepath, "")]
+        while pending:
+            directory, prefix = pending.pop()
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+            subdirectories = []
+            for entry in entries:
+                relative_path = prefix + entry.name if need_relative else None
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in self.default_exclude or (
+                        self.exclude
+                        and self._is_excluded(entry.name, relative_path, True)
+                    ):
+                        continue
+                    subdirectories.append(
+                        (entry.path, relative_path + "/" if need_relative else None)
+                    )
+                elif entry.name.endswith(self.extensions) and not entry.is_dir():
+                    if self.exclude and self._is_excluded(
+                        entry.name, relative_path, False
+                    ):
+                        continue
+                    if self.include and not self._is_included(
+                        entry.name, relative_path
+                    ):
+                        continue
+                    yield entry.path
+            # Depth first, in alphabetical order
+            pending.extend(reversed(subdirectories))
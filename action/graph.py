@@ -0,0 +1,174 @@
+"""
+Template Graph Module
+"""
+
+import hashlib
+import json
+from collections import namedtuple
+
+from jinja2 import TemplateError, TemplateNotFound, meta, nodes
+
+# A parsed template: the hash of its source, the context variables it reads,
+# the templates it includes, extends or imports (None if one is dynamic) and
+# the globals of the environment it reads
+TemplateNode = namedtuple("TemplateNode", "checksum variables references global_names")
+
+# A template which does not exist, referenced as optional (ignore missing, or
+# in a list of templates): it has no checksum and no dependencies
+MISSING = TemplateNode(None, frozenset(), (), frozenset())
+
+
+class TemplateGraph:
+    """
+    Graph of the templates, whose edges are the templates included, extended
+    or imported, as found statically in their source. Each template is parsed
+    once, when it is first needed.
+    """
+
+    def __init__(self, env):
+        """
+        Parameters:
+          env (Environment): jinja2 environment used to load the templates
+        """
+        self.env = env
+        self.nodes = {}
+
+    def node(self, name):
+        """Parse a template, once. MISSING if the template does not exist."""
+        if name not in self.nodes:
+            try:
+                source, _, _ = self.env.loader.get_source(self.env, name)
+            except TemplateNotFound:
+                # Found again once created, see invalidate
+                self.nodes[name] = MISSING
+                return MISSING
+            ast = self.env.parse(source)
+            references = set(meta.find_referenced_templates(ast))
+            self.nodes[name] = TemplateNode(
+                hashlib.sha256(source.encode("utf-8")).hexdigest(),
+                frozenset(meta.find_undeclared_variables(ast)),
+                None if None in references else tuple(sorted(references)),
+                frozenset(
+                    node.name
+                    for node in ast.find_all(nodes.Name)
+                    if node.name in self.env.globals
+                ),
+            )
+        return self.nodes[name]
+
+    def invalidate(self, name):
+        """Forget a changed template: it is parsed again when next needed"""
+        self.nodes.pop(name, None)
+
+    def closure(self, name):
+        """
+        The templates a template depends on, recursively, the template itself
+        excluded. None if one dependency is dynamic and can not be resolved.
+        """
+        found = set()
+        pending = [name]
+        while pending:
+            references = self.node(pending.pop()).references
+            if references is None:
+                return None
+            for reference in references:
+                if reference not in found and reference != name:
+                    found.add(reference)
+                    pending.append(reference)
+        return found
+
+    def variables(self, name):
+        """
+        The context variables read by a template and the templates it depends
+        on. None if one dependency is dynamic.
+        """
+        closure = self.closure(name)
+        if closure is None:
+            return None
+        return set().union(
+            *(self.node(current).variables for current in (name, *closure))
+        )
+
+    def dependents(self, changed, names):
+        """
+        The given templates depending on one of the changed templates, the
+        changed templates included. A template with a dynamic dependency, or
+        which can not be loaded nor parsed, may depend on any template.
+        """
+        changed = set(changed)
+        found = []
+        for name in names:
+            try:
+                closure = None if self.node(name) is MISSING else self.closure(name)
+            except TemplateError:
+                closure = None
+            if name in changed or closure is None or closure & changed:
+                found.append(name)
+        return found
+
+    def readers(self, variables, names):
+        """
+        The given templates reading one of the context variables, directly or
+        through the templates they depend on, or which may read any variable
+        """
+        variables = set(variables)
+        found = []
+        for name in names:
+            try:
+                read = self.variables(name)
+            except TemplateError:
+                read = None
+            if read is None or read & variables:
+                found.append(name)
+        return found
+
+    def shared(self, names):
+        """
+        The templates the given templates depend on more than once, the
+        missing ones excluded
+        """
+        seen = set()
+        shared = set()
+        for name in names:
+            closure = self.closure(name) or set()
+            shared.update(closure & seen)
+            seen.update(closure)
+        return sorted(name for name in shared if self.node(name) is not MISSING)
+
+    def order(self, names):
+        """
+        Order the given templates so that the templates sharing the same
+        dependencies follow each other. The templates with dynamic
+        dependencies come last.
+        """
+
+        def key(name):
+            closure = self.closure(name)
+            if closure is None:
+                return (1, (), name)
+            return (0, tuple(sorted(closure)), name)
+
+        return sorted(names, key=key)
+
+    def to_dict(self, names):
+        """Graph of the given templates and their dependencies, as json"""
+        rendered = set(names)
+        for name in rendered:
+            self.closure(name)
+        return {
+            "templates": {
+                name: {
+                    "references": node.references,
+                    "dynamic": node.references is None,
+                    "missing": node is MISSING,
+                    "rendered": name in rendered,
+                }
+                for name, node in sorted(self.nodes.items())
+            },
+            "shared": self.shared(names),
+        }
+
+    def save(self, path, names):
+        """Write the graph of the given templates in a json file"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(names), f, indent=1)
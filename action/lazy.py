@@ -0,0 +1,339 @@
+"""
+Lazy Data Module
+
+Read-only mappings over a JSON or YAML data file, whose values are only
+parsed when a template reads them. The file is indexed once: the position
+of each top level value is recorded, without building the values.
+"""
+
+import mmap
+import re
+from abc import abstractmethod
+from collections.abc import Mapping
+
+from .parser import (
+    FileParser,
+    _yaml,
+    _yaml_loader,
+    json_loads,
+    nested_policy,
+    normalize_key,
+)
+
+# Minimum size of a nested JSON object for it to be itself a lazy mapping,
+# in bytes: smaller objects are parsed at once
+NESTED_MIN_SIZE = 64 * 1024
+
+_UTF8_BOM = b"\xef\xbb\xbf"
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+_SCALAR = re.compile(rb"[^,:\[\]{}\s]+")
+# Content of a collection up to its next bracket, strings included
+_SKIP = re.compile(rb'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*')
+
+
+class LazyMapping(Mapping):
+    """
+    Read-only mapping whose values are parsed on their first access, from
+    their position in the data file
+    """
+
+    def __init__(self, index):
+        """
+        Parameters:
+          index (dict): position of the content of each value, by key
+        """
+        self._index = index
+        self._values = {}
+
+    @abstractmethod
+    def _load(self, position):
+        """Parse the value at the given position"""
+
+    def __getitem__(self, key):
+        if key not in self._values:
+            self._values[key] = self._load(self._index[key])
+        return self._values[key]
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class LazyJsonObject(LazyMapping):
+    """
+    JSON object of a memory-mapped file. Nested objects larger than
+    NESTED_MIN_SIZE are lazy mappings as well. Only the structure of the
+    file is checked by the indexing: an invalid value is only reported when
+    it is read.
+    """
+
+    def __init__(  # pylint: disable=R0913
+        self, path, start=None, end=None, buffer=None, index=None, key_policy="none"
+    ):
+        """
+        Parameters:
+          path (str): path of the JSON file
+          start, end (int): position of the object in the file, the whole
+            file by default
+          buffer (mmap): memory-mapped file, shared by the nested objects
+          index (dict): position of each value, when already indexed
+          key_policy (str): normalization policy of the keys, see KEY_POLICIES
+        """
+        if buffer is None:
+            with open(path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if start is None:
+            start = len(_UTF8_BOM) if buffer[:3] == _UTF8_BOM else 0
+            end = len(buffer)
+        self.path = path
+        self.start = start
+        self.end = end
+        self.key_policy = key_policy
+        self._buffer = buffer
+        super().__init__(self._index_object() if index is None else index)
+
+    def _error(self, position):
+        return ValueError(f"Invalid JSON content at byte {position}: {self.path}")
+
+    def _skip_whitespace(self, position):
+        return _WHITESPACE.match(self._buffer, position).end()
+
+    def _skip_value(self, position):
+        """Position of the end of the value starting at position"""
+        buffer = self._buffer
+        first = buffer[position : position + 1]
+        if first not in (b"{", b"["):
+            match = (_STRING if first == b'"' else _SCALAR).match(buffer, position)
+            if not match:
+                raise self._error(position)
+            return match.end()
+        depth = 0
+        while True:
+            char = buffer[position : position + 1]
+            if char in (b"{", b"["):
+                depth += 1
+            elif char in (b"}", b"]"):
+                depth -= 1
+                if depth == 0:
+                    return position + 1
+            else:
+                # End of file, or unterminated string
+                raise self._error(position)
+            position = _SKIP.match(buffer, position + 1).end()
+
+    def _index_object(self):
+        """Position (start, end) of each value of the object, by key"""
+        buffer = self._buffer
+        position = self._skip_whitespace(self.start)
+        if buffer[position : position + 1] != b"{":
+            raise self._error(position)
+        position = self._skip_whitespace(position + 1)
+        index = {}
+        if buffer[position : position + 1] == b"}":
+            return self._end_object(index, position)
+        while True:
+            match = _STRING.match(buffer, position)
+            if not match:
+                raise self._error(position)
+            key = json_loads(match.group())
+            if self.key_policy != "none":
+                key = normalize_key(key)
+            position = self._skip_whitespace(match.end())
+            if buffer[position : position + 1] != b":":
+                raise self._error(position)
+            start = self._skip_whitespace(position + 1)
+            end = self._skip_value(start)
+            # As with json, the last value of a duplicated key wins
+            index[key] = (start, end)
+            position = self._skip_whitespace(end)
+            char = buffer[position : position + 1]
+            if char == b"}":
+                return self._end_object(index, position)
+            if char != b",":
+                raise self._error(position)
+            position = self._skip_whitespace(position + 1)
+
+    def _end_object(self, index, position):
+        """Index of the object closed at position, followed by whitespace only"""
+        end = self._skip_whitespace(position + 1)
+        if end < self.end:
+            raise self._error(end)
+        return index
+
+    def _load(self, position):
+        start, end = position
+        key_policy = nested_policy(self.key_policy)
+        if end - start >= NESTED_MIN_SIZE and self._buffer[start : start + 1] == b"{":
+            return LazyJsonObject(
+                self.path, start, end, self._buffer, key_policy=key_policy
+            )
+        return json_loads(self._buffer[start:end], key_policy)
+
+    def __reduce__(self):
+        # The file is mapped again by the unpickling process, without being
+        # indexed again, and the values already parsed are sent along
+        return (
+            LazyJsonObject,
+            (self.path, self.start, self.end, None, self._index, self.key_policy),
+            {"_values": self._values},
+        )
+
+
+class LazyYamlMapping(LazyMapping):
+    """
+    Top level mapping of a YAML file. The file content is kept as text, as
+    the positions reported by the YAML parser are positions of characters.
+    """
+
+    def __init__(self, path, text, index, key_policy="none"):
+        """
+        Parameters:
+          path (str): path of the YAML file
+          text (str): content of the file
+          index (dict): position (start, end, column) of each value, by key,
+            as found by index_yaml
+          key_policy (str): normalization policy of the keys, see KEY_POLICIES
+        """
+        self.path = path
+        self.key_policy = key_policy
+        self._text = text
+        super().__init__(index)
+
+    def _load(self, position):
+        start, end, column = position
+        # The first line of the value is indented as in the file
+        return _yaml().load(
+            " " * column + self._text[start:end],
+            Loader=_yaml_loader(nested_policy(self.key_policy)),
+        )
+
+    def __reduce__(self):
+        return (
+            LazyYamlMapping,
+            (self.path, self._text, self._index, self.key_policy),
+            {"_values": self._values},
+        )
+
+
+def _skip_yaml_node(yaml, events, event):
+    """
+    Last event of the node starting with event, None if the node has an
+    anchor or an alias
+    """
+    depth = 0
+    while True:
+        if isinstance(event, yaml.AliasEvent) or getattr(event, "anchor", None):
+            return None
+        if isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+            depth += 1
+        elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+            depth -= 1
+        if depth == 0:
+            return event
+        event = next(events)
+
+
+def index_yaml(text):
+    """
+    Position (start, end, column) of each value of the top level mapping of
+    a YAML content, by key, found from the parser events, without building
+    the values. None if the content can not be split that way: a single
+    document whose top level is a mapping with scalar keys, without any
+    anchor or alias.
+    """
+    yaml = _yaml()
+    events = yaml.parse(text, Loader=_yaml_loader())
+    for expected in (yaml.StreamStartEvent, yaml.DocumentStartEvent):
+        if not isinstance(next(events, None), expected):
+            return None
+    event = next(events, None)
+    if not isinstance(event, yaml.MappingStartEvent) or event.anchor:
+        return None
+    index = {}
+    for event in events:
+        if isinstance(event, yaml.MappingEndEvent):
+            break
+        if not isinstance(event, yaml.ScalarEvent) or event.anchor:
+            return None
+        key = yaml.load(
+            text[event.start_mark.index : event.end_mark.index],
+            Loader=_yaml_loader(),
+        )
+        start = next(events)
+        end = _skip_yaml_node(yaml, events, start)
+        if end is None:
+            return None
+        index[key] = (
+            start.start_mark.index,
+            end.end_mark.index,
+            start.start_mark.column,
+        )
+    # A single document
+    ends = (yaml.DocumentEndEvent, yaml.StreamEndEvent)
+    if not all(isinstance(next(events, None), end) for end in ends):
+        return None
+    return index
+
+
+def load_lazy(path, file_format, key_policy="none"):
+    """
+    Lazy mapping of a JSON or YAML data file, None if the file can not be
+    loaded lazily (not a JSON object, or see index_yaml)
+    """
+    if file_format == "json":
+        try:
+            return LazyJsonObject(path, key_policy=key_policy)
+        except ValueError:
+            # Not an object, or an empty file: parsed as usual
+            return None
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if text.startswith("\ufeff"):
+        # The positions of the YAML parser do not count the BOM
+        text = text[1:]
+    try:
+        index = index_yaml(text)
+    except _yaml().YAMLError:
+        # Reported by the usual parsing
+        return None
+    if index is None:
+        return None
+    if key_policy != "none":
+        index = {normalize_key(key): position for key, position in index.items()}
+    return LazyYamlMapping(path, text, index, key_policy)
+
+
+class LazyFileParser(FileParser):
+    """
+    Parser of a data file returning, for a JSON or YAML file, a lazy mapping
+    whose top level values are parsed when they are read, instead of
+    reading and parsing the whole file. The other contents are parsed as
+    usual.
+    """
+
+    def parse(self):
+        content = self._timed("load", self._load_lazy)
+        if content is not None:
+            return content
+        return super().parse()
+
+    def _load_lazy(self):
+        file_format = self.format or self._get_format_from_extension(self.file_path)
+        if file_format is None:
+            with open(self.file_path, encoding="utf-8") as f:
+                file_format = self._detect_format(f.read(4096).lstrip("\ufeff"))
+        if file_format not in ("json", "yml", "yaml"):
+            return None
+        content = load_lazy(self.file_path, file_format, self.key_policy)
+        if content is not None:
+            self.format = file_format
+        return content
@@ -1,42 +1,153 @@
 """Main file of the jinja2-template-action action."""
 
+# pylint: disable=C0302
+
 import importlib
 import base64
-import json
 import os
+import shutil
+import tempfile
+from collections import ChainMap
+from contextlib import nullcontext
+from functools import partial
 
+import jinja2
 from jinja2 import Environment, FileSystemLoader
 
-from .parser import FileParser, UrlParser
+from .cache import DEFAULT_MAX_SIZE, TemplateBytecodeCache, prune
+from .context import EnvironView, LazyContext, RenderContext, RenderTemplate
+from .finder import TemplateFinder
+from .graph import MISSING, TemplateGraph
+from .lazy import LazyFileParser
+from .manifest import Manifest, find_dependencies, hash_value
+from .matrix import DEFAULT_OUTPUT
+from .output import write_if_changed
+from .parser import KEY_POLICIES, FileParser, UrlParser, json_loads, normalize_keys
+from .profiler import Profiler, ProfilingLoader
+from .sandbox import Budget, BudgetedEnvironment
+from .watcher import DEFAULT_INTERVAL, Watcher
+
+# Size of the write buffer of rendered files in streaming mode, in bytes
+STREAM_BUFFER_SIZE = 1024 * 1024
+# Maximum number of data urls fetched at the same time
+DEFAULT_MAX_CONNECTIONS = 4
 
 
-class Main:
+class Main:  # pylint: disable=R0902,R0904
     """Main class of the jinja2-template-action"""
 
-    def __init__(
+    def __init__(  # pylint: disable=R0913,R0914,R0915
         self,
         extensions=(".j2"),
         basepath="./",
         keep_template=False,
         undefined="Undefined",
+        jobs=1,
+        cache_dir=None,
+        cache_max_size=DEFAULT_MAX_SIZE,
+        manifest=None,
+        include=(),
+        exclude=(),
+        gitignore=False,
+        stream=False,
+        profile=False,
+        plan=False,
+        graph_file=None,
+        key_policy="top",
+        bundle=None,
+        sandbox=False,
+        max_time=None,
+        max_output=None,
+        max_loop=None,
+        enable_async=False,
     ):
         self.ext = extensions
         self.basepath = basepath
         self.keep_template = keep_template
+        self.stream = stream
+        self.plan = plan
+        self.graph_file = graph_file
+        # Graph of the templates of the current run
+        self.graph = None
         if undefined not in self.BEHAVIOURS:
             raise ValueError(f"Specified Undefined Behavior is unknow: {undefined}")
+        if key_policy not in KEY_POLICIES:
+            raise ValueError(f"Specified key policy is unknown: {key_policy}")
+        # Normalization of the keys of the data sources, see KEY_POLICIES
+        self.key_policy = key_policy
+        self.undefined = undefined
+        if jobs < 0:
+            raise ValueError(f"Number of jobs must be positive: {jobs}")
+        self.jobs = jobs or os.cpu_count()
+        if enable_async and (sandbox or stream):
+            raise ValueError("Async mode can not be used with sandbox nor stream")
+        self.enable_async = enable_async
+        self.cache_dir = cache_dir
+        self.cache_max_size = cache_max_size
+        bytecode_cache = None
+        if cache_dir:
+            bytecode_cache = TemplateBytecodeCache(
+                os.path.join(cache_dir, "bytecode"), cache_max_size
+            )
         undefined_class = Main.class_for_name("jinja2", undefined)
-        self.env = Environment(
-            loader=FileSystemLoader(self.basepath), undefined=undefined_class
+        self.profiler = Profiler() if profile else None
+        loader = FileSystemLoader(self.basepath)
+        if profile:
+            loader = ProfilingLoader(loader)
+        # Loader of the template sources, measuring the load time when profiling
+        self.source_loader = loader
+        self.bundle = bundle
+        if bundle:
+            # Imported here, as zipfile is slow to import
+            from .bundle import BundleLoader  # pylint: disable=C0415
+
+            loader = BundleLoader(
+                bundle, loader, sandboxed=sandbox, is_async=enable_async
+            )
+        # Budget of each render in sandbox mode
+        self.budget = None
+        if sandbox:
+            self.budget = Budget(max_time, max_output, max_loop)
+            self.env = BudgetedEnvironment(
+                self.budget,
+                loader=loader,
+                undefined=undefined_class,
+                bytecode_cache=bytecode_cache,
+            )
+        elif (max_time, max_output, max_loop) != (None, None, None):
+            raise ValueError("Render budgets are only enforced in sandbox mode")
+        else:
+            self.env = Environment(
+                loader=loader,
+                undefined=undefined_class,
+                bytecode_cache=bytecode_cache,
+                enable_async=enable_async,
+            )
+        # The data is never copied, even by the included templates
+        self.env.context_class = RenderContext
+        self.env.template_class = RenderTemplate
+        self.finder = TemplateFinder(
+            basepath, extensions, include, exclude, gitignore=gitignore
         )
+        self.manifest = None
+        if manifest:
+            self.manifest = Manifest(manifest, f"{jinja2.__version__}:{undefined}")
         # Add some custom filters
         self.env.filters['b64encode'] = lambda s: base64.b64encode(s.encode("ascii"))
-        self.data = {}
+        self.data = LazyContext()
+        self._context = None
+        # Parsers of the data sources, for the profiling report
+        self.parsers = []
+        # Section name (None for an anonymous source) and loader of each
+        # data file, by path, to reload the changed files in watch mode
+        self.data_files = {}
+        # Function and concurrency limit of each data provider, by name
+        self.providers = {}
         # Keep the environ method in template as whe have in the
         # jinja2 cli in the first version of this action
         self.env.globals["environ"] = os.environ.get
-        # Also add env variable in a classic way env.VAR_NAME
-        self.data["env"] = dict(os.environ)
+        # Also add env variable in a classic way env.VAR_NAME, without copy
+        self.data.set_section("env", EnvironView())
 
     BEHAVIOURS = [
         "Undefined",
@@ -69,58 +180,873 @@ class Main:
 
     def add_json_section(self, section_name, json_content):
         """
-        Add Json Data in a given section to the Data available to the template engine
+        Add Json Data in a given section to the Data available to the template engine.
+        The json content is parsed on the first access to the section.
           Parameters:
             sectionName (str): Name of the added section. The jsconContent will be encapsuled
               in this key.
             jsonContent (str/dict): Json content added in the key defined by sectionName
         """
-        if isinstance(json_content, str):
-            data = json.loads(json_content)
-        elif isinstance(json_content, dict):
-            data = json_content
-        else:
+        if not isinstance(json_content, (str, dict)):
             raise ValueError(f"Unknown type for jsonContent: {type(json_content)}")
+        self.data.add_section(
+            section_name, partial(_json_section, json_content, self.key_policy)
+        )
+
+    def add_json_file(self, section_name, file_path):
+        """
+        Add the content of a Json file in a given section, as add_json_section.
+        The file is only read on the first access to the section. An empty
+        file, or a file containing null, adds no section.
+        """
+        loader = partial(_json_file_section, file_path, self.key_policy)
+        self.data_files[os.path.normpath(file_path)] = (section_name, loader)
+        self.data.add_section(section_name, loader)
 
-        # protect again key contening dashes (it is the case in the keys of strategy
-        # context for example)
-        problematic_keys = [key for key in data.keys() if "-" in key]
-        for problematic_key in problematic_keys:
-            new_key = problematic_key.replace("-", "_")
-            data[new_key] = data.pop(problematic_key)
-        self.data[section_name] = data
+    def add_json_files(self, paths):
+        """
+        Add the content of several Json files, as add_json_file, each one in
+        a section named after the file. A directory adds all its .json files.
+        """
+        for file_path in json_files(paths):
+            section_name = os.path.splitext(os.path.basename(file_path))[0]
+            self.add_json_file(section_name, file_path)
 
-    def add_data_file(self, file_path, file_format=None):
+    def add_data_file(self, file_path, file_format=None, lazy=False):
         """
         Add Variable from a file to jinja2 context.
+        The file is parsed when a template reads a variable not found in the
+        sources added after it. With lazy, a JSON or YAML file is only
+        indexed, and each top level value is parsed when a template reads it.
+        When the cache is enabled, the parsed content of an unchanged file
+        is read from the cache.
         """
-        parser = FileParser(file_path, file_format)
-        content = parser.parse()
-        self.data.update(content)
+        cache_dir = os.path.join(self.cache_dir, "data") if self.cache_dir else None
+        parser_class = LazyFileParser if lazy else FileParser
+        parser = parser_class(
+            file_path, file_format, cache_dir=cache_dir, key_policy=self.key_policy
+        )
+        self.parsers.append(parser)
+        self.data_files[os.path.normpath(file_path)] = (None, parser.parse)
+        self.data.add_source(parser.parse)
 
-    def add_data_url(self, url, data_format=None):
+    def add_data_url(self, url, data_format=None, ttl=None):
         """
         Add Variable from a url to jinja2 context.
+        When the cache is enabled, the url content is cached and revalidated
+        with a conditional request, or reused without request during ttl seconds.
+        As add_data_file, the url is only fetched if a template needs it.
+        """
+        cache_dir = os.path.join(self.cache_dir, "http") if self.cache_dir else None
+        parser = UrlParser(
+            url, data_format, cache_dir=cache_dir, ttl=ttl, key_policy=self.key_policy
+        )
+        self.parsers.append(parser)
+        self.data.add_source(parser.parse)
+
+    def add_data_urls(  # pylint: disable=R0913
+        self,
+        sources,
+        ttl=None,
+        timeout=UrlParser.DEFAULT_TIMEOUT,
+        retries=UrlParser.DEFAULT_RETRIES,
+        max_connections=DEFAULT_MAX_CONNECTIONS,
+    ):
+        """
+        Add Variables from several urls to jinja2 context.
+        The urls are fetched concurrently, but their contents are merged in
+        the declared order: on conflict, the last declared url wins, whichever
+        fetch finishes first. They are all fetched when a template first needs
+        one of them.
+          Parameters:
+            sources (list): (url, format) pairs, format being None to detect it
+            ttl (int): see add_data_url
+            timeout (int): timeout of each request, in seconds
+            retries (int): number of retries of a request failing on a
+              transient error, with an exponential backoff
+            max_connections (int): maximum number of concurrent requests
+        """
+        cache_dir = os.path.join(self.cache_dir, "http") if self.cache_dir else None
+        parsers = [
+            UrlParser(
+                url,
+                data_format,
+                cache_dir=cache_dir,
+                ttl=ttl,
+                timeout=timeout,
+                retries=retries,
+                key_policy=self.key_policy,
+            )
+            for url, data_format in sources
+        ]
+        self.parsers.extend(parsers)
+        self.data.add_source(partial(_parse_all, parsers, max_connections))
+
+    def add_provider(self, name, function, max_concurrency=None):
+        """
+        Add a data provider: a global function of the templates looking up
+        data when a template calls it, once by arguments. In async mode, the
+        lookup runs in a thread and the renders overlap while waiting for it.
+        The function must be picklable to be used with several jobs.
+          Parameters:
+            name (str): name of the function in the templates
+            function (callable): blocking lookup
+            max_concurrency (int): maximum number of lookups running at the
+              same time in async mode, the size of a default thread pool when None
+        """
+        # Imported here, as asyncio is slow to import
+        from .provider import DataProvider  # pylint: disable=C0415
+
+        provider = DataProvider(function, max_concurrency)
+        self.providers[name] = (function, max_concurrency)
+        self.env.globals[name] = (
+            provider.lookup_async if self.enable_async else provider
+        )
+
+    def add_data_url_provider(  # pylint: disable=R0913
+        self,
+        name,
+        ttl=None,
+        timeout=UrlParser.DEFAULT_TIMEOUT,
+        retries=UrlParser.DEFAULT_RETRIES,
+        max_connections=DEFAULT_MAX_CONNECTIONS,
+    ):
+        """
+        Add a data provider fetching the url given by the templates, as
+        name(url, format=None), and returning its parsed content. The options
+        are the ones of add_data_urls.
+        """
+        cache_dir = os.path.join(self.cache_dir, "http") if self.cache_dir else None
+        self.add_provider(
+            name,
+            partial(
+                _fetch_url,
+                cache_dir=cache_dir,
+                ttl=ttl,
+                timeout=timeout,
+                retries=retries,
+                key_policy=self.key_policy,
+            ),
+            max_connections,
+        )
+
+    @staticmethod
+    def output_path(file_path):
+        """Path of the file rendered from a template: the template path without extension"""
+        return f"{file_path}".rsplit(".", 1)[0]
+
+    def template_name(self, file_path):
+        """Name of a template for the jinja2 loader: its path relative to basepath"""
+        return os.path.relpath(file_path, self.basepath).replace(os.sep, "/")
+
+    def template_inputs(self, file_path, hashes=None):
+        """
+        Inputs of a template, as recorded in the manifest: the hash of the
+        template and of the templates it depends on, and the hash of each
+        context value they read. None if the dependencies can not be resolved.
+          Parameters:
+            hashes (dict): hash of the context values already hashed, shared
+              by the templates rendered together
         """
-        parser = UrlParser(url, data_format)
-        content = parser.parse()
-        self.data.update(content)
+        if self.graph is None:
+            self.graph = TemplateGraph(self.env)
+        dependencies = find_dependencies(
+            self.env, self.template_name(file_path), self.graph
+        )
+        if dependencies is None:
+            return None
+        templates, variables = dependencies
+        if any(
+            not self.graph.node(name).global_names.isdisjoint(self.providers)
+            for name in templates
+        ):
+            # The data looked up by a provider is only known while rendering
+            return None
+        if hashes is None:
+            hashes = {}
+        context = {}
+        for variable in sorted(variables):
+            if variable not in hashes:
+                hashes[variable] = hash_value(self._input_value(variable))
+            context[variable] = hashes[variable]
+        return {"templates": templates, "context": context}
+
+    def _input_value(self, variable):
+        """Value of a context variable, as hashed in the manifest"""
+        try:
+            return self.data[variable]
+        except KeyError:
+            # The globals are constant, but environ reads the environment
+            return os.environ if variable == "environ" else None
+
+    def render_context(self):
+        """
+        Context of the templates: the data chained with the jinja globals,
+        which it overrides as in a copy. It is built once and shared by all
+        the renders, without any copy.
+        """
+        if self._context is None or self._context.maps[0] is not self.data:
+            self._context = ChainMap(self.data, self.env.globals)
+        return self._context
 
     def render_file(self, file_path):
         """
         Render One File with saved jinja2 context.
+        The rendered file is only written if its content changes.
+        In streaming mode, the output is written chunk by chunk while the
+        template is rendered, so it is never fully held in memory.
+          Returns:
+            True if the rendered file was written, False if it was unchanged
         """
-        with open(f"{file_path}".rsplit(".", 1)[0], "w", encoding="utf-8") as out:
-            out.write(self.env.get_template(f"{file_path}").render(self.data))
-            out.flush()
+        changed = self._render_to(file_path, self.output_path(file_path))
+        if not self.keep_template:
+            os.remove(f"{file_path}")
+        return changed
+
+    async def _render_file_async(self, file_path):
+        """As render_file, in async mode"""
+        changed = await self._render_to_async(file_path, self.output_path(file_path))
         if not self.keep_template:
             os.remove(f"{file_path}")
+        return changed
+
+    def _render_to(self, file_path, output, variables=None, label=None):
+        """
+        Render a template in the output file, the variables, if any, taking
+        precedence over the data. The timings are recorded under label, the
+        template name by default.
+        """
+        if self.enable_async:
+            return _run_concurrently(
+                [self._render_to_async(file_path, output, variables, label)]
+            )[0]
+        name = self.template_name(file_path)
+        record = self.profiler.template(label or name) if self.profiler else None
+        template = self._get_template(name, record)
+        chunks = self._generate(template, variables)
+        if self.budget is not None:
+            chunks = self.budget.measure(label or name, chunks)
+        if record is not None:
+            chunks = self.profiler.timed(record, "render", chunks)
+        with self._measure(record, "write"):
+            if self.stream:
+                changed = write_if_changed(output, chunks, buffering=STREAM_BUFFER_SIZE)
+            else:
+                changed = write_if_changed(
+                    output, [template.environment.concat(chunks)]
+                )
+        if record is not None:
+            # The rendering is done while writing: it is measured twice
+            record["write"] -= record["render"]
+        return changed
 
-    def render_all(self):
+    async def _render_to_async(self, file_path, output, variables=None, label=None):
+        """
+        As _render_to, in async mode: the render waits for the awaitable
+        globals without blocking the other renders. The rendered file is
+        written once fully rendered.
+        """
+        name = self.template_name(file_path)
+        record = self.profiler.template(label or name) if self.profiler else None
+        template = self._get_template(name, record)
+        # The render time includes the time spent waiting for the lookups
+        with self._measure(record, "render"):
+            chunks = [
+                chunk async for chunk in self._generate_async(template, variables)
+            ]
+        with self._measure(record, "write"):
+            return write_if_changed(output, chunks)
+
+    def _measure(self, record, phase):
+        """Measure the time spent in a with block, when profiling"""
+        if record is None:
+            return nullcontext()
+        return self.profiler.measure(record, phase)
+
+    def _get_template(self, name, record):
+        """Load and compile a template, measuring both phases when profiling"""
+        if record is None:
+            return self.env.get_template(name)
+        loaded = self.source_loader.elapsed
+        with self.profiler.measure(record, "compile"):
+            template = self.env.get_template(name)
+        record["load"] = self.source_loader.elapsed - loaded
+        record["compile"] -= record["load"]
+        return template
+
+    def _generate(self, template, variables=None):
+        """
+        Render a template chunk by chunk, as Template.generate, but without
+        copying the context, so only the data read by the template is loaded.
+        """
+        context = self._new_context(template, variables)
+        try:
+            yield from template.root_render_func(context)
+        except Exception:  # pylint: disable=W0718
+            yield template.environment.handle_exception()
+
+    async def _generate_async(self, template, variables=None):
+        """As _generate, in async mode"""
+        context = self._new_context(template, variables)
+        try:
+            async for chunk in template.root_render_func(context):
+                yield chunk
+        except Exception:  # pylint: disable=W0718
+            yield template.environment.handle_exception()
+
+    def _new_context(self, template, variables=None):
+        """Render context of a template, the variables taking precedence over the data"""
+        if variables is None:
+            context = self.render_context()
+        else:
+            context = ChainMap(variables, self.data, self.env.globals)
+        return template.new_context(context, shared=True)
+
+    def render_all(self, templates=None):
         """
         Render All File with saved jinja2 context.
+        Files are rendered concurrently when more than one job is configured.
+        With a manifest, files whose inputs are unchanged since the
+        previous run are skipped.
+          Parameters:
+            templates (list): files to render, keeping the graph of the
+              templates of the previous run. All the templates found by default.
+          Returns:
+            The number of rendered files by status: "changed" or "unchanged"
+            files, and files "skipped" thanks to the manifest
+        """
+        phases = self.profiler.phases if self.profiler else None
+        if templates is None:
+            with self._measure(phases, "find"):
+                templates = list(self.finder.find())
+            # Each template is parsed at most once to find its dependencies
+            self.graph = TemplateGraph(self.env)
+            if self.graph_file:
+                self.graph.save(
+                    self.graph_file, [self.template_name(t) for t in templates]
+                )
+        elif self.graph is None:
+            self.graph = TemplateGraph(self.env)
+        counts = {"changed": 0, "unchanged": 0, "skipped": 0}
+        inputs = {}
+        skipped = []
+        if self.manifest:
+            with self._measure(phases, "inputs"):
+                # Each context value is hashed once for all the templates
+                hashes = {}
+                inputs = {
+                    template: self.template_inputs(template, hashes)
+                    for template in templates
+                }
+            up_to_date = {
+                template: self.manifest.is_up_to_date(
+                    template, self.output_path(template), inputs[template]
+                )
+                for template in templates
+            }
+            skipped = [template for template in templates if up_to_date[template]]
+            templates = [template for template in templates if not up_to_date[template]]
+            counts["skipped"] = len(skipped)
+        if self.plan:
+            templates = self.plan_render(templates)
+        try:
+            with self._measure(phases, "render"):
+                for template, changed in self._render(templates):
+                    counts["changed" if changed else "unchanged"] += 1
+                    if self.manifest:
+                        self.manifest.update(template, inputs[template])
+            if not self.keep_template:
+                # Removed as the rendered templates, once they are all rendered
+                for template in skipped:
+                    os.remove(template)
+        finally:
+            if self.manifest:
+                self.manifest.save()
+            self._profile_sources()
+        self.prune_cache()
+        return counts
+
+    def _profile_sources(self):
+        """Record the timings of the data sources in the profiler"""
+        if not self.profiler:
+            return
+        self.profiler.sources = []
+        for parser in self.parsers:
+            if parser.timings:
+                self.profiler.add_source(parser.source, parser.format, parser.timings)
+
+    def render_matrix(self, contexts, output=DEFAULT_OUTPUT):
+        """
+        Render All File once by context of a matrix, each template being
+        compiled once for all the contexts. The variables of a context take
+        precedence over the data. Files are rendered concurrently when more
+        than one job is configured, the renders of a template being given to
+        the same worker as far as possible. The manifest is not used.
+          Parameters:
+            contexts (list): (name, variables) of each context, see load_matrix
+            output (str): template of the path of a rendered file, relative to
+              basepath. It can read the variables of the context, its `name`
+              and the `path` of the file rendered without matrix.
+          Returns:
+            The number of rendered files by status, as render_all
+        """
+        phases = self.profiler.phases if self.profiler else None
+        with self._measure(phases, "find"):
+            templates = list(self.finder.find())
+        self.graph = TemplateGraph(self.env)
+        if self.plan:
+            templates = self.plan_render(templates)
+        tasks = self._matrix_tasks(templates, contexts, output)
+        counts = {"changed": 0, "unchanged": 0, "skipped": 0}
+        try:
+            with self._measure(phases, "render"):
+                for changed in self._render_matrix(tasks, templates, dict(contexts)):
+                    counts["changed" if changed else "unchanged"] += 1
+        finally:
+            self._profile_sources()
+        if not self.keep_template:
+            for template in templates:
+                os.remove(template)
+        self.prune_cache()
+        return counts
+
+    def _matrix_tasks(self, templates, contexts, output):
+        """
+        Renders of a matrix: (file_path, output, context name) for each
+        template and context. The directories of the outputs are created.
         """
-        for path, _, files in os.walk(self.basepath):
-            for name in files:
-                if name.endswith(self.ext):
-                    self.render_file(f"{path}/{name}")
+        output_template = self.env.from_string(output)
+        tasks = []
+        outputs = {}
+        for template in templates:
+            path = self.template_name(self.output_path(template))
+            for name, variables in contexts:
+                output_path = os.path.normpath(
+                    os.path.join(
+                        self.basepath,
+                        output_template.render(variables, name=name, path=path),
+                    )
+                )
+                if output_path in outputs:
+                    raise ValueError(
+                        f"Output {output_path} of {template} for context {name} "
+                        f"is already rendered for context {outputs[output_path]}"
+                    )
+                outputs[output_path] = name
+                tasks.append((template, output_path, name))
+        for directory in {os.path.dirname(output_path) for output_path in outputs}:
+            os.makedirs(directory or ".", exist_ok=True)
+        return tasks
+
+    def _render_matrix(self, tasks, templates, contexts):
+        """
+        Render the (file_path, output, context name) tasks, yielding for each
+        one, once rendered, if the output changed
+        """
+        if self.jobs > 1 and len(tasks) > 1:
+            for label, changed, timings in self._map_parallel(
+                _render_matrix_worker, tasks, templates, contexts
+            ):
+                if timings is not None:
+                    self.profiler.templates[label] = timings
+                yield changed
+            return
+        if self.enable_async:
+            # The renders of all the tasks overlap in one event loop
+            yield from _run_concurrently(
+                [
+                    self._render_to_async(
+                        file_path,
+                        output,
+                        contexts[name],
+                        self._matrix_label(file_path, name),
+                    )
+                    for file_path, output, name in tasks
+                ]
+            )
+            return
+        for file_path, output, name in tasks:
+            yield self._render_to(
+                file_path, output, contexts[name], self._matrix_label(file_path, name)
+            )
+
+    def _matrix_label(self, file_path, name):
+        """Name of the render of a template for a context, in the profiling report"""
+        return f"{self.template_name(file_path)} [{name}]"
+
+    def affected_templates(self, changed):
+        """
+        Files to render again after a change of the given files: the changed
+        templates and the templates depending on them, and the templates
+        reading a changed data file. The changed data files are unloaded, to
+        be loaded again by the next render. The compiled templates of the
+        unchanged files are kept.
+        """
+        if self.graph is None:
+            self.graph = TemplateGraph(self.env)
+        templates = {
+            self.template_name(template): template for template in self.finder.find()
+        }
+        changed_templates = set()
+        sections = set()
+        for path in changed:
+            if os.path.normpath(path) in self.data_files:
+                section, loader = self.data_files[os.path.normpath(path)]
+                self.data.unload(loader)
+                if section is None:
+                    # Anonymous source: any variable may have changed
+                    return list(templates.values())
+                sections.add(section)
+            else:
+                name = self.template_name(path)
+                self.graph.invalidate(name)
+                changed_templates.add(name)
+        names = set(self.graph.dependents(changed_templates, templates))
+        names.update(self.graph.readers(sections, templates))
+        return [template for name, template in templates.items() if name in names]
+
+    def watch(self, interval=DEFAULT_INTERVAL):
+        """
+        Render All File, then render again the files affected by each change
+        of the templates or of the data files, until interrupted. This
+        instance and its compiled templates are kept between the renders, so
+        only the changed templates are compiled again.
+          Yields:
+            After each render, a tuple (changed paths, result): the changed
+            paths are None for the first render, the result is the number of
+            rendered files by status, or the exception raised by the render
+        """
+        if not self.keep_template:
+            raise ValueError("Templates must be kept to be watched")
+        watcher = Watcher([self.basepath, *self.data_files], interval, self._is_written)
+        changed = None
+        templates = None
+        while True:
+            try:
+                result = self.render_all(templates)
+            except Exception as e:  # pylint: disable=W0718
+                result = e
+            yield changed, result
+            templates = []
+            while not templates:
+                changed = watcher.wait()
+                templates = self.affected_templates(changed)
+
+    def _is_written(self, path):
+        """
+        Check if a file is written by the renders, to ignore its changes: a
+        file rendered from a template, the manifest, the graph file or a file
+        of the cache
+        """
+        extensions = (self.ext,) if isinstance(self.ext, str) else self.ext
+        if any(os.path.isfile(path + extension) for extension in extensions):
+            return True
+        path = os.path.abspath(path)
+        written = [self.graph_file, self.manifest.path if self.manifest else None]
+        if any(file and path == os.path.abspath(file) for file in written):
+            return True
+        if self.cache_dir:
+            cache_dir = os.path.abspath(self.cache_dir)
+            return os.path.commonpath([path, cache_dir]) == cache_dir
+        return False
+
+    def compile_bundle(self, target, compress=True):
+        """
+        Compile the templates found, and the templates they extend, include or
+        import, in a bundle loaded by the bundle option: the templates are
+        then rendered without being parsed nor compiled.
+          Parameters:
+            target (str): zip file of the bundle, or directory without compression
+            compress (bool): write a zip file rather than a directory
+          Returns:
+            The number of compiled templates
+        """
+        # Imported here, as zipfile is slow to import
+        from .bundle import write_index  # pylint: disable=C0415
+
+        graph = TemplateGraph(self.env)
+        names = set()
+        for template in self.finder.find():
+            name = self.template_name(template)
+            names.add(name)
+            # The templates referenced dynamically are compiled when rendered
+            names.update(graph.closure(name) or ())
+        # The missing templates, referenced as optional, are not compiled
+        names = {name for name in names if graph.node(name) is not MISSING}
+        self.env.compile_templates(
+            target,
+            filter_func=names.__contains__,
+            zip="deflated" if compress else None,
+            ignore_errors=False,
+        )
+        write_index(
+            target,
+            {name: graph.node(name).checksum for name in names},
+            self.env.sandboxed,
+            self.env.is_async,
+        )
+        return len(names)
+
+    def prune_cache(self):
+        """Evict the least recently used entries of each cache above the size limit"""
+        if not self.cache_dir:
+            return
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_dir():
+                    prune(entry.path, self.cache_max_size)
+
+    def plan_render(self, templates):
+        """
+        Order the given files so that the templates sharing the same parents
+        (extended, included or imported templates) are rendered one after
+        the other, and so by the same worker in parallel mode.
+        """
+        paths = {self.template_name(template): template for template in templates}
+        return [paths[name] for name in self.graph.order(paths)]
+
+    def _compile_shared(self, templates, cache_dir):
+        """
+        Compile once, in this process, the parents shared by the given files,
+        storing them in the bytecode cache of cache_dir read by the workers.
+        """
+        names = [self.template_name(template) for template in templates]
+        bytecode_cache = self.env.bytecode_cache
+        if bytecode_cache is None:
+            self.env.bytecode_cache = TemplateBytecodeCache(
+                os.path.join(cache_dir, "bytecode"), self.cache_max_size
+            )
+        try:
+            for name in self.graph.shared(names):
+                self.env.get_template(name)
+        finally:
+            self.env.bytecode_cache = bytecode_cache
+
+    def _render(self, templates):
+        """
+        Render the given files, yielding for each file, once rendered,
+        a tuple (file_path, changed)
+        """
+        if self.jobs > 1 and len(templates) > 1:
+            yield from self._render_parallel(templates)
+        elif self.enable_async:
+            # The renders of all the files overlap in one event loop
+            changes = _run_concurrently(
+                [self._render_file_async(template) for template in templates]
+            )
+            yield from zip(templates, changes)
+        else:
+            for template in templates:
+                yield template, self.render_file(template)
+
+    def _worker_options(self):
+        """Constructor arguments used to rebuild this instance in a worker"""
+        return {
+            "extensions": self.ext,
+            "basepath": self.basepath,
+            "keep_template": self.keep_template,
+            "stream": self.stream,
+            "undefined": self.undefined,
+            "cache_dir": self.cache_dir,
+            "cache_max_size": self.cache_max_size,
+            "profile": self.profiler is not None,
+            "key_policy": self.key_policy,
+            "bundle": self.bundle,
+            "sandbox": self.budget is not None,
+            "max_time": self.budget.max_time if self.budget else None,
+            "max_output": self.budget.max_output if self.budget else None,
+            "max_loop": self.budget.max_loop if self.budget else None,
+            "enable_async": self.enable_async,
+        }
+
+    def _load_used_data(self, templates):
+        """
+        Load the data read by the given templates, before the context is sent
+        to the rendering processes, so that each source is loaded only once.
+        The templates of a bundle are not parsed to find the data they read:
+        each rendering process loads the data read by its templates.
+        """
+        if not isinstance(self.data, LazyContext) or not self.data.pending:
+            return
+        if self.bundle:
+            return
+        names = set()
+        for template in templates:
+            try:
+                dependencies = find_dependencies(
+                    self.env, self.template_name(template), self.graph
+                )
+            except jinja2.TemplateError:
+                # The error is reported by the render of the template
+                dependencies = None
+            if dependencies is None:
+                self.data.load_all()
+                return
+            names.update(dependencies[1])
+        for name in names:
+            self.data.get(name)
+
+    def _render_parallel(self, templates):
+        """
+        Render the given files on a process pool. Each worker builds its own
+        jinja2 Environment and receives the context once, at startup.
+        Results are yielded in the given order once rendered, and the
+        timings measured by the workers are merged in the profiler.
+        """
+        for file_path, changed, timings in self._map_parallel(
+            _render_worker, templates, templates
+        ):
+            if timings is not None:
+                self.profiler.templates[self.template_name(file_path)] = timings
+            yield file_path, changed
+
+    def _map_parallel(self, function, tasks, templates, contexts=None):
+        """
+        Run function on each task on a process pool rendering the given
+        templates, yielding the results in the order of the tasks
+        """
+        # Imported here, as multiprocessing is slow to import
+        from concurrent.futures import ProcessPoolExecutor  # pylint: disable=C0415
+
+        self._load_used_data(templates)
+        options = self._worker_options()
+        run_cache_dir = None
+        if self.plan:
+            # Without cache, the shared parents are compiled in a cache
+            # directory used for this run only
+            if not self.cache_dir:
+                run_cache_dir = options["cache_dir"] = tempfile.mkdtemp()
+            self._compile_shared(templates, options["cache_dir"])
+        workers = min(self.jobs, len(tasks))
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(options, self.data, contexts, self.providers),
+            ) as executor:
+                chunksize = max(1, len(tasks) // (workers * 4))
+                yield from executor.map(function, tasks, chunksize=chunksize)
+        finally:
+            if run_cache_dir:
+                shutil.rmtree(run_cache_dir, ignore_errors=True)
+
+
+def _json_section(json_content, key_policy="top"):
+    """Loader of a json section, from its content"""
+    # protect again key contening dashes (it is the case in the keys of strategy
+    # context for example), as defined by the key policy. The keys of a json
+    # content are normalized while it is decoded.
+    if isinstance(json_content, str):
+        return json_loads(json_content, key_policy)
+    return normalize_keys(json_content, key_policy)
+
+
+def _json_file_section(file_path, key_policy="top"):
+    """Loader of a json section, from a file"""
+    # The bytes are decoded by the json parser, without a text copy
+    with open(file_path, "rb") as f:
+        content = f.read()
+    if not content.strip():
+        return None
+    return json_loads(content, key_policy)
+
+
+def json_files(paths):
+    """
+    Json files of the given paths: a file, or the .json files of a directory,
+    in name order
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.endswith(".json") and os.path.isfile(os.path.join(path, name))
+            )
+        else:
+            files.append(path)
+    return files
+
+
+def _fetch_url(url, data_format=None, **options):
+    """Data provider: parsed content of an url, see add_data_url_provider"""
+    return UrlParser(url, data_format, **options).parse()
+
+
+def _run_concurrently(coroutines):
+    """Run the coroutines in a new event loop, returning their results in order"""
+    # Imported here, as asyncio is slow to import
+    import asyncio  # pylint: disable=C0415
+
+    async def gather():
+        return await asyncio.gather(*coroutines)
+
+    return asyncio.run(gather())
+
+
+def _parse(parser):
+    """Thread pool task: parse one data source"""
+    return parser.parse()
+
+
+def _parse_all(parsers, max_connections):
+    """
+    Loader of several data sources, parsed concurrently by at most
+    max_connections threads, and merged in the given order
+    """
+    if len(parsers) == 1 or max_connections <= 1:
+        contents = [parser.parse() for parser in parsers]
+    else:
+        from concurrent.futures import ThreadPoolExecutor  # pylint: disable=C0415
+
+        workers = min(max_connections, len(parsers))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            contents = list(executor.map(_parse, parsers))
+    data = {}
+    for content in contents:
+        data.update(content)
+    return data
+
+
+_WORKER = None
+# Variables of the contexts by name, in matrix mode
+_CONTEXTS = None
+
+
+def _init_worker(options, data, contexts=None, providers=None):
+    """Process pool initializer: create the Main instance used by this worker"""
+    global _WORKER, _CONTEXTS  # pylint: disable=W0603
+    _WORKER = Main(**options)
+    _WORKER.data = data
+    for name, (function, max_concurrency) in (providers or {}).items():
+        _WORKER.add_provider(name, function, max_concurrency)
+    _CONTEXTS = contexts
+
+
+def _render_worker(file_path):
+    """
+    Process pool task: render one file with the worker Main instance.
+    Returns the file path, if it changed and its timings when profiling.
+    """
+    changed = _WORKER.render_file(file_path)
+    timings = None
+    if _WORKER.profiler:
+        timings = _WORKER.profiler.templates.pop(_WORKER.template_name(file_path))
+    return file_path, changed, timings
+
+
+def _render_matrix_worker(task):
+    """
+    Process pool task: render one file for one context of the matrix.
+    Returns the label of the render, if it changed and its timings when profiling.
+    """
+    file_path, output, name = task
+    label = _WORKER._matrix_label(file_path, name)  # pylint: disable=W0212
+    changed = _WORKER._render_to(  # pylint: disable=W0212
+        file_path, output, _CONTEXTS[name], label
+    )
+    timings = None
+    if _WORKER.profiler:
+        timings = _WORKER.profiler.templates.pop(label)
+    return label, changed, timings
@@ -0,0 +1,120 @@
+"""
+Manifest Module
+"""
+
+import hashlib
+import json
+import os
+from collections.abc import Mapping
+
+from .graph import TemplateGraph
+
+
+def hash_text(text):
+    """Return the hash of a text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _json_default(value):
+    """Serialize the values unknown to json: mappings as dict, others by repr"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    return repr(value)
+
+
+def hash_value(value):
+    """Return the hash of a context value, independently of the key order"""
+    return hash_text(json.dumps(value, sort_keys=True, default=_json_default))
+
+
+def find_dependencies(env, name, graph=None):
+    """
+    Find the inputs of a template.
+      Parameters:
+        env (Environment): jinja2 environment used to load the templates
+        name (str): name of the template
+        graph (TemplateGraph): graph of the templates already parsed
+      Returns:
+        A tuple (templates, variables): the hash of the source of the template
+        and of every template it includes, extends or imports (recursively),
+        None for a missing optional template, so that its creation is a change,
+        and the name of the context variables they read, the globals included
+        as the context overrides them. None is returned
+        when a dependency is dynamic and can not be resolved statically.
+    """
+    if graph is None:
+        graph = TemplateGraph(env)
+    closure = graph.closure(name)
+    if closure is None:
+        return None
+    templates = {}
+    variables = set()
+    for current in (name, *closure):
+        node = graph.node(current)
+        templates[current] = node.checksum
+        variables.update(node.variables, node.global_names)
+    return templates, variables
+
+
+class Manifest:
+    """
+    Record of the inputs used to render each template, stored in a json file.
+    A template whose inputs are unchanged since the previous run does not need
+    to be rendered again.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path, signature=""):
+        """
+        Parameters:
+          path (str): path of the manifest file
+          signature (str): identify the rendering options. Entries recorded
+            with another signature are discarded.
+        """
+        self.path = path
+        self.signature = signature
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        """Load the entries of the manifest file, if it exists"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                content = json.load(f)
+        except (OSError, ValueError):
+            return
+        if (
+            isinstance(content, dict)
+            and content.get("version") == self.VERSION
+            and content.get("signature") == self.signature
+        ):
+            self.entries = content.get("templates", {})
+
+    def save(self):
+        """Write the entries in the manifest file"""
+        content = {
+            "version": self.VERSION,
+            "signature": self.signature,
+            "templates": self.entries,
+        }
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(content, f, indent=1, sort_keys=True)
+
+    def is_up_to_date(self, name, output, inputs):
+        """
+        Check if a template was already rendered with the same inputs
+        and if its rendered file still exists.
+        """
+        return (
+            inputs is not None
+            and self.entries.get(name) == inputs
+            and os.path.isfile(output)
+        )
+
+    def update(self, name, inputs):
+        """Record the inputs used to render a template"""
+        if inputs is None:
+            self.entries.pop(name, None)
+        else:
+            self.entries[name] = inputs
@@ -0,0 +1,53 @@
+"""
+Matrix Module
+"""
+
+import os
+from collections.abc import Mapping
+
+from .parser import FileParser, normalize_keys
+
+# Path of a file rendered for a context, relative to the basepath
+DEFAULT_OUTPUT = "{{ name }}/{{ path }}"
+
+
+def load_matrix(path, file_format=None, cache_dir=None, key_policy="none"):
+    """
+    Load the contexts of a matrix render, each one a dict of variables.
+    The matrix is either a directory, each data file of which is a context
+    named after the file, or a data file containing a list of contexts
+    (named by their index) or a mapping of contexts by name. The parsed data
+    files are cached in cache_dir, if defined. The keys of each context are
+    normalized according to key_policy (see KEY_POLICIES), the context names
+    being kept.
+      Returns:
+        A list of (name, context)
+    """
+    if os.path.isdir(path):
+        contexts = [
+            (
+                os.path.splitext(entry)[0],
+                FileParser(
+                    os.path.join(path, entry),
+                    cache_dir=cache_dir,
+                    key_policy=key_policy,
+                ).parse(),
+            )
+            for entry in sorted(os.listdir(path))
+            if os.path.isfile(os.path.join(path, entry))
+        ]
+    else:
+        content = FileParser(path, file_format, cache_dir).parse()
+        if isinstance(content, Mapping):
+            contexts = [(str(name), context) for name, context in content.items()]
+        elif isinstance(content, list):
+            contexts = [(str(index), context) for index, context in enumerate(content)]
+        else:
+            raise ValueError(f"Matrix must be a list or a mapping of contexts: {path}")
+        contexts = [
+            (name, normalize_keys(context, key_policy)) for name, context in contexts
+        ]
+    for name, context in contexts:
+        if not isinstance(context, Mapping):
+            raise ValueError(f"Context {name} of the matrix is not a mapping: {path}")
+    return contexts
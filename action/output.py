@@ -0,0 +1,62 @@
+"""
+Output Module
+"""
+
+import os
+import shutil
+import tempfile
+
+# Block size used to compare files, in bytes
+COMPARE_BLOCK_SIZE = 1024 * 1024
+
+# Permissions of the newly created files, as open() would give them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def same_content(path1, path2):
+    """Check if two files have the same content"""
+    if os.path.getsize(path1) != os.path.getsize(path2):
+        return False
+    with open(path1, "rb") as f1, open(path2, "rb") as f2:
+        while True:
+            block1 = f1.read(COMPARE_BLOCK_SIZE)
+            if block1 != f2.read(COMPARE_BLOCK_SIZE):
+                return False
+            if not block1:
+                return True
+
+
+def write_if_changed(path, chunks, buffering=-1):
+    """
+    Write text in a file, only if the content of the file changes.
+    The text is written in a temporary file of the same directory, which
+    atomically replaces the file when its content differs. An unchanged file
+    is left untouched, its modification time included.
+      Parameters:
+        path (str): path of the written file
+        chunks (iterable): text to write, chunk by chunk
+        buffering (int): buffer size of the temporary file
+      Returns:
+        True if the file was written, False if it was unchanged
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with open(fd, "w", encoding="utf-8", buffering=buffering) as out:
+            out.writelines(chunks)
+        if os.path.isfile(path):
+            if same_content(tmp_path, path):
+                os.remove(tmp_path)
+                return False
+            shutil.copymode(path, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
@@ -1,35 +1,212 @@
 """
 Parser Module
+
+The modules only needed by some formats or by the urls (yaml, configparser,
+urllib, pickle, orjson) are imported on first use, so that a run which does
+not need them does not pay for their import at startup.
 """
 
-import configparser
+# pylint: disable=C0415
+
+import functools
+import hashlib
 import json
-import urllib.request
+import os
+import re
+import time
 from abc import ABC, abstractmethod
-from pathlib import Path
 
-import yaml
+from .cache import write_atomic
+
+
+def _yaml():
+    """The yaml module, imported on first use"""
+    import yaml
+
+    return yaml
+
+
+def _configparser_error():
+    """Base class of the configparser errors, imported on first use"""
+    import configparser
+
+    return configparser.Error
+
+
+# Policies of normalization of the mapping keys, whose dashes are replaced by
+# underscores so that they can be read as jinja attributes: "none" keeps the
+# keys, "top" normalizes the keys of the top level mapping, "recursive" the
+# keys of all the mappings
+KEY_POLICIES = ("none", "top", "recursive")
+
+
+def normalize_key(key):
+    """Key with its dashes replaced by underscores"""
+    return key.replace("-", "_") if isinstance(key, str) else key
+
+
+def _normalized(mapping):
+    """Mapping whose keys are normalized, the mapping itself if no key has a dash"""
+    if any(isinstance(key, str) and "-" in key for key in mapping):
+        return {normalize_key(key): value for key, value in mapping.items()}
+    return mapping
+
+
+def _normalized_pairs(pairs):
+    """object_pairs_hook of the json decoder normalizing the keys"""
+    return {key.replace("-", "_"): value for key, value in pairs}
+
+
+def normalize_keys(data, key_policy):
+    """
+    Normalize the keys of decoded data according to the key policy. The
+    parsers apply the policy while decoding: this is only needed for data
+    which were not decoded by them.
+    """
+    if key_policy == "none":
+        return data
+    if key_policy == "top":
+        return _normalize_top(data, key_policy)
+    return _normalize_all(data)
+
+
+def _normalize_all(data):
+    if isinstance(data, dict):
+        return {
+            normalize_key(key): _normalize_all(value) for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [_normalize_all(value) for value in data]
+    return data
+
+
+def _normalize_top(data, key_policy):
+    """Apply the "top" key policy, the other ones being applied by the decoders"""
+    if key_policy == "top" and isinstance(data, dict):
+        return _normalized(data)
+    return data
+
+
+def nested_policy(key_policy):
+    """Policy applying to the values of the top level mapping"""
+    return "recursive" if key_policy == "recursive" else "none"
+
+
+@functools.cache
+def _yaml_loader(key_policy="none"):
+    """
+    The libyaml based loader, much faster than the pure python one, if
+    available. With the "recursive" key policy, the keys of each mapping are
+    normalized when the mapping is built.
+    """
+    yaml = _yaml()
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    if key_policy != "recursive":
+        return loader
+
+    class NormalizingLoader(loader):  # pylint: disable=R0901
+        """Loader normalizing the keys of the mappings"""
+
+        def construct_mapping(self, node, deep=False):
+            return _normalized(super().construct_mapping(node, deep))
+
+    return NormalizingLoader
+
+
+@functools.cache
+def _orjson():
+    """The optional orjson module, imported on first use, None if not installed"""
+    try:
+        import orjson
+    except ImportError:  # pragma: no cover
+        return None
+    return orjson
+
+
+def json_loads(content, key_policy="none"):
+    """
+    Deserialize a JSON document (str or bytes), with the optional orjson
+    backend if it is installed, else with the json standard module.
+    With the "recursive" key policy, a content which has a dash, literal
+    or escaped, is decoded by the json module normalizing the keys of each
+    object when it is built: a content without any is decoded as usual.
+    """
+    if key_policy == "recursive":
+        dash, escaped = (
+            ("-", "\\u002") if isinstance(content, str) else (b"-", b"\\u002")
+        )
+        if dash in content or escaped in content:
+            return json.loads(content, object_pairs_hook=_normalized_pairs)
+        return _json_loads(content)
+    return _normalize_top(_json_loads(content), key_policy)
+
+
+def _json_loads(content):
+    orjson = _orjson()
+    if orjson is not None:
+        try:
+            return orjson.loads(content)  # pylint: disable=E1101
+        except orjson.JSONDecodeError:  # pylint: disable=E1101
+            # orjson is stricter (NaN, big integers, ...): fallback on json
+            pass
+    return json.loads(content)
 
 
 class Parser(ABC):
     """Abstract Parser Base Class"""
 
-    def __init__(self, parser_format=None):
+    def __init__(self, parser_format=None, key_policy="none"):
+        """
+        Parameters:
+          parser_format (str): format of the content, detected if not defined
+          key_policy (str): normalization policy of the keys, see KEY_POLICIES
+        """
         if parser_format and parser_format not in self.FORMATS:
             raise ValueError(
                 "specified format is unknown."
                 f"Supported format are: {self.FORMATS.keys()}"
             )
+        if key_policy not in KEY_POLICIES:
+            raise ValueError(
+                f"Unknown key policy: {key_policy}. Supported policies are: {KEY_POLICIES}"
+            )
         self.format = parser_format
+        self.key_policy = key_policy
         self.content = ""
+        # Time spent loading and parsing the content, in seconds
+        self.timings = {}
+
+    @property
+    def source(self):
+        """Location of the content, for reports"""
+        return None
 
     @abstractmethod
     def load(self):
         """Load the content to Parse (must be impletend in child class)"""
 
     def parse(self):
-        """Load and Parse the content"""
-        self.content = self.load()
+        """Load and Parse the content. Only the parsed content is kept."""
+        try:
+            self.content = self._timed("load", self.load)
+            return self._timed("parse", self._parse_content)
+        finally:
+            # The raw content is not held in memory once parsed
+            self.content = ""
+
+    def _timed(self, phase, function):
+        """Call function, adding the time spent to the timings of phase"""
+        start = time.perf_counter()
+        try:
+            return function()
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[phase] = self.timings.get(phase, 0.0) + elapsed
+
+    def _parse_content(self):
+        """Parse the loaded content"""
+        if isinstance(self.content, bytes):
+            self.content = self.content.decode("utf-8")
         if self.format and self.format not in self.FORMATS:
             raise ValueError(
                 "specified format is unknown."
@@ -37,60 +214,89 @@ class Parser(ABC):
             )
 
         if self.format:
-            content = getattr(FileParser, self.FORMATS[self.format])(self.content)
+            content = getattr(FileParser, self.FORMATS[self.format])(
+                self.content, self.key_policy
+            )
         else:
-            content = self._parse_generic(self.content)
+            content = self._parse_generic(self.content, self.key_policy)
 
         return content
 
     @staticmethod
-    def _parse_ini(content):
+    def _parse_ini(content, key_policy="none"):
+        import configparser
+
         config_object = configparser.ConfigParser()
-        config_object.optionxform = str
+        config_object.optionxform = normalize_key if key_policy == "recursive" else str
         config_object.read_string(content)
+        section_name = str if key_policy == "none" else normalize_key
         output_dict = {
-            s: dict(config_object.items(s)) for s in config_object.sections()
+            section_name(s): dict(config_object.items(s))
+            for s in config_object.sections()
         }
         return output_dict
 
     @staticmethod
-    def _parse_json(content):
-        return json.loads(content)
+    def _parse_json(content, key_policy="none"):
+        return json_loads(content, key_policy)
 
     @staticmethod
-    def _parse_yaml(content):
-        return yaml.safe_load(content)
+    def _parse_yaml(content, key_policy="none"):
+        return _normalize_top(
+            _yaml().load(content, Loader=_yaml_loader(key_policy)), key_policy
+        )
 
     @staticmethod
-    def _parse_env(content):
+    def _parse_env(content, key_policy="none"):
         output_dict = {}
         for variable in content.split("\n"):
             clean_variable = bytes(variable.strip(), "utf-8").decode("unicode_escape")
             if clean_variable != "":
                 name, value = clean_variable.split("=", 1)
                 output_dict.update({name: value})
-        return output_dict
+        return _normalize_top(output_dict, "none" if key_policy == "none" else "top")
+
+    # First line of the content which is not blank and not a comment
+    _FIRST_LINE = re.compile(r"^[ \t]*([^\s#;].*)$", re.MULTILINE)
+    _INI_SECTION = re.compile(r"\[[^\[\]\"',]+\]\s*")
+    _ENV_VARIABLE = re.compile(r"[A-Za-z_][A-Za-z0-9_.-]*[ \t]*=")
 
     @staticmethod
-    def _parse_generic(content):
-        try:
-            return ("ini", Parser._parse_ini(content))
-        except configparser.Error:
-            pass
-        try:
-            return ("json", Parser._parse_json(content))
-        except json.JSONDecodeError:
-            pass
-        try:
-            return ("env", Parser._parse_env(content))
-        except ValueError:
-            pass
-        try:
-            return ("yaml", Parser._parse_yaml(content))
-        except yaml.YAMLError:
-            pass
+    def _detect_format(content):
+        """
+        Detect the format of a content from its first significant line,
+        without parsing it:
+        - an INI section header (`[section]`) is an INI content,
+        - a content starting with `{` or `[` is a JSON content,
+        - a variable definition (`NAME=value`) is an ENV content,
+        - any other content is a YAML content.
+        """
+        match = Parser._FIRST_LINE.search(content)
+        if not match:
+            return "yaml"
+        line = match.group(1)
+        if Parser._INI_SECTION.fullmatch(line):
+            return "ini"
+        if line.startswith(("{", "[")):
+            return "json"
+        if Parser._ENV_VARIABLE.match(line):
+            return "env"
+        return "yaml"
 
-        raise ValueError("File format is not automatically recognized")
+    @staticmethod
+    def _parse_generic(content, key_policy="none"):
+        """Parse a content of unknown format, detected by _detect_format"""
+        content_format = Parser._detect_format(content.lstrip("\ufeff"))
+        try:
+            return getattr(Parser, Parser.FORMATS[content_format])(content, key_policy)
+        except json.JSONDecodeError as e:
+            # A YAML flow collection also starts with { or [
+            try:
+                return Parser._parse_yaml(content, key_policy)
+            except _yaml().YAMLError:
+                raise ValueError("File format is not automatically recognized") from e
+        except (_configparser_error(), _yaml().YAMLError, ValueError) as e:
+            raise ValueError("File format is not automatically recognized") from e
 
     FORMATS = {
         "ini": "_parse_ini",
@@ -101,20 +307,184 @@ class Parser(ABC):
     }
 
 
-class UrlParser(Parser):
-    """Parser dedicated to Url Content"""
+class UrlParser(Parser):  # pylint: disable=R0902
+    """
+    Parser dedicated to Url Content.
+    With a cache directory, the parsed content is stored with the ETag and
+    Last-Modified headers of the response, and the next fetches of the url
+    are conditional requests: when the server answers 304 Not Modified,
+    the stored content is used without being parsed again.
+    """
+
+    # Timeout of the http requests, in seconds
+    DEFAULT_TIMEOUT = 30
+    # Number of retries of a failed http request
+    DEFAULT_RETRIES = 2
+    # Delay before the first retry, doubled on each retry, in seconds
+    DEFAULT_BACKOFF = 0.5
 
-    def __init__(self, url, waited_format=None):
+    def __init__(  # pylint: disable=R0913
+        self,
+        url,
+        waited_format=None,
+        cache_dir=None,
+        ttl=None,
+        timeout=DEFAULT_TIMEOUT,
+        retries=0,
+        backoff=DEFAULT_BACKOFF,
+        key_policy="none",
+    ):
+        """
+        Parameters:
+          url (str): url of the content
+          waited_format (str): format of the content, detected if not defined
+          cache_dir (str): directory where parsed contents are cached
+          ttl (int): duration during which a cached content is used without
+            any request, in seconds. When not defined, a conditional request
+            is always done.
+          timeout (int): timeout of the http request, in seconds
+          retries (int): number of retries of a request failing on a network
+            error, a timeout or a server error (5xx or 429 http status)
+          backoff (float): delay before the first retry, doubled on each
+            retry, in seconds
+          key_policy (str): normalization policy of the keys, see KEY_POLICIES
+        """
         self.url = url
-        super().__init__(waited_format)
+        self.waited_format = waited_format
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cached = None
+        self.etag = None
+        self.last_modified = None
+        super().__init__(waited_format, key_policy)
+
+    @property
+    def source(self):
+        """Location of the content: the url"""
+        return self.url
 
     def load(self):
-        with urllib.request.urlopen(self.url) as remote_content:
-            self.content = remote_content.read()
-            content_type = remote_content.getheader("content-type")
-            if (self.format is None) and (content_type in UrlParser.CONTENT_TYPE):
-                self.format = UrlParser.CONTENT_TYPE[content_type]
-            return self.content
+        """
+        Fetch the content of the url.
+        Returns None if the server answers that the cached content is not modified.
+        """
+        headers = {}
+        if self.cached:
+            if self.cached["etag"]:
+                headers["If-None-Match"] = self.cached["etag"]
+            if self.cached["last_modified"]:
+                headers["If-Modified-Since"] = self.cached["last_modified"]
+        import urllib.error
+        import urllib.request
+
+        request = self.url
+        if headers:
+            request = urllib.request.Request(self.url, headers=headers)
+        try:
+            with self._urlopen(request) as remote_content:
+                self.content = remote_content.read()
+                self.etag = remote_content.getheader("etag")
+                self.last_modified = remote_content.getheader("last-modified")
+                content_type = remote_content.getheader("content-type")
+                if (self.format is None) and (content_type in UrlParser.CONTENT_TYPE):
+                    self.format = UrlParser.CONTENT_TYPE[content_type]
+                return self.content
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and self.cached:
+                return None
+            raise
+
+    @staticmethod
+    def _is_transient(error):
+        """Check if a failed request may succeed if it is retried"""
+        import urllib.error
+
+        if isinstance(error, urllib.error.HTTPError):
+            return error.code >= 500 or error.code == 429
+        return isinstance(error, (urllib.error.URLError, OSError))
+
+    def _urlopen(self, request):
+        """Open the url, retrying with an exponential backoff on transient errors"""
+        import urllib.request
+
+        attempt = 0
+        while True:
+            try:
+                return urllib.request.urlopen(request, timeout=self.timeout)
+            except OSError as e:  # URLError, HTTPError and timeouts are OSError
+                if attempt >= self.retries or not self._is_transient(e):
+                    raise
+            time.sleep(self.backoff * 2**attempt)
+            attempt += 1
+
+    def parse(self):
+        """Load and Parse the content, through the cache if it is enabled"""
+        if not self.cache_dir:
+            return super().parse()
+
+        self.cached = self._timed("load", self._read_cache)
+        if (
+            self.cached
+            and self.ttl is not None
+            and time.time() - self.cached["fetched_at"] < self.ttl
+        ):
+            self.format = self.cached["format"]
+            return self.cached["data"]
+        self.content = self._timed("load", self.load)
+        if self.content is None:
+            # Not Modified: reuse the cached content
+            entry = self.cached
+            entry["fetched_at"] = time.time()
+            self.format = entry["format"]
+        else:
+            try:
+                entry = {
+                    "url": self.url,
+                    "etag": self.etag,
+                    "last_modified": self.last_modified,
+                    "fetched_at": time.time(),
+                    "data": self._timed("parse", self._parse_content),
+                }
+            finally:
+                self.content = ""
+        entry["format"] = self.format
+        self._write_cache(entry)
+        return entry["data"]
+
+    def _cache_name(self):
+        # The waited format and the keys policy are part of the key, as they
+        # change the parsed content
+        key = f"{self.url}\0{self.waited_format or ''}\0{self.key_policy}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest() + ".pickle"
+
+    def _read_cache(self):
+        """Read the cache entry of the url, None if there is no valid entry"""
+        import pickle
+
+        path = os.path.join(self.cache_dir, self._cache_name())
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if not isinstance(entry, dict) or entry.get("url") != self.url:
+            return None
+        # Mark the entry as recently used for the eviction
+        os.utime(path)
+        return entry
+
+    def _write_cache(self, entry):
+        import pickle
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        write_atomic(
+            self.cache_dir,
+            self._cache_name(),
+            lambda f: pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL),
+        )
 
     CONTENT_TYPE = {
         "application/json": "json",
@@ -127,11 +497,33 @@ class UrlParser(Parser):
 
 
 class FileParser(Parser):
-    """Parser dedicated to File"""
+    """
+    Parser dedicated to File.
+    With a cache directory, the parsed content is stored under the hash of
+    the file content, the format and the PARSER_VERSION: an unchanged file
+    is loaded from the cache without being parsed again.
+    """
+
+    # Version of the parsing, part of the cache keys: to change when the
+    # parsed content of a same file changes
+    PARSER_VERSION = 1
 
-    def __init__(self, file_path, file_format=None):
+    def __init__(self, file_path, file_format=None, cache_dir=None, key_policy="none"):
+        """
+        Parameters:
+          file_path (str): path of the file
+          file_format (str): format of the content, detected if not defined
+          cache_dir (str): directory where parsed contents are cached
+          key_policy (str): normalization policy of the keys, see KEY_POLICIES
+        """
         self.file_path = file_path
-        super().__init__(file_format)
+        self.cache_dir = cache_dir
+        super().__init__(file_format, key_policy)
+
+    @property
+    def source(self):
+        """Location of the content: the file path"""
+        return self.file_path
 
     def load(self):
         with open(self.file_path, "r", encoding="utf-8") as f:
@@ -140,10 +532,76 @@ class FileParser(Parser):
             self.format = self._get_format_from_extension(self.file_path)
         return self.content
 
+    def parse(self):
+        """Load and Parse the content, through the cache if it is enabled"""
+        if not self.cache_dir:
+            return super().parse()
+
+        self.content = self._timed("load", self._load_bytes)
+        try:
+            name = self._cache_name(self.content)
+            entry = self._timed("load", functools.partial(self._read_cache, name))
+            if entry is not None:
+                self.format = entry["format"]
+                return entry["data"]
+            entry = {
+                "path": self.file_path,
+                "data": self._timed("parse", self._parse_content),
+                "format": self.format,
+            }
+        finally:
+            self.content = ""
+        self._write_cache(name, entry)
+        return entry["data"]
+
+    def _load_bytes(self):
+        """Read the raw file content, hashed by the cache"""
+        with open(self.file_path, "rb") as f:
+            content = f.read()
+        if not self.format:
+            self.format = self._get_format_from_extension(self.file_path)
+        return content.replace(b"\r\n", b"\n")
+
+    def _cache_name(self, content):
+        # The format and the keys policy are part of the key, as they change
+        # the parsed content
+        key = hashlib.sha256(content)
+        key.update(
+            f"\0{self.format or ''}\0{self.key_policy}\0{self.PARSER_VERSION}".encode(
+                "utf-8"
+            )
+        )
+        return key.hexdigest() + ".pickle"
+
+    def _read_cache(self, name):
+        """Read a cache entry, None if there is no valid entry"""
+        import pickle
+
+        path = os.path.join(self.cache_dir, name)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if not isinstance(entry, dict) or "data" not in entry:
+            return None
+        # Mark the entry as recently used for the eviction
+        os.utime(path)
+        return entry
+
+    def _write_cache(self, name, entry):
+        import pickle
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        write_atomic(
+            self.cache_dir,
+            name,
+            lambda f: pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL),
+        )
+
     @staticmethod
     def _get_format_from_extension(file_path):
-        path = Path(file_path)
-        extension = path.suffix.lower().lstrip(".")
+        extension = os.path.splitext(file_path)[1].lower().lstrip(".")
         if extension in FileParser.FORMATS:
             return extension
         return None
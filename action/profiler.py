@@ -0,0 +1,140 @@
+"""
+Profiler Module
+"""
+
+import json
+import time
+from contextlib import contextmanager
+
+from jinja2 import BaseLoader
+
+# Phases of the rendering of a template, in order
+TEMPLATE_PHASES = ("load", "compile", "render", "write")
+
+
+class ProfilingLoader(BaseLoader):
+    """
+    Template loader measuring the time spent by another loader to load the
+    template sources. Compilation is done by BaseLoader.load, out of the
+    measured time.
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.elapsed = 0.0
+
+    def get_source(self, environment, template):
+        start = time.perf_counter()
+        try:
+            return self.loader.get_source(environment, template)
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+    def list_templates(self):
+        return self.loader.list_templates()
+
+
+class Profiler:
+    """
+    Record of the time spent in each phase of a run: per template (load,
+    compile, render and write), per data source (load and parse) and for the
+    whole run (find, inputs, render).
+    """
+
+    VERSION = 1
+
+    def __init__(self):
+        self.phases = {}
+        self.templates = {}
+        self.sources = []
+
+    @contextmanager
+    def measure(self, record, phase):
+        """Add the time spent in the with block to record[phase]"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record[phase] = record.get(phase, 0.0) + time.perf_counter() - start
+
+    def timed(self, record, phase, iterable):
+        """
+        Yield the items of iterable, adding the time spent producing them to
+        record[phase]: for a generator, the time spent in the generator.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.measure(record, phase):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def template(self, name):
+        """New timings of a template, by phase, replacing the previous ones"""
+        record = self.templates[name] = dict.fromkeys(TEMPLATE_PHASES, 0.0)
+        return record
+
+    def add_source(self, source, data_format, timings):
+        """Record the timings of a loaded data source"""
+        self.sources.append({"source": source, "format": data_format, **timings})
+
+    def report(self):
+        """
+        Report of the run, as a json serializable dict. Templates and sources
+        are sorted from the slowest one.
+        """
+        templates = [
+            {"template": name, **timings, "total": sum(timings.values())}
+            for name, timings in self.templates.items()
+        ]
+        templates.sort(key=lambda entry: (-entry["total"], entry["template"]))
+        sources = [
+            {**entry, "total": entry.get("load", 0.0) + entry.get("parse", 0.0)}
+            for entry in self.sources
+        ]
+        sources.sort(key=lambda entry: -entry["total"])
+        return {
+            "version": self.VERSION,
+            "phases": self.phases,
+            "templates": templates,
+            "sources": sources,
+        }
+
+    def summary(self, top=10):
+        """Human readable summary of the report, with the top slowest templates"""
+        report = self.report()
+        lines = [
+            "Phases: "
+            + ", ".join(
+                f"{name} {elapsed:.3f}s" for name, elapsed in self.phases.items()
+            )
+        ]
+        if report["templates"]:
+            lines.append(
+                f"Slowest templates ({min(top, len(report['templates']))}"
+                f"/{len(report['templates'])}):"
+            )
+            lines.append(
+                f"  {'total':>8}"
+                + "".join(f"{phase:>9}" for phase in TEMPLATE_PHASES)
+                + "  template"
+            )
+            for entry in report["templates"][:top]:
+                lines.append(
+                    f"  {entry['total']:>8.3f}"
+                    + "".join(f"{entry[phase]:>9.3f}" for phase in TEMPLATE_PHASES)
+                    + f"  {entry['template']}"
+                )
+        for entry in report["sources"]:
+            lines.append(
+                f"Data source {entry['source']}: load {entry.get('load', 0.0):.3f}s,"
+                f" parse {entry.get('parse', 0.0):.3f}s"
+            )
+        return "\n".join(lines)
+
+    def save(self, path):
+        """Write the report in a json file"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=1)
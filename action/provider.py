@@ -0,0 +1,68 @@
+"""
+Data Provider Module
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+class DataProvider:
+    """
+    Global function of the templates looking up data on demand, such as the
+    content of an url. The lookup is done once by arguments, which must be
+    hashable, and its result is shared by all the renders.
+    In async mode, the templates call lookup_async instead: the blocking
+    lookup runs in a thread pool of the provider, so the renders waiting for
+    it do not block the other renders of the event loop, and concurrent
+    renders needing the same lookup wait for the same call.
+    """
+
+    def __init__(self, function, max_concurrency=None):
+        """
+        Parameters:
+          function (callable): blocking lookup
+          max_concurrency (int): maximum number of lookups running at the
+            same time in async mode, the size of the thread pool by default
+        """
+        self.function = function
+        self.max_concurrency = max_concurrency
+        self.results = {}
+        self._executor = None
+        # Pending lookups, bound to the running loop
+        self._loop = None
+        self._pending = {}
+
+    @staticmethod
+    def _key(args, kwargs):
+        return args, tuple(sorted(kwargs.items()))
+
+    def __call__(self, *args, **kwargs):
+        key = self._key(args, kwargs)
+        if key not in self.results:
+            self.results[key] = self.function(*args, **kwargs)
+        return self.results[key]
+
+    async def lookup_async(self, *args, **kwargs):
+        """Awaitable lookup, see the class description"""
+        key = self._key(args, kwargs)
+        if key in self.results:
+            return self.results[key]
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending = {}
+        future = self._pending.get(key)
+        if future is None:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_concurrency)
+            future = self._pending[key] = loop.run_in_executor(
+                self._executor, partial(self.function, *args, **kwargs)
+            )
+        try:
+            # A cancelled render does not cancel the lookup of the other renders
+            self.results[key] = await asyncio.shield(future)
+        finally:
+            if future.done():
+                self._pending.pop(key, None)
+        return self.results[key]
@@ -0,0 +1,150 @@
+"""
+Sandbox Module
+"""
+
+import math
+import time
+
+from jinja2 import nodes
+from jinja2.exceptions import SecurityError
+from jinja2.runtime import LoopContext
+from jinja2.sandbox import SandboxedEnvironment
+
+# Filter counting the iterations of the loops of a sandboxed template
+LOOP_FILTER = "_budget_loop"
+
+
+class BudgetExceeded(SecurityError):
+    """Raised when the render of a template exceeds one of its budgets"""
+
+
+class Budget:  # pylint: disable=R0902
+    """
+    Execution budgets of the render of one template: wall time, output size
+    and loop iterations. The budget is started again for each render.
+    """
+
+    def __init__(self, max_time=None, max_output=None, max_loop=None):
+        """
+        Parameters:
+          max_time (float): wall time of a render, in seconds
+          max_output (int): size of a rendered file, in characters
+          max_loop (int): iterations of all the loops of a render
+          A budget is unlimited when None.
+        """
+        self.max_time = max_time
+        self.max_output = max_output
+        self.max_loop = max_loop
+        self.name = None
+        # Start time of the current render, None out of a render
+        self.started = None
+        # Time at which the current render is aborted
+        self.deadline = math.inf
+        self.output = 0
+        self.iterations = 0
+
+    def start(self, name):
+        """Start the budget of the render of a template"""
+        self.name = name
+        self.started = time.perf_counter()
+        if self.max_time is not None:
+            self.deadline = self.started + self.max_time
+        self.output = 0
+        self.iterations = 0
+
+    def stop(self):
+        """End the render: the wall time is no longer checked"""
+        self.started = None
+        self.deadline = math.inf
+
+    def exceeded(self, budget, limit):
+        """Error reporting the exceeded budget and the usage of the render"""
+        elapsed = 0.0
+        if self.started is not None:
+            elapsed = time.perf_counter() - self.started
+        return BudgetExceeded(
+            f"Template {self.name} aborted, {budget} budget exceeded ({limit}): "
+            f"{elapsed:.3f}s, "
+            f"{self.output} characters written, {self.iterations} loop iterations"
+        )
+
+    def check_time(self):
+        """Abort the render once the wall time budget is spent"""
+        if time.perf_counter() > self.deadline:
+            raise self.exceeded("wall time", f"{self.max_time}s")
+
+    def check_output(self, size):
+        """Abort the render if size more characters exceed the output budget"""
+        if self.max_output is not None and self.output + size > self.max_output:
+            raise self.exceeded("output", f"{self.max_output} characters")
+
+    def iterate(self, iterable):
+        """Loop filter: count the iterations of a loop of the template"""
+        for item in iterable:
+            self.iterations += 1
+            if self.max_loop is not None and self.iterations > self.max_loop:
+                raise self.exceeded("loop", f"{self.max_loop} iterations")
+            self.check_time()
+            yield item
+
+    def measure(self, name, chunks):
+        """
+        Render a template chunk by chunk within the budget, counting the
+        characters of the rendered chunks. The budget starts with the render.
+        """
+        self.start(name)
+        try:
+            for chunk in chunks:
+                self.check_output(len(chunk))
+                self.output += len(chunk)
+                self.check_time()
+                yield chunk
+        finally:
+            self.stop()
+
+
+class BudgetedEnvironment(SandboxedEnvironment):
+    """
+    Sandboxed environment checking the budget of the current render on each
+    loop iteration, of recursive loops too, and on each call, so that a
+    runaway template is aborted quickly. The repetition of a string or a
+    list is limited by the output budget.
+    """
+
+    intercepted_binops = frozenset(["*"])
+
+    def __init__(self, budget, **kwargs):
+        """
+        Parameters:
+          budget (Budget): budget of the renders
+          kwargs: arguments of the jinja2 Environment
+        """
+        super().__init__(**kwargs)
+        self.budget = budget
+        self.filters[LOOP_FILTER] = budget.iterate
+
+    def compile(  # pylint: disable=R0913,R0917
+        self, source, name=None, filename=None, raw=False, defer_init=False
+    ):
+        if isinstance(source, str):
+            source = self.parse(source, name, filename)
+            # Each loop iterates through the budget
+            for loop in list(source.find_all(nodes.For)):
+                loop.iter = nodes.Filter(
+                    loop.iter, LOOP_FILTER, [], [], None, None, lineno=loop.lineno
+                )
+        return super().compile(source, name, filename, raw, defer_init)
+
+    def call(self, context, obj, /, *args, **kwargs):  # pylint: disable=W0221
+        self.budget.check_time()
+        if isinstance(obj, LoopContext) and args:
+            # loop(items) of a recursive loop iterates through the budget
+            args = (self.budget.iterate(args[0]), *args[1:])
+        return super().call(context, obj, *args, **kwargs)
+
+    def call_binop(self, context, operator, left, right):
+        if operator == "*":
+            for sequence, count in ((left, right), (right, left)):
+                if isinstance(sequence, (str, list, tuple)) and isinstance(count, int):
+                    self.budget.check_output(len(sequence) * count)
+        return super().call_binop(context, operator, left, right)
@@ -0,0 +1,113 @@
+"""
+Unit Test of Template Bundle Module
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from jinja2 import DictLoader, Environment
+
+from action.bundle import BundleLoader, read_index, write_index
+from action.graph import TemplateGraph
+
+TEMPLATES = {
+    "page.j2": "{% extends 'layout' %}{% block b %}{{ TEST1 }}{% endblock %}",
+    "layout": "[{% block b %}{% endblock %}]",
+    "other.j2": "{{ TEST1 }}",
+}
+
+
+class TestBundle(unittest.TestCase):
+    """Unit Test of the bundle index"""
+
+    def test_index(self):
+        """
+        write_index unittest: the index is written in a zip file, or in a
+        directory, and read back.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            env = Environment(loader=DictLoader(TEMPLATES))
+            for target, compress in (("bundle.zip", "deflated"), ("bundle", None)):
+                target = os.path.join(directory, target)
+                env.compile_templates(target, zip=compress)
+                write_index(target, {"page.j2": "checksum"})
+                index = read_index(target)
+                self.assertEqual(index["templates"], {"page.j2": "checksum"})
+
+    def test_read_index_not_bundle(self):
+        """
+        read_index unittest: a ValueError is raised for a file or a
+        directory which is not a bundle.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ValueError):
+                read_index(directory)
+            path = os.path.join(directory, "bundle.zip")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("not a zip")
+            with self.assertRaises(ValueError):
+                read_index(path)
+
+
+class TestBundleLoader(unittest.TestCase):
+    """Unit Test of BundleLoader Class"""
+
+    def setUp(self):
+        # pylint: disable=R1732
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "bundle.zip")
+        env = Environment(loader=DictLoader(TEMPLATES))
+        graph = TemplateGraph(env)
+        env.compile_templates(self.path, filter_func=lambda name: name != "other.j2")
+        write_index(
+            self.path,
+            {name: graph.node(name).checksum for name in ("page.j2", "layout")},
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_load(self):
+        """
+        BundleLoader.load unittest: the templates of the bundle are not
+        compiled, the templates missing from the bundle or modified are.
+        """
+        templates = dict(TEMPLATES, layout="<{% block b %}{% endblock %}>")
+        env = Environment(loader=BundleLoader(self.path, DictLoader(templates)))
+        with patch.object(env, "compile", wraps=env.compile) as compile_mock:
+            self.assertEqual(env.get_template("page.j2").render(TEST1="a"), "<a>")
+            self.assertEqual(env.get_template("other.j2").render(TEST1="a"), "a")
+        self.assertEqual(compile_mock.call_count, 2)
+        self.assertEqual(env.loader.get_source(env, "layout")[0], templates["layout"])
+
+    def test_load_uptodate(self):
+        """
+        BundleLoader.load unittest: a template of the bundle is loaded again
+        once its source is modified.
+        """
+        templates = dict(TEMPLATES)
+        env = Environment(loader=BundleLoader(self.path, DictLoader(templates)))
+        self.assertEqual(env.get_template("page.j2").render(TEST1="a"), "[a]")
+        templates["page.j2"] = "{{ TEST1 }}!"
+        self.assertEqual(env.get_template("page.j2").render(TEST1="a"), "a!")
+
+    def test_init_other_mode(self):
+        """
+        BundleLoader.__init__ unittest: a ValueError is raised for a bundle
+        compiled for another mode than the sandbox mode of the renders.
+        """
+        with self.assertRaises(ValueError):
+            BundleLoader(self.path, DictLoader(TEMPLATES), sandboxed=True)
+        with self.assertRaises(ValueError):
+            BundleLoader(self.path, DictLoader(TEMPLATES), is_async=True)
+
+    def test_init_other_version(self):
+        """
+        BundleLoader.__init__ unittest: a ValueError is raised for a bundle
+        compiled with another jinja2 version.
+        """
+        with patch("jinja2.__version__", "0.0"):
+            with self.assertRaises(ValueError):
+                BundleLoader(self.path, DictLoader(TEMPLATES))
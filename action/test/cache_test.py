@@ -0,0 +1,129 @@
+"""
+Unit Test of Cache Module
+"""
+
+import os
+import shutil
+import time
+import unittest
+
+from jinja2 import DictLoader, Environment
+
+from action.cache import TemplateBytecodeCache, prune
+from action.sandbox import Budget, BudgetedEnvironment
+
+
+class TestPrune(unittest.TestCase):
+    """Unit Test of prune function"""
+
+    def setUp(self):
+        os.makedirs(".test_cache", exist_ok=True)
+
+    def tearDown(self):
+        shutil.rmtree(".test_cache")
+
+    def test_prune_least_recently_used(self):
+        """
+        prune unittest: Least recently used files are removed until
+        the directory size is under the limit.
+        """
+        now = time.time()
+        for i in range(4):
+            path = f".test_cache/file{i}"
+            with open(path, "wb") as f:
+                f.write(b"x" * 10)
+            os.utime(path, (now + i, now + i))
+
+        prune(".test_cache", 25)
+
+        self.assertEqual(sorted(os.listdir(".test_cache")), ["file2", "file3"])
+
+    def test_prune_under_limit(self):
+        """
+        prune unittest: Nothing is removed when the directory size is under the limit.
+        """
+        with open(".test_cache/file", "wb") as f:
+            f.write(b"x" * 10)
+
+        prune(".test_cache", 10)
+
+        self.assertEqual(os.listdir(".test_cache"), ["file"])
+
+
+class TestTemplateBytecodeCache(unittest.TestCase):
+    """Unit Test of TemplateBytecodeCache Class"""
+
+    def tearDown(self):
+        shutil.rmtree(".test_cache")
+
+    def test_cache_reused_across_environments(self):
+        """
+        TemplateBytecodeCache unittest: A template compiled by one environment
+        is loaded from the cache by another environment.
+        """
+        templates = {"test.txt.j2": "{{ TEST1 }}"}
+        env = Environment(
+            loader=DictLoader(templates),
+            bytecode_cache=TemplateBytecodeCache(".test_cache"),
+        )
+        self.assertEqual(env.get_template("test.txt.j2").render(TEST1="tata"), "tata")
+        self.assertEqual(len(os.listdir(".test_cache")), 1, "Entry is stored")
+
+        cache = TemplateBytecodeCache(".test_cache")
+        env = Environment(loader=DictLoader(templates), bytecode_cache=cache)
+        with unittest.mock.patch.object(
+            env, "_compile", wraps=env._compile  # pylint: disable=W0212
+        ) as compile_mock:
+            template = env.get_template("test.txt.j2")
+            self.assertFalse(compile_mock.called, "Template is not compiled again")
+        self.assertEqual(template.render(TEST1="titi"), "titi")
+
+    def test_cache_keyed_by_source(self):
+        """
+        TemplateBytecodeCache unittest: A modified template gets its own entry.
+        """
+        cache = TemplateBytecodeCache(".test_cache")
+        env = Environment(
+            loader=DictLoader({"test.txt.j2": "{{ TEST1 }}"}), bytecode_cache=cache
+        )
+        env.get_template("test.txt.j2")
+        env = Environment(
+            loader=DictLoader({"test.txt.j2": "{{ TEST2 }}"}), bytecode_cache=cache
+        )
+        self.assertEqual(env.get_template("test.txt.j2").render(TEST2="titi"), "titi")
+        self.assertEqual(len(os.listdir(".test_cache")), 2, "Two entries are stored")
+
+    def test_cache_keyed_by_sandbox(self):
+        """
+        TemplateBytecodeCache unittest: A template compiled for the sandbox
+        gets its own entry.
+        """
+        cache = TemplateBytecodeCache(".test_cache")
+        loader = DictLoader({"test.txt.j2": "{{ TEST1 }}"})
+        Environment(loader=loader, bytecode_cache=cache).get_template("test.txt.j2")
+        env = BudgetedEnvironment(Budget(), loader=loader, bytecode_cache=cache)
+        self.assertEqual(env.get_template("test.txt.j2").render(TEST1="titi"), "titi")
+        self.assertEqual(len(os.listdir(".test_cache")), 2, "Two entries are stored")
+
+    def test_cache_keyed_by_async(self):
+        """
+        TemplateBytecodeCache unittest: A template compiled for the async mode
+        gets its own entry.
+        """
+        cache = TemplateBytecodeCache(".test_cache")
+        loader = DictLoader({"test.txt.j2": "{{ TEST1 }}"})
+        Environment(loader=loader, bytecode_cache=cache).get_template("test.txt.j2")
+        env = Environment(loader=loader, bytecode_cache=cache, enable_async=True)
+        env.get_template("test.txt.j2")
+        self.assertEqual(len(os.listdir(".test_cache")), 2, "Two entries are stored")
+
+    def test_cache_clear(self):
+        """
+        TemplateBytecodeCache.clear unittest: All entries are removed.
+        """
+        cache = TemplateBytecodeCache(".test_cache")
+        env = Environment(loader=DictLoader({"a": "a", "b": "b"}), bytecode_cache=cache)
+        env.get_template("a")
+        env.get_template("b")
+        cache.clear()
+        self.assertEqual(os.listdir(".test_cache"), [])
@@ -0,0 +1,218 @@
+"""
+Unit Test of Lazy Context Module
+"""
+
+import json
+import os
+import pickle
+import unittest
+from functools import partial
+from types import MappingProxyType
+from unittest.mock import MagicMock
+
+from jinja2 import DictLoader, Environment
+
+from action.context import EnvironView, LazyContext, RenderContext, RenderTemplate
+
+
+class TestEnvironView(unittest.TestCase):
+    """Unit Test of EnvironView Class"""
+
+    def test_view(self):
+        """
+        EnvironView unittest: The view reads the current environment, even
+        once pickled.
+        """
+        view = EnvironView()
+        os.environ["TEST"] = "myfakevalue"
+        self.assertEqual(view["TEST"], "myfakevalue")
+        self.assertEqual(dict(pickle.loads(pickle.dumps(view))), dict(os.environ))
+        del os.environ["TEST"]
+        self.assertNotIn("TEST", view)
+
+
+class TestLazyContext(unittest.TestCase):
+    """Unit Test of LazyContext Class"""
+
+    def test_section_loaded_on_access(self):
+        """
+        LazyContext unittest: A section is loaded once, on its first access.
+        """
+        loader = MagicMock(return_value={"TEST": "tata"})
+        context = LazyContext()
+        context.add_section("section", loader)
+        self.assertTrue(context.pending)
+        self.assertFalse(loader.called, "Section is not loaded when declared")
+
+        self.assertEqual(context["section"], {"TEST": "tata"})
+        self.assertEqual(context["section"], {"TEST": "tata"})
+        loader.assert_called_once_with()
+        self.assertFalse(context.pending)
+
+    def test_section_none(self):
+        """
+        LazyContext unittest: A section whose loader returns None is not defined.
+        """
+        context = LazyContext()
+        context.add_section("section", lambda: None)
+        self.assertNotIn("section", context)
+        self.assertEqual(list(context), [])
+
+    def test_sources_loaded_from_last(self):
+        """
+        LazyContext unittest: Sources are loaded from the last declared one,
+        until the variable is found. The last declared source wins.
+        """
+        first = MagicMock(return_value={"TEST1": "tata", "TEST2": "tata"})
+        last = MagicMock(return_value={"TEST2": "titi"})
+        context = LazyContext()
+        context.add_source(first)
+        context.add_source(last)
+
+        self.assertEqual(context["TEST2"], "titi")
+        self.assertFalse(first.called, "First source is not needed")
+        self.assertEqual(context["TEST1"], "tata")
+        self.assertEqual(dict(context), {"TEST1": "tata", "TEST2": "titi"})
+        first.assert_called_once_with()
+        last.assert_called_once_with()
+
+    def test_declaration_order(self):
+        """
+        LazyContext unittest: As a dict updated by each layer in turn, the
+        last declared section, source or variable wins. A section is loaded
+        only when its name is read.
+        """
+        source = MagicMock(return_value={"section": "source", "TEST": "tata"})
+        section = MagicMock(return_value={"TEST": "titi"})
+        context = LazyContext()
+        context.add_section("section", lambda: {"TEST": "titi"})
+        context.add_source(source)
+        context.add_section("other", section)
+        context["TEST"] = "toto"
+
+        self.assertEqual(context["TEST"], "toto")
+        self.assertFalse(source.called, "Source is not loaded")
+        self.assertEqual(context["section"], "source")
+        self.assertFalse(section.called, "Other section is not loaded")
+        self.assertEqual(context["other"], {"TEST": "titi"})
+        self.assertEqual(len(context), 3)
+
+    def test_set_and_delete(self):
+        """
+        LazyContext unittest: Assigned variables override the sources declared
+        before them, and deleted variables are removed from every source.
+        """
+        context = LazyContext()
+        context.add_source(lambda: {"TEST": "tata"})
+        context["TEST"] = "titi"
+        context.add_section("section", lambda: {})
+        context["section"] = "value"
+        self.assertEqual(context["TEST"], "titi")
+        self.assertEqual(context["section"], "value")
+
+        del context["TEST"]
+        self.assertNotIn("TEST", context)
+        with self.assertRaises(KeyError):
+            del context["TEST"]
+
+    def test_pickle(self):
+        """
+        LazyContext unittest: A context with pending picklable loaders can be
+        sent to another process.
+        """
+        context = LazyContext()
+        context.add_section("section", partial(dict, TEST="tata"))
+        context.add_source(partial(dict, TEST="titi"))
+        context["OTHER"] = "toto"
+
+        copy = pickle.loads(pickle.dumps(context))
+        self.assertTrue(copy.pending)
+        self.assertEqual(
+            dict(copy), {"section": {"TEST": "tata"}, "TEST": "titi", "OTHER": "toto"}
+        )
+
+    def test_pickle_loaded(self):
+        """
+        LazyContext unittest: The loaders of the loaded layers, and the raw
+        content they hold, are not pickled.
+        """
+        context = LazyContext()
+        context.add_source(partial(json.loads, '{"TEST": "tata"}'))
+        context.add_section("section", partial(json.loads, '{"OTHER": "titi"}'))
+        context.load_all()
+
+        content = pickle.dumps(context)
+        self.assertNotIn(b'{"TEST": "tata"}', content)
+        self.assertNotIn(b'{"OTHER": "titi"}', content)
+        self.assertEqual(
+            dict(pickle.loads(content)),
+            {"TEST": "tata", "section": {"OTHER": "titi"}},
+        )
+
+    def test_unload(self):
+        """
+        LazyContext unittest: The sections and sources of an unloaded loader
+        are loaded again on their next access, the other ones are kept.
+        """
+        section_loader = MagicMock(side_effect=[{"A": 1}, {"A": 2}])
+        source_loader = MagicMock(side_effect=[{"TEST": "tata"}, {"TEST": "titi"}])
+        context = LazyContext()
+        context.add_section("section", section_loader)
+        context.add_source(source_loader)
+        context["OTHER"] = "toto"
+        context.load_all()
+
+        context.unload(section_loader)
+        self.assertTrue(context.pending)
+        self.assertEqual(context["section"], {"A": 2})
+        self.assertEqual(context["TEST"], "tata")
+
+        context.unload(source_loader)
+        self.assertEqual(context["TEST"], "titi")
+        self.assertEqual(context["OTHER"], "toto")
+        self.assertEqual(source_loader.call_count, 2)
+
+    def test_mapping_source(self):
+        """
+        LazyContext unittest: A source returning a read-only mapping is kept
+        as is, its values are only read when needed.
+        """
+        source = MappingProxyType({"TEST": "tata", "OTHER": "titi"})
+        context = LazyContext()
+        context.add_source(lambda: source)
+        self.assertEqual(context["TEST"], "tata")
+        self.assertFalse(context.pending)
+        self.assertIs(context._layers[0], source)  # pylint: disable=W0212
+
+        context["NEW"] = "toto"
+        del context["OTHER"]
+        self.assertEqual(dict(context), {"TEST": "tata", "NEW": "toto"})
+
+
+class TestRenderContext(unittest.TestCase):
+    """Unit Test of RenderContext and RenderTemplate Classes"""
+
+    def test_included_context(self):
+        """
+        RenderContext unittest: The context of an included template overlays
+        the variables set by the template on the data, without copying it.
+        """
+        env = Environment(
+            loader=DictLoader(
+                {
+                    "page": "{% set x = 1 %}{% for i in [2] %}"
+                    "{% include 'inc' %}{% endfor %}",
+                    "inc": "{{ x }}{{ i }}{{ TEST }}",
+                }
+            )
+        )
+        env.context_class = RenderContext
+        env.template_class = RenderTemplate
+        section = MagicMock(return_value={})
+        data = LazyContext()
+        data.add_source(lambda: {"TEST": "tata"})
+        data.add_section("section", section)
+        template = env.get_template("page")
+        context = template.new_context(data, shared=True)
+        self.assertEqual("".join(template.root_render_func(context)), "12tata")
+        self.assertFalse(section.called, "Data is not copied")
@@ -0,0 +1,130 @@
+"""
+Unit Test of Template Finder Module
+"""
+
+import os
+import shutil
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from parameterized import parameterized
+
+from action.finder import Pattern, TemplateFinder, read_gitignore
+
+
+class TestPattern(unittest.TestCase):
+    """Unit Test of Pattern Class"""
+
+    @parameterized.expand(
+        [
+            ("*.j2", "a.j2", "dir/a.j2", False, True),
+            ("*.j2", "a.txt", "dir/a.txt", False, False),
+            ("build/", "build", "dir/build", True, True),
+            ("build/", "build", "dir/build", False, False),
+            ("dir/*.j2", "a.j2", "dir/a.j2", False, True),
+            ("dir/*.j2", "a.j2", "other/dir/a.j2", False, False),
+            ("/dir", "dir", "dir", True, True),
+            ("/dir", "dir", "other/dir", True, False),
+            ("dir/*", "a.j2", "dir/sub/a.j2", False, True),
+        ]
+    )
+    def test_match(  # pylint: disable=R0913
+        self, pattern, name, relative_path, is_dir, waited
+    ):
+        """
+        Pattern.match unittest: Pattern follows .gitignore conventions.
+        """
+        self.assertEqual(Pattern(pattern).match(name, relative_path, is_dir), waited)
+
+
+class TestTemplateFinder(unittest.TestCase):
+    """Unit Test of TemplateFinder Class"""
+
+    def setUp(self):
+        for directory in (
+            ".test/a/b",
+            ".test/node_modules/pkg",
+            ".test/.git",
+            ".test/build",
+        ):
+            Path(directory).mkdir(parents=True, exist_ok=True)
+        for template in (
+            ".test/root.txt.j2",
+            ".test/root.txt",
+            ".test/a/a.txt.j2",
+            ".test/a/b/b.yml.j2",
+            ".test/node_modules/pkg/pkg.txt.j2",
+            ".test/.git/git.txt.j2",
+            ".test/build/build.txt.j2",
+        ):
+            open(template, "a", encoding="utf-8").close()  # pylint: disable=R1732
+
+    def tearDown(self):
+        shutil.rmtree(".test")
+
+    def test_find_default(self):
+        """
+        TemplateFinder.find unittest: Templates are found recursively, in a stable order,
+        without descending in default excluded directories.
+        """
+        finder = TemplateFinder(".test")
+        self.assertEqual(
+            list(finder.find()),
+            [
+                os.path.join(".test", "root.txt.j2"),
+                os.path.join(".test", "a", "a.txt.j2"),
+                os.path.join(".test", "a", "b", "b.yml.j2"),
+                os.path.join(".test", "build", "build.txt.j2"),
+            ],
+        )
+
+    def test_find_exclude_prune(self):
+        """
+        TemplateFinder.find unittest: Excluded directories are never descended into.
+        """
+        finder = TemplateFinder(".test", exclude=["build/", "a/b"])
+        with patch("os.scandir", wraps=os.scandir) as scandir_mock:
+            found = list(finder.find())
+        self.assertEqual(
+            found,
+            [
+                os.path.join(".test", "root.txt.j2"),
+                os.path.join(".test", "a", "a.txt.j2"),
+            ],
+        )
+        self.assertEqual(
+            [c.args[0] for c in scandir_mock.call_args_list],
+            [".test", os.path.join(".test", "a")],
+        )
+
+    def test_find_include(self):
+        """
+        TemplateFinder.find unittest: Only templates matching an include pattern are found.
+        """
+        finder = TemplateFinder(".test", include=["*.yml.j2", "root*"])
+        self.assertEqual(
+            list(finder.find()),
+            [
+                os.path.join(".test", "root.txt.j2"),
+                os.path.join(".test", "a", "b", "b.yml.j2"),
+            ],
+        )
+
+    def test_find_gitignore(self):
+        """
+        TemplateFinder.find unittest: Patterns of the .gitignore file are excluded
+        when requested.
+        """
+        with open(".test/.gitignore", "w", encoding="utf-8") as f:
+            f.write("# comment\nbuild/\n!a\n/a/b\n")
+
+        self.assertEqual(read_gitignore(".test/.gitignore"), ["build/", "/a/b"])
+        self.assertEqual(
+            list(TemplateFinder(".test", gitignore=True).find()),
+            [
+                os.path.join(".test", "root.txt.j2"),
+                os.path.join(".test", "a", "a.txt.j2"),
+            ],
+        )
+        self.assertEqual(len(list(TemplateFinder(".test").find())), 4)
@@ -0,0 +1,171 @@
+"""
+Unit Test of Template Graph Module
+"""
+
+import json
+import os
+import unittest
+from unittest.mock import patch
+
+from jinja2 import DictLoader, Environment
+
+from action.graph import MISSING, TemplateGraph
+
+TEMPLATES = {
+    "page1.j2": "{% extends 'layout' %}{% block b %}{{ TEST1 }}{% endblock %}",
+    "page2.j2": "{% extends 'layout' %}{% import 'macros' as m %}",
+    "other.j2": "{% include 'footer' %}",
+    "dynamic.j2": "{% include name %}",
+    "layout": "{% include 'footer' %}{% block b %}{% endblock %}",
+    "footer": "{{ TEST2 }}",
+    "macros": "{% macro hello() %}{% include 'footer' %}{% endmacro %}",
+    "optional.j2": "{% include 'nope' ignore missing %}"
+    "{% include ['missing', 'footer'] %}",
+}
+
+
+class TestTemplateGraph(unittest.TestCase):
+    """Unit Test of TemplateGraph Class"""
+
+    def setUp(self):
+        self.env = Environment(loader=DictLoader(TEMPLATES))
+        self.graph = TemplateGraph(self.env)
+
+    def test_node(self):
+        """
+        TemplateGraph.node unittest: a template is parsed once, its variables
+        and references are found.
+        """
+        with patch.object(self.env, "parse", wraps=self.env.parse) as parse_mock:
+            node = self.graph.node("page2.j2")
+            self.assertIs(self.graph.node("page2.j2"), node)
+        self.assertEqual(parse_mock.call_count, 1)
+        self.assertEqual(node.references, ("layout", "macros"))
+        self.assertEqual(self.graph.node("footer").variables, {"TEST2"})
+        self.assertIsNone(self.graph.node("dynamic.j2").references)
+        self.assertEqual(self.graph.node("footer").global_names, set())
+
+    def test_node_global_names(self):
+        """
+        TemplateGraph.node unittest: the globals read by a template are found,
+        as they are not context variables.
+        """
+        self.env.globals["lookup"] = len
+        self.env.loader.mapping["lookup.j2"] = "{{ lookup(TEST1) }}{{ range(2) }}"
+        node = self.graph.node("lookup.j2")
+        self.assertEqual(node.global_names, {"lookup", "range"})
+        self.assertEqual(node.variables, {"TEST1"})
+
+    def test_node_missing(self):
+        """
+        TemplateGraph.node unittest: a missing optional template has no
+        checksum, and is parsed once created and invalidated.
+        """
+        self.assertEqual(
+            self.graph.closure("optional.j2"), {"nope", "missing", "footer"}
+        )
+        self.assertIs(self.graph.node("nope"), MISSING)
+        self.assertIsNone(self.graph.node("missing").checksum)
+        self.env.loader.mapping["nope"] = "{{ TEST1 }}"
+        self.graph.invalidate("nope")
+        self.assertEqual(self.graph.variables("optional.j2"), {"TEST1", "TEST2"})
+        del self.env.loader.mapping["nope"]
+
+    def test_closure(self):
+        """
+        TemplateGraph.closure unittest: dependencies are found recursively,
+        None is returned for a dynamic dependency.
+        """
+        self.assertEqual(self.graph.closure("page2.j2"), {"layout", "macros", "footer"})
+        self.assertEqual(self.graph.closure("footer"), set())
+        self.assertIsNone(self.graph.closure("dynamic.j2"))
+
+    def test_shared(self):
+        """
+        TemplateGraph.shared unittest: templates depended on by several
+        templates are shared.
+        """
+        self.assertEqual(
+            self.graph.shared(["page1.j2", "page2.j2"]), ["footer", "layout"]
+        )
+        self.assertEqual(self.graph.shared(["page1.j2", "dynamic.j2"]), [])
+        self.assertEqual(
+            self.graph.shared(["optional.j2", "optional.j2", "other.j2"]), ["footer"]
+        )
+
+    def test_order(self):
+        """
+        TemplateGraph.order unittest: templates sharing the same dependencies
+        follow each other, dynamic ones come last.
+        """
+        self.assertEqual(
+            self.graph.order(["dynamic.j2", "page1.j2", "other.j2", "page2.j2"]),
+            ["other.j2", "page1.j2", "page2.j2", "dynamic.j2"],
+        )
+
+    def test_save(self):
+        """
+        TemplateGraph.save unittest: the graph is written as json.
+        """
+        self.graph.save("graph.json", ["page1.j2", "dynamic.j2", "optional.j2"])
+        with open("graph.json", encoding="utf-8") as f:
+            graph = json.load(f)
+        os.remove("graph.json")
+
+        self.assertEqual(
+            graph["templates"]["page1.j2"],
+            {
+                "references": ["layout"],
+                "dynamic": False,
+                "missing": False,
+                "rendered": True,
+            },
+        )
+        self.assertEqual(
+            graph["templates"]["layout"],
+            {
+                "references": ["footer"],
+                "dynamic": False,
+                "missing": False,
+                "rendered": False,
+            },
+        )
+        self.assertTrue(graph["templates"]["nope"]["missing"])
+        self.assertEqual(graph["templates"]["nope"]["references"], [])
+        self.assertTrue(graph["templates"]["dynamic.j2"]["dynamic"])
+        self.assertEqual(graph["shared"], ["footer"])
+
+    def test_invalidate(self):
+        """
+        TemplateGraph.invalidate unittest: an invalidated template is parsed
+        again.
+        """
+        node = self.graph.node("footer")
+        self.graph.invalidate("footer")
+        self.graph.invalidate("unknown")
+        self.assertIsNot(self.graph.node("footer"), node)
+
+    def test_dependents(self):
+        """
+        TemplateGraph.dependents unittest: the templates depending on a
+        changed template are found, dynamic or missing ones included.
+        """
+        names = ["page1.j2", "page2.j2", "other.j2", "dynamic.j2", "missing.j2"]
+        self.assertEqual(
+            self.graph.dependents(["macros"], names),
+            ["page2.j2", "dynamic.j2", "missing.j2"],
+        )
+        self.assertEqual(self.graph.dependents(["other.j2"], names[:3]), ["other.j2"])
+
+    def test_readers(self):
+        """
+        TemplateGraph.readers unittest: the templates reading a variable,
+        through their dependencies too, are found.
+        """
+        self.assertEqual(self.graph.variables("page1.j2"), {"TEST1", "TEST2"})
+        self.assertIsNone(self.graph.variables("dynamic.j2"))
+        names = ["page1.j2", "other.j2", "dynamic.j2"]
+        self.assertEqual(
+            self.graph.readers(["TEST1"], names), ["page1.j2", "dynamic.j2"]
+        )
+        self.assertEqual(self.graph.readers(["TEST2"], names), names)
@@ -0,0 +1,231 @@
+"""
+Unit Test of Lazy Data Module
+"""
+
+import json
+import os
+import pickle
+import unittest
+from unittest.mock import patch
+
+import yaml
+from parameterized import parameterized
+
+from action.lazy import (
+    LazyFileParser,
+    LazyJsonObject,
+    LazyMapping,
+    index_yaml,
+    load_lazy,
+)
+from action.parser import FileParser, json_loads
+
+DATA = {
+    "TEST1": "tata",
+    "TEST2": [1, 2.5, None, True, {"nested": "]}"}],
+    "TEST3": {"A": {"B": 'c"d\\'}, "E": []},
+    "TEST4": -1e3,
+    "TEST5": "é\t",
+}
+
+
+class TestLazyJsonObject(unittest.TestCase):
+    """Unit test of LazyJsonObject Class"""
+
+    def setUp(self):
+        with open("data.json", "w", encoding="utf-8") as f:
+            json.dump(DATA, f, indent=1, ensure_ascii=False)
+
+    def tearDown(self):
+        os.remove("data.json")
+
+    def test_values(self):
+        """
+        LazyJsonObject unittest: the values are the values parsed by json,
+        and only parsed when they are read, once.
+        """
+        data = LazyJsonObject("data.json")
+        self.assertEqual(list(data), list(DATA))
+        self.assertIn("TEST3", data)
+        self.assertNotIn("TEST6", data)
+        with patch("action.lazy.json_loads", wraps=json_loads) as loads_mock:
+            self.assertEqual(data["TEST2"], DATA["TEST2"])
+            self.assertEqual(data["TEST2"], DATA["TEST2"])
+        loads_mock.assert_called_once()
+        self.assertEqual(dict(data), DATA)
+        self.assertEqual(repr(data), repr(DATA))
+
+    def test_nested(self):
+        """
+        LazyJsonObject unittest: large nested objects are lazy as well.
+        """
+        with patch("action.lazy.NESTED_MIN_SIZE", 10):
+            data = LazyJsonObject("data.json")
+            self.assertIsInstance(data["TEST3"], LazyJsonObject)
+            self.assertEqual(data["TEST3"]["A"], DATA["TEST3"]["A"])
+            self.assertIsInstance(data["TEST2"], list)
+
+    def test_pickle(self):
+        """
+        LazyJsonObject unittest: a pickled object is not indexed again and
+        keeps its parsed values.
+        """
+        data = LazyJsonObject("data.json")
+        self.assertEqual(data["TEST1"], "tata")
+        with patch.object(LazyJsonObject, "_index_object") as index_mock:
+            copy = pickle.loads(pickle.dumps(data))
+        index_mock.assert_not_called()
+        self.assertEqual(copy._values, {"TEST1": "tata"})  # pylint: disable=W0212
+        self.assertEqual(dict(copy), DATA)
+
+    def test_invalid(self):
+        """
+        LazyJsonObject unittest: a content which is not an object, or whose
+        structure is invalid, is rejected.
+        """
+        for content in (
+            "[1, 2]",
+            '{"A": [1, 2}',
+            '{"A": "b',
+            '{"A" 1}',
+            "{A: 1}",
+            '{"A": 1} x',
+            "{} {}",
+        ):
+            with open("data.json", "w", encoding="utf-8") as f:
+                f.write(content)
+            with self.assertRaises(ValueError, msg=content):
+                LazyJsonObject("data.json")
+            self.assertIsNone(load_lazy("data.json", "json"))
+
+
+class TestLazyYaml(unittest.TestCase):
+    """Unit test of the lazy YAML mapping"""
+
+    def tearDown(self):
+        os.remove("data.yml")
+
+    def load(self, content):
+        """Write a YAML content and load it lazily"""
+        with open("data.yml", "w", encoding="utf-8") as f:
+            f.write(content)
+        return load_lazy("data.yml", "yaml")
+
+    def test_values(self):
+        """
+        load_lazy unittest: the values are the values parsed by yaml.
+        """
+        content = (
+            "TEST1: tata\n"
+            "'TEST 2':\n  - 1\n  - a: é\n    b: [x, y]\n"
+            "3: |\n  text\n  block\n"
+            "TEST4:\n  nested:\n    key: plain\n      continued\n"
+            "TEST5: {a: 1}\n"
+        )
+        data = self.load(content)
+        self.assertEqual(list(data), ["TEST1", "TEST 2", 3, "TEST4", "TEST5"])
+        self.assertEqual(data["TEST 2"], [1, {"a": "é", "b": ["x", "y"]}])
+        self.assertEqual(dict(data), yaml.safe_load(content))
+        self.assertEqual(dict(pickle.loads(pickle.dumps(data))), dict(data))
+
+    def test_bom(self):
+        """
+        load_lazy unittest: a content starting with a BOM is indexed as without it.
+        """
+        data = self.load("\ufeffa: 1\nb: [x]\n")
+        self.assertEqual(dict(data), {"a": 1, "b": ["x"]})
+        self.assertEqual(dict(data), FileParser("data.yml").parse())
+
+    def test_not_indexed(self):
+        """
+        index_yaml unittest: the contents which can not be split by top level
+        key are not loaded lazily.
+        """
+        for content in (
+            "- 1\n- 2\n",
+            "a: &anchor 1\nb: *anchor\n",
+            "a: 1\n---\nb: 2\n",
+            "[1, 2]: a\n",
+            "scalar\n",
+        ):
+            self.assertIsNone(self.load(content), content)
+        self.assertEqual(index_yaml("{}"), {})
+        self.assertIsNone(self.load("a: [1\n"))
+
+
+class TestLazyFileParser(unittest.TestCase):
+    """Unit test of LazyFileParser Class"""
+
+    @parameterized.expand(
+        [
+            ("json", "data.json", None, '{"TEST1": "tata"}', "json"),
+            ("yaml", "data.yml", None, "TEST1: tata", "yml"),
+            ("detected", "data.txt", None, '{"TEST1": "tata"}', "json"),
+            ("given", "data.txt", "yaml", "TEST1: tata", "yaml"),
+        ]
+    )
+    def test_parse_lazy(self, _, path, file_format, content, found_format):
+        """
+        LazyFileParser.parse unittest: A lazy mapping of a JSON or YAML file is
+        returned, whose format is found from the extension or the content.
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+
+        p = LazyFileParser(path, file_format)
+        data = p.parse()
+        os.remove(path)
+
+        self.assertIsInstance(data, LazyMapping)
+        self.assertEqual(data["TEST1"], "tata")
+        self.assertEqual(p.format, found_format)
+        self.assertIn("load", p.timings)
+
+    @parameterized.expand(
+        [
+            ("json", "data.json", '{"a-b": {"c-d": 1}, "e": [{"f-g": 2}]}'),
+            ("yaml", "data.yml", "a-b:\n  c-d: 1\ne:\n  - f-g: 2\n"),
+        ]
+    )
+    def test_parse_lazy_key_policy(self, _, path, content):
+        """
+        LazyFileParser.parse unittest: The keys are normalized as by the
+        FileParser, according to the key policy.
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+
+        for key_policy in ("none", "top", "recursive"):
+            data = LazyFileParser(path, key_policy=key_policy).parse()
+            self.assertIsInstance(data, LazyMapping)
+            expected = FileParser(path, key_policy=key_policy).parse()
+            self.assertEqual(dict(data), expected, key_policy)
+            copy = pickle.loads(pickle.dumps(data))
+            self.assertEqual(dict(copy), expected, key_policy)
+        with patch("action.lazy.NESTED_MIN_SIZE", 1):
+            data = LazyFileParser(path, key_policy="recursive").parse()
+            self.assertEqual(data["a_b"], {"c_d": 1})
+        os.remove(path)
+
+    @parameterized.expand(
+        [
+            ("ini", "data.ini", "[section]\nTEST1=tata"),
+            ("env", "data.env", "TEST1=tata"),
+            ("not_an_object", "data.json", '["TEST1"]'),
+            ("yaml_flow", "data.txt", "{TEST1: tata}"),
+        ]
+    )
+    def test_parse_lazy_fallback(self, _, path, content):
+        """
+        LazyFileParser.parse unittest: The contents which can not be loaded
+        lazily are parsed as usual.
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+
+        data = LazyFileParser(path).parse()
+        expected = FileParser(path).parse()
+        os.remove(path)
+
+        self.assertNotIsInstance(data, LazyMapping)
+        self.assertEqual(data, expected)
@@ -1,17 +1,33 @@
 """ Unit Test of Main Class """
 
+# pylint: disable=C0302
+
+import json
 import os
 import shutil
+import tempfile
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import jinja2
+from jinja2.sandbox import SandboxedEnvironment
+from parameterized import parameterized
 
 from action.main import Main
+from action.manifest import hash_value
+from action.sandbox import BudgetExceeded
+
+
+def double(value):
+    """Data provider of the tests, picklable for the workers"""
+    return value * 2
 
 
-class TestMain(unittest.TestCase):
+class TestMain(unittest.TestCase):  # pylint: disable=R0904
     """Unit Test of Main Class"""
 
     def setUp(self):
@@ -130,6 +146,81 @@ class TestMain(unittest.TestCase):
             <= m.data.items()
         )
 
+    def test_add_json_section_key_policy(self):
+        """
+        Main.addJsonSection unittest: Check that the keys of a section are
+        normalized according to the key policy, and that an unknown policy
+        is rejected.
+        """
+        content = {"a-b": {"c-d": [{"e-f": 1}]}}
+        m = Main(key_policy="recursive")
+        m.add_json_section("dict_section", content)
+        m.add_json_section("json_section", json.dumps(content))
+        self.assertEqual(m.data.get("dict_section"), {"a_b": {"c_d": [{"e_f": 1}]}})
+        self.assertEqual(m.data.get("json_section"), {"a_b": {"c_d": [{"e_f": 1}]}})
+        m = Main(key_policy="none")
+        m.add_json_section("dict_section", content)
+        self.assertEqual(m.data.get("dict_section"), content)
+        with self.assertRaises(ValueError):
+            Main(key_policy="strange")
+
+    @parameterized.expand([("", None), ("null\n", None), ('{"a-b": 1}', {"a_b": 1})])
+    def test_add_json_file(self, content, waited):
+        """
+        Main.addJsonFile unittest: Check that the file is only read on the
+        first access to the section, and that an empty or null file adds no section.
+        """
+        m = Main()
+        m.add_json_file("my_test_section", "my_test_section.json")
+        with open("my_test_section.json", "w", encoding="utf-8") as out:
+            out.write(content)
+
+        self.assertEqual(m.data.get("my_test_section"), waited)
+        os.remove("my_test_section.json")
+
+    def test_add_json_files(self):
+        """
+        Main.addJsonFiles unittest: Check that the files, and the json files
+        of a directory, are added as sections named after the files, each
+        one read on its first access.
+        """
+        os.makedirs("contexts")
+        for name, content in (
+            ("github.json", '{"event-name": "push"}'),
+            ("job.json", "null"),
+            ("invalid.json", "{"),
+            ("notes.txt", "not a context"),
+        ):
+            with open(os.path.join("contexts", name), "w", encoding="utf-8") as f:
+                f.write(content)
+        with open("matrix.txt", "w", encoding="utf-8") as f:
+            f.write('{"os": "linux"}')
+        m = Main()
+        m.add_json_files(["contexts", "matrix.txt"])
+        self.assertEqual(
+            sorted(m.data_files),
+            [
+                os.path.join("contexts", "github.json"),
+                os.path.join("contexts", "invalid.json"),
+                os.path.join("contexts", "job.json"),
+                "matrix.txt",
+            ],
+        )
+
+        self.assertEqual(m.data.get("github"), {"event_name": "push"})
+        self.assertEqual(m.data.get("matrix"), {"os": "linux"})
+        os.remove("matrix.txt")
+        self.assertIsNone(m.data.get("job"))
+        with self.assertRaises(ValueError):
+            m.data.get("invalid")
+
+        # A changed file is read again
+        with open(os.path.join("contexts", "github.json"), "w", encoding="utf-8") as f:
+            f.write('{"event-name": "pull_request"}')
+        m.data.unload(m.data_files[os.path.join("contexts", "github.json")][1])
+        self.assertEqual(m.data.get("github"), {"event_name": "pull_request"})
+        shutil.rmtree("contexts")
+
     @patch("action.main.FileParser", spec=True)
     def test_add_data_file(self, parser_mock):
         """
@@ -143,9 +234,33 @@ class TestMain(unittest.TestCase):
         m = Main()
         m.add_data_file("file_path", "my_format")
 
-        parser_mock.assert_called_with("file_path", "my_format")
+        parser_mock.assert_called_with(
+            "file_path", "my_format", cache_dir=None, key_policy="top"
+        )
+        self.assertFalse(mock_instance.parse.called, "parse is deferred")
+        self.assertTrue({"TEST": "toto"}.items() <= m.data.items())
         self.assertTrue(mock_instance.parse.called, "parse is called")
+
+    @patch("action.main.FileParser", spec=True)
+    def test_add_data_file_cache(self, parser_mock):
+        """
+        Main.addDataFile unittest: Check that Parser class is inialized
+        with the data cache directory when the cache is enabled.
+        """
+        mock_instance = parser_mock.return_value
+        mock_instance.parse = MagicMock(return_value={"TEST": "toto"})
+
+        m = Main(cache_dir="my_cache")
+        m.add_data_file("file_path", "my_format")
+
+        parser_mock.assert_called_with(
+            "file_path",
+            "my_format",
+            cache_dir=os.path.join("my_cache", "data"),
+            key_policy="top",
+        )
         self.assertTrue({"TEST": "toto"}.items() <= m.data.items())
+        shutil.rmtree("my_cache")
 
     @patch("action.main.UrlParser", spec=True)
     def test_add_data_url(self, parser_mock):
@@ -160,9 +275,222 @@ class TestMain(unittest.TestCase):
         m = Main()
         m.add_data_url("url", "my_format")
 
-        parser_mock.assert_called_with("url", "my_format")
+        parser_mock.assert_called_with(
+            "url", "my_format", cache_dir=None, ttl=None, key_policy="top"
+        )
+        self.assertFalse(mock_instance.parse.called, "parse is deferred")
+        self.assertTrue({"TEST": "toto"}.items() <= m.data.items())
         self.assertTrue(mock_instance.parse.called, "parse is called")
+
+    @patch("action.main.UrlParser", spec=True)
+    def test_add_data_url_cache(self, parser_mock):
+        """
+        Main.test_addDataUrl unittest: Check that Parser class is inialized
+        with the cache directory and the ttl when the cache is enabled.
+        """
+        mock_instance = parser_mock.return_value
+        mock_instance.parse = MagicMock(return_value={"TEST": "toto"})
+
+        m = Main(cache_dir="my_cache")
+        m.add_data_url("url", "my_format", ttl=60)
+
+        parser_mock.assert_called_with(
+            "url",
+            "my_format",
+            cache_dir=os.path.join("my_cache", "http"),
+            ttl=60,
+            key_policy="top",
+        )
         self.assertTrue({"TEST": "toto"}.items() <= m.data.items())
+        shutil.rmtree("my_cache")
+
+    @patch("action.main.UrlParser", spec=True)
+    def test_add_data_urls(self, parser_mock):
+        """
+        Main.addDataUrls unittest: Check that urls are fetched concurrently
+        and merged in the declared order, whichever fetch finishes first.
+        """
+        contents = {
+            "url1": {"TEST": "url1", "URL1": "toto"},
+            "url2": {"TEST": "url2", "URL2": "titi"},
+        }
+
+        def url_parser(url, *_, **__):
+            parser = MagicMock()
+
+            def parse():
+                # The first url is the slowest one
+                if url == "url1":
+                    time.sleep(0.1)
+                return contents[url]
+
+            parser.parse.side_effect = parse
+            return parser
+
+        parser_mock.side_effect = url_parser
+
+        m = Main()
+        with patch(
+            "concurrent.futures.ThreadPoolExecutor", wraps=ThreadPoolExecutor
+        ) as executor_mock:
+            m.add_data_urls([("url1", None), ("url2", "json")], timeout=5, retries=1)
+            self.assertEqual(m.data["URL1"], "toto")
+
+        executor_mock.assert_called_with(max_workers=2)
+        parser_mock.assert_any_call(
+            "url1",
+            None,
+            cache_dir=None,
+            ttl=None,
+            timeout=5,
+            retries=1,
+            key_policy="top",
+        )
+        parser_mock.assert_any_call(
+            "url2",
+            "json",
+            cache_dir=None,
+            ttl=None,
+            timeout=5,
+            retries=1,
+            key_policy="top",
+        )
+        self.assertTrue(
+            {"TEST": "url2", "URL1": "toto", "URL2": "titi"}.items() <= m.data.items()
+        )
+
+    @patch("action.main.UrlParser", spec=True)
+    def test_render_file_lazy_sources(self, parser_mock):
+        """
+        Main.renderFile unittest: Check that the data sources not read by a
+        template are not loaded, even when the context is passed to included
+        or imported templates.
+        """
+        mock_instance = parser_mock.return_value
+        mock_instance.parse = MagicMock(return_value={"TEST": "url"})
+        os.mkdir(".test")
+        with open(".test/include.j2", "w", encoding="utf-8") as out:
+            out.write("{{ section.TEST }}{{ x }}")
+        with open(".test/macros.j2", "w", encoding="utf-8") as out:
+            out.write("{% macro read() %}{{ section.TEST }}{% endmacro %}")
+        with open(".test/test.txt.j2", "w", encoding="utf-8") as out:
+            out.write(
+                "{% set x = 1 %}{% include 'include.j2' %}"
+                "{% import 'macros.j2' as macros with context %}{{ macros.read() }}"
+                "{% for i in [2] %}{% set x = i %}{% include 'include.j2' %}"
+                "{% endfor %}"
+            )
+
+        m = Main(basepath=".test")
+        m.add_data_url("url")
+        m.add_json_section("section", '{"TEST": "tata"}')
+        m.render_file(".test/test.txt.j2")
+
+        with open(".test/test.txt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "tata1tatatata2")
+        self.assertFalse(mock_instance.parse.called, "url is not fetched")
+        shutil.rmtree(".test")
+
+    @patch("action.main.UrlParser", spec=True)
+    def test_render_file_precedence(self, parser_mock):
+        """
+        Main.renderFile unittest: Check that, as in a copy of the data updated
+        by each source in turn, the data overrides the globals and the last
+        declared source wins.
+        """
+        mock_instance = parser_mock.return_value
+        mock_instance.parse = MagicMock(
+            return_value={"namespace": "prod", "section": "url"}
+        )
+        with open("test.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{{ namespace }} {{ section }} {{ range }}")
+
+        m = Main()
+        m.add_json_section("section", '{"TEST": "tata"}')
+        m.add_data_url("url")
+        m.render_file("test.txt.j2")
+
+        with open("test.txt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "prod url <class 'range'>")
+        os.remove("test.txt")
+
+    def test_render_context(self):
+        """
+        Main.renderContext unittest: Check that the context of the templates is
+        built once, without copying the data, and follows a new data.
+        """
+        m = Main()
+        context = m.render_context()
+        self.assertIs(context.maps[0], m.data)
+        self.assertIs(m.render_context(), context)
+        self.assertIs(context["range"], range)
+
+        m.data = {"TEST1": "tata"}
+        self.assertEqual(m.render_context()["TEST1"], "tata")
+
+    def test_template_inputs_hashes(self):
+        """
+        Main.templateInputs unittest: Check that each context value is hashed
+        once for the templates sharing the hashes.
+        """
+        with open("test.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{{ TEST1 }}")
+        m = Main()
+        m.data["TEST1"] = "tata"
+        hashes = {}
+        with patch("action.main.hash_value", wraps=hash_value) as hash_mock:
+            first = m.template_inputs("test.txt.j2", hashes)
+            second = m.template_inputs("test.txt.j2", hashes)
+        self.assertEqual(first, second)
+        self.assertEqual(hash_mock.call_count, 1)
+        os.remove("test.txt.j2")
+
+    @parameterized.expand([("serial", 1, False), ("parallel", 2, True)])
+    def test_render_all_profile(self, _, jobs, stream):
+        """
+        Main.renderAll unittest: Check that, when profiling, the time of each
+        phase is recorded for each template, the run and the data sources.
+        """
+        Path(".test").mkdir(parents=True, exist_ok=True)
+        for index in range(2):
+            with open(f".test/test{index}.txt.j2", "w", encoding="utf-8") as out:
+                out.write("{{ TEST1 }}")
+        with open(".test/data.json", "w", encoding="utf-8") as out:
+            out.write('{"TEST1": "tata"}')
+
+        m = Main(basepath=".test", jobs=jobs, stream=stream, profile=True)
+        m.add_data_file(".test/data.json")
+        m.render_all()
+
+        self.assertEqual(set(m.profiler.templates), {"test0.txt.j2", "test1.txt.j2"})
+        for timings in m.profiler.templates.values():
+            self.assertEqual(set(timings), {"load", "compile", "render", "write"})
+            self.assertGreater(timings["compile"], 0)
+            self.assertGreaterEqual(timings["write"], 0)
+        self.assertEqual(set(m.profiler.phases), {"find", "render"})
+        self.assertEqual(
+            [(s["source"], s["format"]) for s in m.profiler.sources],
+            [(".test/data.json", "json")],
+        )
+        self.assertIn("parse", m.profiler.sources[0])
+        shutil.rmtree(".test")
+
+    def test_prune_cache(self):
+        """
+        Main.pruneCache unittest: Check that each cache directory is pruned
+        """
+        for directory in ("http", "bytecode"):
+            Path(f".test_cache/{directory}").mkdir(parents=True, exist_ok=True)
+            for i in range(3):
+                with open(f".test_cache/{directory}/{i}", "wb") as f:
+                    f.write(b"x" * 10)
+
+        m = Main(cache_dir=".test_cache", cache_max_size=20)
+        m.prune_cache()
+
+        self.assertEqual(len(os.listdir(".test_cache/http")), 2)
+        self.assertEqual(len(os.listdir(".test_cache/bytecode")), 2)
+        shutil.rmtree(".test_cache")
 
     def test_render_file_jinja2(self):
         """
@@ -250,3 +578,656 @@ class TestMain(unittest.TestCase):
         os.remove("test1.txt")
         os.remove("test2.txt")
         shutil.rmtree(".test")
+
+    def test_init_jobs_negative(self):
+        """
+        Main.__init__ unittest: Check if a negative number of jobs is in error
+        """
+        with self.assertRaises(ValueError):
+            Main(jobs=-1)
+
+    def test_init_jobs_automatic(self):
+        """
+        Main.__init__ unittest: Check if 0 jobs means one job by available CPU
+        """
+        m = Main(jobs=0)
+        self.assertEqual(m.jobs, os.cpu_count())
+
+    def test_init_budget_without_sandbox(self):
+        """
+        Main.__init__ unittest: Check if a budget without the sandbox is in error
+        """
+        with self.assertRaises(ValueError):
+            Main(max_time=1)
+        self.assertIsInstance(Main(sandbox=True, max_time=1).env, SandboxedEnvironment)
+
+    @parameterized.expand([(1,), (2,)])
+    def test_render_all_sandbox(self, jobs):
+        """
+        Main.renderAll unittest: Check that in sandbox mode, the templates
+        within their budgets are rendered and that a template exceeding a
+        budget is aborted, without writing its file.
+        """
+        Path(".test").mkdir(exist_ok=True)
+        with open(".test/a.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{% for i in range(3) %}{{ TEST1 }}{% endfor %}")
+        m = Main(basepath=".test", jobs=jobs, sandbox=True, max_loop=3)
+        m.data["TEST1"] = "a"
+        m.render_all()
+        with open(".test/a.txt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "aaa")
+
+        with open(".test/b.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{% for i in range(4) %}{{ TEST1 }}{% endfor %}")
+        with self.assertRaises(BudgetExceeded) as context:
+            m.render_all()
+        self.assertIn("Template b.txt.j2 aborted", str(context.exception))
+        self.assertFalse(os.path.exists(".test/b.txt"))
+        shutil.rmtree(".test")
+
+    def test_render_all_parallel(self):
+        """
+        Main.renderAll unittest: Check if files rendered with multiple jobs
+        are identical to files rendered with one job
+        """
+        Path(".test/directory").mkdir(parents=True, exist_ok=True)
+        templates = [f".test/directory/test{i}.txt.j2" for i in range(6)]
+        for i, template in enumerate(templates):
+            with open(template, "w", encoding="utf-8") as out:
+                out.write(f"{{{{ TEST1 }}}} {i}\n{{{{ env.TEST }}}}\n")
+
+        os.environ["TEST"] = "myfakevalue"
+        m = Main(keep_template=True)
+        m.data["TEST1"] = "tata"
+        m.render_all()
+        serial = {}
+        for template in templates:
+            with open(template[:-3], "rb") as f:
+                serial[template] = f.read()
+            os.remove(template[:-3])
+
+        m = Main(jobs=3)
+        m.data["TEST1"] = "tata"
+        m.render_all()
+        del os.environ["TEST"]
+        for template in templates:
+            self.assertFalse(os.path.isfile(template), "Original File is deleted")
+            with open(template[:-3], "rb") as f:
+                self.assertEqual(f.read(), serial[template], "Same rendered file")
+        self.assertEqual(serial[templates[2]], b"tata 2\nmyfakevalue")
+
+        shutil.rmtree(".test")
+
+    @parameterized.expand(
+        [
+            ("serial", 1),
+            ("parallel", 3),
+            ("async", 1, True),
+            ("async_parallel", 3, True),
+        ]
+    )
+    def test_render_matrix(self, _, jobs, enable_async=False):
+        """
+        Main.renderMatrix unittest: Check that each file is rendered once by
+        context, in the output path rendered for the context, the context
+        variables taking precedence over the data.
+        """
+        Path(".test/directory").mkdir(parents=True, exist_ok=True)
+        templates = [".test/a.txt.j2", ".test/directory/b.txt.j2"]
+        for template in templates:
+            with open(template, "w", encoding="utf-8") as out:
+                out.write("{{ TEST1 }} {{ TEST2 }}")
+
+        m = Main(basepath=".test", jobs=jobs, enable_async=enable_async)
+        m.data["TEST1"] = "tata"
+        m.data["TEST2"] = "titi"
+        contexts = [("dev", {"TEST2": "dev"}), ("prod", {"TEST2": "prod"})]
+        counts = m.render_matrix(contexts)
+
+        self.assertEqual(counts, {"changed": 4, "unchanged": 0, "skipped": 0})
+        for template in templates:
+            self.assertFalse(os.path.isfile(template), "Original File is deleted")
+        for name in ("dev", "prod"):
+            for path in ("a.txt", "directory/b.txt"):
+                with open(f".test/{name}/{path}", encoding="utf-8") as f:
+                    self.assertEqual(f.read(), f"tata {name}")
+        shutil.rmtree(".test")
+
+    def test_render_matrix_output(self):
+        """
+        Main.renderMatrix unittest: Check that the output path can read the
+        context variables, and that two contexts can not have the same output.
+        """
+        Path(".test").mkdir(parents=True, exist_ok=True)
+        with open(".test/a.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{{ region }}")
+
+        m = Main(basepath=".test", keep_template=True)
+        contexts = [("0", {"region": "eu"}), ("1", {"region": "us"})]
+        m.render_matrix(contexts, "out/{{ region }}-{{ path }}")
+        with open(".test/out/us-a.txt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "us")
+
+        with self.assertRaises(ValueError):
+            m.render_matrix(contexts, "{{ path }}")
+        shutil.rmtree(".test")
+
+    def test_init_async_unsupported(self):
+        """
+        Main.__init__ unittest: Check that the async mode can not be used with
+        the sandbox nor the streaming
+        """
+        with self.assertRaises(ValueError):
+            Main(enable_async=True, sandbox=True)
+        with self.assertRaises(ValueError):
+            Main(enable_async=True, stream=True)
+        self.assertTrue(Main(enable_async=True).env.is_async)
+
+    @parameterized.expand([("sync", False), ("async", True)])
+    def test_add_provider(self, _, enable_async):
+        """
+        Main.addProvider unittest: Check that a provider is called by the
+        templates, once by arguments, and that the templates calling it are
+        always rendered with a manifest.
+        """
+        Path(".test").mkdir(exist_ok=True)
+        templates = [".test/a.txt.j2", ".test/b.txt.j2"]
+        for template in templates:
+            with open(template, "w", encoding="utf-8") as out:
+                out.write("{{ lookup(2).value }} {{ lookup(3, offset=1).value }}")
+        function = MagicMock(side_effect=lambda key, offset=0: {"value": key + offset})
+        m = Main(basepath=".test", keep_template=True, enable_async=enable_async)
+        m.add_provider("lookup", function)
+        m.render_all()
+
+        for template in templates:
+            with open(template[:-3], encoding="utf-8") as f:
+                self.assertEqual(f.read(), "2 4")
+        self.assertEqual(function.call_count, 2)
+        self.assertIsNone(m.template_inputs(templates[0]))
+        shutil.rmtree(".test")
+
+    def test_render_all_async(self):
+        """
+        Main.renderAll unittest: Check that in async mode, the renders overlap
+        while waiting for a provider, in one process or in several jobs.
+        """
+        Path(".test").mkdir(exist_ok=True)
+        templates = [".test/a.txt.j2", ".test/b.txt.j2"]
+        for index, template in enumerate(templates):
+            with open(template, "w", encoding="utf-8") as out:
+                out.write(f"{{{{ wait({index}) }}}}")
+        barrier = threading.Barrier(2, timeout=5)
+
+        def wait(key):
+            # Only passed if the two templates wait at the same time
+            barrier.wait()
+            return key
+
+        m = Main(basepath=".test", keep_template=True, enable_async=True)
+        m.add_provider("wait", wait)
+        m.render_all()
+        for index, template in enumerate(templates):
+            with open(template[:-3], encoding="utf-8") as f:
+                self.assertEqual(f.read(), str(index))
+
+        m = Main(basepath=".test", enable_async=True, jobs=2)
+        m.add_provider("double", double)
+        for template in templates:
+            with open(template, "w", encoding="utf-8") as out:
+                out.write("{{ double(2) }}")
+        m.render_all()
+        with open(templates[1][:-3], encoding="utf-8") as f:
+            self.assertEqual(f.read(), "4")
+        shutil.rmtree(".test")
+
+    @patch("action.main.UrlParser", spec=True)
+    def test_add_data_url_provider(self, parser_mock):
+        """
+        Main.addDataUrlProvider unittest: Check that the provider parses the
+        url given by the template with the given options.
+        """
+        parser_mock.return_value.parse.return_value = {"TEST": "toto"}
+        m = Main(enable_async=True)
+        m.add_data_url_provider("fetch", ttl=10, timeout=5, retries=1)
+        template = m.env.from_string("{{ fetch('https://host/data', 'json').TEST }}")
+        self.assertEqual(template.render(), "toto")
+        parser_mock.assert_called_once_with(
+            "https://host/data",
+            "json",
+            cache_dir=None,
+            ttl=10,
+            timeout=5,
+            retries=1,
+            key_policy="top",
+        )
+
+    def test_watch(self):
+        """
+        Main.watch unittest: Check that after the first render, only the files
+        affected by a changed template or data file are rendered again, with
+        the data file reloaded.
+        """
+        Path(".test/layouts").mkdir(parents=True, exist_ok=True)
+        files = {
+            ".test/layouts/base.txt": "base {% block b %}{% endblock %}",
+            ".test/page.txt.j2": "{% extends 'layouts/base.txt' %}"
+            "{% block b %}{{ TEST1 }}{% endblock %}",
+            ".test/other.txt.j2": "{{ section.A }}",
+            ".test/section.json": '{"A": "tata"}',
+        }
+        for path, content in files.items():
+            with open(path, "w", encoding="utf-8") as out:
+                out.write(content)
+
+        def touch(path, content):
+            mtime = os.stat(path).st_mtime_ns + 10**9
+            with open(path, "w", encoding="utf-8") as out:
+                out.write(content)
+            os.utime(path, ns=(mtime, mtime))
+
+        m = Main(basepath=".test", keep_template=True)
+        m.data["TEST1"] = "titi"
+        m.add_json_file("section", ".test/section.json")
+        watch = m.watch(interval=0.01)
+        self.assertEqual(
+            next(watch), (None, {"changed": 2, "unchanged": 0, "skipped": 0})
+        )
+
+        touch(".test/layouts/base.txt", "new {% block b %}{% endblock %}")
+        with patch.object(m, "render_file", wraps=m.render_file) as render_mock:
+            changed, counts = next(watch)
+        self.assertEqual(changed, [os.path.normpath(".test/layouts/base.txt")])
+        self.assertEqual(counts["changed"], 1)
+        render_mock.assert_called_once_with(".test/page.txt.j2")
+        with open(".test/page.txt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "new titi")
+
+        touch(".test/section.json", '{"A": "toto"}')
+        with patch.object(m, "render_file", wraps=m.render_file) as render_mock:
+            next(watch)
+        render_mock.assert_called_once_with(".test/other.txt.j2")
+        with open(".test/other.txt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "toto")
+
+        touch(".test/page.txt.j2", "{% include 'missing' %}")
+        _, error = next(watch)
+        self.assertIsInstance(error, jinja2.TemplateNotFound)
+        watch.close()
+        shutil.rmtree(".test")
+
+    def test_watch_written_files(self):
+        """
+        Main.watch unittest: Check that the files written by the renders, as
+        the manifest, the graph file and the cache, are not changes: a
+        template with a dynamic include is only rendered again once.
+        """
+        Path(".test").mkdir(parents=True, exist_ok=True)
+        with open(".test/inc.txt", "w", encoding="utf-8") as out:
+            out.write("inc")
+        with open(".test/page.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{% include name %}")
+
+        m = Main(
+            basepath=".test",
+            keep_template=True,
+            manifest=".test/manifest.json",
+            graph_file=".test/graph.json",
+            cache_dir=".test/.cache",
+        )
+        m.data["name"] = "inc.txt"
+        watch = m.watch(interval=0.01)
+        next(watch)
+        mtime = os.stat(".test/inc.txt").st_mtime_ns + 10**9
+        with open(".test/inc.txt", "w", encoding="utf-8") as out:
+            out.write("new")
+        os.utime(".test/inc.txt", ns=(mtime, mtime))
+        changed, counts = next(watch)
+        self.assertEqual(changed, [os.path.normpath(".test/inc.txt")])
+        self.assertEqual(counts["changed"], 1)
+        with open(".test/page.txt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "new")
+        watch.close()
+        shutil.rmtree(".test")
+
+    def test_watch_keep_template(self):
+        """
+        Main.watch unittest: Check that the templates must be kept.
+        """
+        with self.assertRaises(ValueError):
+            next(Main().watch())
+
+    def test_render_all_parallel_lazy_sources(self):
+        """
+        Main.renderAll unittest: Check that the data read by the templates is
+        loaded before being sent to the rendering processes.
+        """
+        Path(".test").mkdir(parents=True, exist_ok=True)
+        templates = [f".test/test{i}.txt.j2" for i in range(4)]
+        for template in templates:
+            with open(template, "w", encoding="utf-8") as out:
+                out.write("{{ TEST1 }} {{ section.TEST2 }}")
+        with open(".test/data.json", "w", encoding="utf-8") as out:
+            out.write('{"TEST1": "tata"}')
+
+        m = Main(jobs=2)
+        m.add_data_file(".test/data.json")
+        m.add_json_file("section", ".test/section.json")
+        with open(".test/section.json", "w", encoding="utf-8") as out:
+            out.write('{"TEST2": "titi"}')
+        m.render_all()
+
+        self.assertFalse(m.data.pending, "Data is loaded before rendering")
+        for template in templates:
+            with open(template[:-3], encoding="utf-8") as f:
+                self.assertEqual(f.read(), "tata titi")
+        shutil.rmtree(".test")
+
+    def test_render_all_parallel_unresolved(self):
+        """
+        Main.renderAll unittest: Check that the templates whose dependencies
+        can not be found do not prevent loading the data before the parallel
+        render: all the data is loaded, the errors are raised by the renders.
+        """
+        Path(".test").mkdir(parents=True, exist_ok=True)
+        with open(".test/a.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{% include 'nope' ignore missing %}{{ section.A }}")
+        with open(".test/b.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{{ section.A }}")
+
+        m = Main(basepath=".test", keep_template=True, jobs=2)
+        m.add_json_section("section", '{"A": "tata"}')
+        self.assertEqual(m.render_all()["changed"], 2)
+        with open(".test/a.txt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "tata")
+
+        with open(".test/b.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{% if %}")
+        m = Main(basepath=".test", jobs=2)
+        m.add_json_section("section", '{"A": "tata"}')
+        with self.assertRaises(jinja2.TemplateSyntaxError):
+            m.render_all()
+        self.assertFalse(m.data.pending, "Data is loaded before rendering")
+        shutil.rmtree(".test")
+
+    def test_render_all_plan(self):
+        """
+        Main.renderAll unittest: Check that with a plan, templates sharing the
+        same parents are rendered together, the shared parents being compiled
+        once in a temporary cache, and that the graph is written.
+        """
+        Path(".test/layouts").mkdir(parents=True, exist_ok=True)
+        with open(".test/layouts/base.txt", "w", encoding="utf-8") as out:
+            out.write("base {% block b %}{% endblock %}")
+        templates = [".test/a.txt.j2", ".test/b.txt.j2", ".test/c.txt.j2"]
+        for template in templates[:2]:
+            with open(template, "w", encoding="utf-8") as out:
+                out.write(
+                    "{% extends 'layouts/base.txt' %}{% block b %}{{ TEST1 }}{% endblock %}"
+                )
+        with open(templates[2], "w", encoding="utf-8") as out:
+            out.write("{{ TEST1 }}")
+
+        m = Main(basepath=".test", jobs=2, plan=True, graph_file=".test/graph.json")
+        m.data["TEST1"] = "tata"
+        run_cache_dirs = []
+        real_mkdtemp = tempfile.mkdtemp
+
+        def mkdtemp():
+            run_cache_dirs.append(real_mkdtemp())
+            return run_cache_dirs[-1]
+
+        with patch("tempfile.mkdtemp", side_effect=mkdtemp):
+            with patch.object(m.env, "get_template", wraps=m.env.get_template) as get:
+                m.render_all()
+        get.assert_called_once_with("layouts/base.txt")
+        self.assertEqual(len(run_cache_dirs), 1)
+        self.assertFalse(os.path.exists(run_cache_dirs[0]))
+        self.assertEqual(
+            m.plan_render(templates), [templates[2], templates[0], templates[1]]
+        )
+        for template in templates:
+            with open(template[:-3], encoding="utf-8") as f:
+                self.assertIn("tata", f.read())
+        with open(".test/graph.json", encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["shared"], ["layouts/base.txt"])
+        shutil.rmtree(".test")
+
+    @parameterized.expand([(".test_bundle.zip", True), (".test_bundle", False)])
+    def test_render_all_bundle(self, bundle, compress):
+        """
+        Main.renderAll unittest: Check that the templates of a bundle, and the
+        templates they extend, are compiled once and rendered without being
+        compiled again, unless they are modified, nor parsed to find the data
+        they read.
+        """
+        Path(".test/layouts").mkdir(parents=True, exist_ok=True)
+        with open(".test/layouts/base.txt", "w", encoding="utf-8") as out:
+            out.write("base {% block b %}{% endblock %}")
+        templates = [".test/a.txt.j2", ".test/b.txt.j2"]
+        for template in templates:
+            with open(template, "w", encoding="utf-8") as out:
+                out.write(
+                    "{% extends 'layouts/base.txt' %}{% block b %}{{ TEST1 }}{% endblock %}"
+                )
+
+        count = Main(basepath=".test").compile_bundle(bundle, compress)
+        self.assertEqual(count, 3)
+        self.assertEqual(os.path.isdir(bundle), not compress)
+
+        with open(templates[1], "w", encoding="utf-8") as out:
+            out.write(
+                "{% extends 'layouts/base.txt' %}{% block b %}{{ TEST1 }} modified{% endblock %}"
+            )
+        for jobs in (1, 2):
+            m = Main(basepath=".test", keep_template=True, jobs=jobs, bundle=bundle)
+            m.data["TEST1"] = "tata"
+            m.add_json_section("section", "{}")
+            with patch.object(
+                m.env, "compile", wraps=m.env.compile
+            ) as compile_mock, patch.object(m.env, "parse") as parse_mock:
+                m.render_all()
+            parse_mock.assert_not_called()
+            if jobs == 1:
+                # Only the modified template is compiled
+                compile_mock.assert_called_once()
+            with open(".test/a.txt", encoding="utf-8") as f:
+                self.assertEqual(f.read(), "base tata")
+            with open(".test/b.txt", encoding="utf-8") as f:
+                self.assertEqual(f.read(), "base tata modified")
+        shutil.rmtree(".test")
+        if compress:
+            os.remove(bundle)
+        else:
+            shutil.rmtree(bundle)
+
+    def test_render_all_cache_dir(self):
+        """
+        Main.renderAll unittest: Check if compiled templates are stored in the cache directory
+        """
+        with open("test.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{{ TEST1 }}")
+
+        m = Main(cache_dir=".test_cache")
+        m.data["TEST1"] = "tata"
+        m.render_all()
+
+        with open("test.txt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "tata", "Template file is managed")
+        self.assertEqual(len(os.listdir(".test_cache/bytecode")), 1, "Cache is used")
+        os.remove("test.txt")
+        shutil.rmtree(".test_cache")
+
+    def test_render_all_manifest(self):
+        """
+        Main.renderAll unittest: Check if templates with unchanged inputs are not
+        rendered again when a manifest is used
+        """
+        with open("test1.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{{ TEST1 }}")
+        with open("test2.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{{ TEST2 }}")
+
+        m = Main(keep_template=True, manifest="manifest.json")
+        m.data.update({"TEST1": "tata", "TEST2": "titi"})
+        m.render_all()
+        self.assertTrue(os.path.isfile("manifest.json"), "Manifest is written")
+
+        m = Main(keep_template=True, manifest="manifest.json")
+        m.data.update({"TEST1": "tata", "TEST2": "toto"})
+        with patch.object(m, "render_file", wraps=m.render_file) as render_mock:
+            m.render_all()
+            render_mock.assert_called_once()
+            self.assertEqual(
+                os.path.basename(render_mock.call_args.args[0]), "test2.txt.j2"
+            )
+        with open("test2.txt", encoding="utf-8") as f:
+            self.assertEqual(
+                f.read(), "toto", "Template with changed input is rendered"
+            )
+
+        for path in ("test1.txt", "test2.txt", "test1.txt.j2", "test2.txt.j2"):
+            os.remove(path)
+        os.remove("manifest.json")
+
+    def test_render_all_manifest_missing_include(self):
+        """
+        Main.renderAll unittest: Check that a template including a missing
+        template with ignore missing, or in a list, is rendered with a manifest
+        and rendered again once the missing template is created
+        """
+        Path(".test").mkdir(parents=True, exist_ok=True)
+        with open(".test/inc.txt", "w", encoding="utf-8") as out:
+            out.write("inc")
+        with open(".test/a.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{% include 'nope.txt' ignore missing %}")
+        with open(".test/b.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{% include ['missing.txt', 'inc.txt'] %}")
+
+        def render():
+            m = Main(basepath=".test", keep_template=True, manifest=".test/m.json")
+            return m.render_all()
+
+        self.assertEqual(render()["changed"], 2)
+        self.assertEqual(render()["skipped"], 2)
+        for name in ("nope.txt", "missing.txt"):
+            with open(f".test/{name}", "w", encoding="utf-8") as out:
+                out.write("new")
+        self.assertEqual(render()["changed"], 2)
+        with open(".test/b.txt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "new")
+        shutil.rmtree(".test")
+
+    def test_plan_and_compile_missing_include(self):
+        """
+        Main.renderAll and Main.compileBundle unittest: Check that the missing
+        templates referenced as optional are neither compiled in the shared
+        parents of a plan nor in a bundle
+        """
+        Path(".test").mkdir(parents=True, exist_ok=True)
+        for name in ("a", "b"):
+            with open(f".test/{name}.txt.j2", "w", encoding="utf-8") as out:
+                out.write("{% include ['missing.txt', 'inc.txt'] %}")
+        with open(".test/inc.txt", "w", encoding="utf-8") as out:
+            out.write("inc")
+
+        m = Main(basepath=".test", keep_template=True, jobs=2, plan=True)
+        self.assertEqual(m.render_all()["changed"], 2)
+        self.assertEqual(m.graph.shared(["a.txt.j2", "b.txt.j2"]), ["inc.txt"])
+        self.assertEqual(Main(basepath=".test").compile_bundle(".test_bundle.zip"), 3)
+        os.remove(".test_bundle.zip")
+        shutil.rmtree(".test")
+
+    def test_render_all_manifest_remove_template(self):
+        """
+        Main.renderAll unittest: Check that without keep_template, the templates
+        skipped thanks to the manifest are removed as the rendered ones
+        """
+        for name in ("test1", "test2"):
+            with open(f"{name}.txt.j2", "w", encoding="utf-8") as out:
+                out.write("{{ TEST1 }}")
+        Main(keep_template=True, manifest="manifest.json").render_all()
+        with open("test2.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{{ TEST1 }} modified")
+
+        counts = Main(manifest="manifest.json").render_all()
+        self.assertEqual(counts["skipped"], 1)
+        self.assertFalse(os.path.exists("test1.txt.j2"), "Skipped template is removed")
+        self.assertFalse(os.path.exists("test2.txt.j2"), "Rendered template is removed")
+
+        for path in ("test1.txt", "test2.txt", "manifest.json"):
+            os.remove(path)
+
+    def test_render_all_basepath(self):
+        """
+        Main.renderAll unittest: Check if templates of another directory are managed
+        and if excluded directories are ignored
+        """
+        Path(".test/directory/excluded").mkdir(parents=True, exist_ok=True)
+        with open(".test/directory/test.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{{ TEST1 }}")
+        open(  # pylint: disable=R1732
+            ".test/directory/excluded/test.txt.j2", "a", encoding="utf-8"
+        ).close()
+
+        m = Main(basepath=".test", exclude=["excluded/"])
+        m.data["TEST1"] = "tata"
+        m.render_all()
+
+        with open(".test/directory/test.txt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "tata", "Template file is managed")
+        self.assertTrue(
+            os.path.isfile(".test/directory/excluded/test.txt.j2"),
+            "Excluded template is ignored",
+        )
+        shutil.rmtree(".test")
+
+    def test_render_file_stream(self):
+        """
+        Main.renderFile unittest: Check if a file rendered in streaming mode is
+        identical to a file rendered in one piece
+        """
+        with open("test.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{% for i in range(10000) %}{{ TEST1 }} {{ i }}\n{% endfor %}")
+
+        m = Main(keep_template=True)
+        m.data = {"TEST1": "tata"}
+        m.render_file("test.txt.j2")
+        with open("test.txt", encoding="utf-8") as f:
+            waited = f.read()
+        os.remove("test.txt")
+
+        m = Main(stream=True)
+        m.data = {"TEST1": "tata"}
+        with patch.object(jinja2.Template, "render") as render_mock:
+            m.render_file("test.txt.j2")
+            self.assertFalse(render_mock.called, "Output is not built in memory")
+
+        self.assertFalse(os.path.isfile("test.txt.j2"), "Original File is deleted")
+        with open("test.txt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), waited, "Template file is managed")
+        os.remove("test.txt")
+
+    def test_render_all_counts(self):
+        """
+        Main.renderAll unittest: Check if unchanged files are not written and
+        if rendered files are counted by status
+        """
+        with open("test1.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{{ TEST1 }}")
+        with open("test2.txt.j2", "w", encoding="utf-8") as out:
+            out.write("{{ TEST2 }}")
+        with open("test1.txt", "w", encoding="utf-8") as out:
+            out.write("tata")
+        os.utime("test1.txt", (0, 0))
+
+        m = Main()
+        m.data = {"TEST1": "tata", "TEST2": "titi"}
+        counts = m.render_all()
+
+        self.assertEqual(counts, {"changed": 1, "unchanged": 1, "skipped": 0})
+        self.assertEqual(os.stat("test1.txt").st_mtime, 0, "File is not written")
+        with open("test2.txt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "titi", "Template file is managed")
+        os.remove("test1.txt")
+        os.remove("test2.txt")
@@ -0,0 +1,132 @@
+"""
+Unit Test of Manifest Module
+"""
+
+import os
+import unittest
+from types import MappingProxyType
+
+from jinja2 import DictLoader, Environment
+
+from action.manifest import Manifest, find_dependencies, hash_text, hash_value
+
+
+class TestFindDependencies(unittest.TestCase):
+    """Unit Test of find_dependencies function"""
+
+    def test_find_dependencies(self):
+        """
+        find_dependencies unittest: included, extended and imported templates
+        are found recursively with the variables read by all of them.
+        """
+        templates = {
+            "test.j2": "{% extends 'base' %}{% block b %}{{ TEST1 }}{% endblock %}",
+            "base": "{% include 'inc' %}{% block b %}{% endblock %}",
+            "inc": "{% import 'macros' as m %}{{ m.hello(TEST2) }}",
+            "macros": "{% macro hello(name) %}{{ name }}{{ TEST3 }}{% endmacro %}",
+        }
+        env = Environment(loader=DictLoader(templates))
+
+        found, variables = find_dependencies(env, "test.j2")
+
+        self.assertEqual(
+            found, {name: hash_text(source) for name, source in templates.items()}
+        )
+        self.assertEqual(variables, {"TEST1", "TEST2", "TEST3"})
+
+    def test_find_dependencies_missing(self):
+        """
+        find_dependencies unittest: a missing template included with ignore
+        missing, or in a list of templates, is found without checksum.
+        """
+        templates = {
+            "test.j2": "{% include 'nope' ignore missing %}"
+            "{% include ['missing', 'inc'] %}",
+            "inc": "{{ TEST1 }}",
+        }
+        env = Environment(loader=DictLoader(templates))
+
+        found, variables = find_dependencies(env, "test.j2")
+
+        self.assertEqual(
+            found,
+            {
+                "test.j2": hash_text(templates["test.j2"]),
+                "nope": None,
+                "missing": None,
+                "inc": hash_text(templates["inc"]),
+            },
+        )
+        self.assertEqual(variables, {"TEST1"})
+
+    def test_find_dependencies_dynamic(self):
+        """
+        find_dependencies unittest: None is returned for a dynamic dependency.
+        """
+        env = Environment(loader=DictLoader({"test.j2": "{% include name %}"}))
+        self.assertIsNone(find_dependencies(env, "test.j2"))
+
+
+class TestManifest(unittest.TestCase):
+    """Unit Test of Manifest Class"""
+
+    def tearDown(self):
+        for path in ("manifest.json", "test.txt"):
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def test_hash_value_key_order(self):
+        """
+        hash_value unittest: hash does not depend on the key order.
+        """
+        self.assertEqual(hash_value({"a": 1, "b": 2}), hash_value({"b": 2, "a": 1}))
+        self.assertNotEqual(hash_value({"a": 1}), hash_value({"a": 2}))
+
+    def test_hash_value_mapping(self):
+        """
+        hash_value unittest: a mapping is hashed as the dict of its items.
+        """
+        self.assertEqual(hash_value(MappingProxyType({"a": 1})), hash_value({"a": 1}))
+
+    def test_save_and_load(self):
+        """
+        Manifest.save unittest: saved entries are loaded by a new manifest
+        with the same signature, and discarded with another signature.
+        """
+        m = Manifest("manifest.json", "sig")
+        m.update("test.txt.j2", {"templates": {}, "context": {}})
+        m.save()
+
+        self.assertEqual(
+            Manifest("manifest.json", "sig").entries,
+            {"test.txt.j2": {"templates": {}, "context": {}}},
+        )
+        self.assertEqual(Manifest("manifest.json", "other").entries, {})
+
+    def test_load_invalid(self):
+        """
+        Manifest.load unittest: an invalid manifest file is ignored.
+        """
+        with open("manifest.json", "w", encoding="utf-8") as f:
+            f.write("not json")
+        self.assertEqual(Manifest("manifest.json").entries, {})
+
+    def test_is_up_to_date(self):
+        """
+        Manifest.is_up_to_date unittest: a template is up to date when its inputs
+        are unchanged and its rendered file exists.
+        """
+        inputs = {"templates": {"test.txt.j2": "hash"}, "context": {}}
+        m = Manifest("manifest.json")
+        m.update("test.txt.j2", inputs)
+
+        self.assertFalse(m.is_up_to_date("test.txt.j2", "test.txt", inputs))
+        open("test.txt", "a", encoding="utf-8").close()  # pylint: disable=R1732
+        self.assertTrue(m.is_up_to_date("test.txt.j2", "test.txt", inputs))
+        self.assertFalse(
+            m.is_up_to_date("test.txt.j2", "test.txt", {"templates": {}, "context": {}})
+        )
+        self.assertFalse(m.is_up_to_date("test.txt.j2", "test.txt", None))
+
+        m.update("test.txt.j2", None)
+        self.assertEqual(m.entries, {})
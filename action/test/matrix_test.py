@@ -0,0 +1,82 @@
+"""
+Unit Test of Matrix Module
+"""
+
+import os
+import shutil
+import unittest
+from pathlib import Path
+
+from action.matrix import load_matrix
+
+
+class TestMatrix(unittest.TestCase):
+    """Unit test of the Matrix module"""
+
+    def setUp(self):
+        Path(".test").mkdir(parents=True, exist_ok=True)
+
+    def tearDown(self):
+        shutil.rmtree(".test")
+
+    def write(self, name, content):
+        """Write a file in the test directory, return its path"""
+        path = os.path.join(".test", name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def test_load_matrix_list(self):
+        """
+        load_matrix unittest: the contexts of a list are named by their index
+        """
+        path = self.write("matrix.yml", "- A: 1\n- A: 2\n")
+        self.assertEqual(load_matrix(path), [("0", {"A": 1}), ("1", {"A": 2})])
+
+    def test_load_matrix_mapping(self):
+        """
+        load_matrix unittest: the contexts of a mapping are named by their key
+        """
+        path = self.write("matrix.json", '{"dev": {"A": 1}, "prod": {"A": 2}}')
+        self.assertEqual(load_matrix(path), [("dev", {"A": 1}), ("prod", {"A": 2})])
+
+    def test_load_matrix_directory(self):
+        """
+        load_matrix unittest: each data file of a directory is a context
+        named after the file
+        """
+        self.write("prod.env", "A=2")
+        self.write("dev.json", '{"A": 1}')
+        Path(".test/sub").mkdir()
+        self.assertEqual(
+            load_matrix(".test"), [("dev", {"A": 1}), ("prod", {"A": "2"})]
+        )
+
+    def test_load_matrix_key_policy(self):
+        """
+        load_matrix unittest: the keys of the contexts are normalized
+        according to the key policy, not the context names
+        """
+        path = self.write("matrix.yml", "prod-eu:\n  A-B:\n    C-D: 1\n")
+        self.assertEqual(
+            load_matrix(path, key_policy="top"), [("prod-eu", {"A_B": {"C-D": 1}})]
+        )
+        self.assertEqual(
+            load_matrix(path, key_policy="recursive"),
+            [("prod-eu", {"A_B": {"C_D": 1}})],
+        )
+        os.remove(path)
+        self.write("prod-eu.json", '{"A-B": {"C-D": 1}}')
+        self.assertEqual(
+            load_matrix(".test", key_policy="recursive"),
+            [("prod-eu", {"A_B": {"C_D": 1}})],
+        )
+
+    def test_load_matrix_invalid(self):
+        """
+        load_matrix unittest: the matrix must be a list or a mapping of mappings
+        """
+        with self.assertRaises(ValueError):
+            load_matrix(self.write("scalar.yml", "value"))
+        with self.assertRaises(ValueError):
+            load_matrix(self.write("list.yml", "- 1\n- 2\n"))
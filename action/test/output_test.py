@@ -0,0 +1,101 @@
+"""
+Unit Test of Output Module
+"""
+
+import os
+import stat
+import unittest
+
+from action.output import same_content, write_if_changed
+
+
+class TestOutput(unittest.TestCase):
+    """Unit Test of Output functions"""
+
+    def tearDown(self):
+        for path in ("test1.txt", "test2.txt"):
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def test_same_content(self):
+        """
+        same_content unittest: files are compared by content.
+        """
+        with open("test1.txt", "w", encoding="utf-8") as f:
+            f.write("tata")
+        with open("test2.txt", "w", encoding="utf-8") as f:
+            f.write("tata")
+        self.assertTrue(same_content("test1.txt", "test2.txt"))
+        with open("test2.txt", "w", encoding="utf-8") as f:
+            f.write("titi")
+        self.assertFalse(same_content("test1.txt", "test2.txt"))
+        with open("test2.txt", "w", encoding="utf-8") as f:
+            f.write("tata titi")
+        self.assertFalse(same_content("test1.txt", "test2.txt"))
+
+    def test_write_if_changed_new_file(self):
+        """
+        write_if_changed unittest: a new file is written with default permissions.
+        """
+        self.assertTrue(write_if_changed("test1.txt", ["ta", "ta"]))
+        with open("test1.txt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "tata")
+        open("test2.txt", "w", encoding="utf-8").close()  # pylint: disable=R1732
+        self.assertEqual(
+            stat.S_IMODE(os.stat("test1.txt").st_mode),
+            stat.S_IMODE(os.stat("test2.txt").st_mode),
+        )
+        self.assertFalse(
+            [name for name in os.listdir(".") if name.endswith(".tmp")],
+            "No temporary file is left",
+        )
+
+    def test_write_if_changed_unchanged(self):
+        """
+        write_if_changed unittest: a file with the same content is not touched.
+        """
+        with open("test1.txt", "w", encoding="utf-8") as f:
+            f.write("tata")
+        os.utime("test1.txt", (0, 0))
+
+        self.assertFalse(write_if_changed("test1.txt", ["tata"]))
+        self.assertEqual(os.stat("test1.txt").st_mtime, 0, "mtime is unchanged")
+        self.assertFalse(
+            [name for name in os.listdir(".") if name.endswith(".tmp")],
+            "No temporary file is left",
+        )
+
+    def test_write_if_changed_changed(self):
+        """
+        write_if_changed unittest: a file with another content is replaced
+        and keeps its permissions.
+        """
+        with open("test1.txt", "w", encoding="utf-8") as f:
+            f.write("tata")
+        os.chmod("test1.txt", 0o640)
+
+        self.assertTrue(write_if_changed("test1.txt", ["titi"]))
+        with open("test1.txt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "titi")
+        self.assertEqual(stat.S_IMODE(os.stat("test1.txt").st_mode), 0o640)
+
+    def test_write_if_changed_error(self):
+        """
+        write_if_changed unittest: on error, the file is untouched and the
+        temporary file removed.
+        """
+        with open("test1.txt", "w", encoding="utf-8") as f:
+            f.write("tata")
+
+        def chunks():
+            yield "titi"
+            raise ValueError("rendering error")
+
+        with self.assertRaises(ValueError):
+            write_if_changed("test1.txt", chunks())
+        with open("test1.txt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "tata")
+        self.assertFalse(
+            [name for name in os.listdir(".") if name.endswith(".tmp")],
+            "No temporary file is left",
+        )
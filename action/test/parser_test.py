@@ -4,22 +4,27 @@ Unit Test of Parser Module
 
 # pylint: disable=W0212
 
+import http.server
 import os
+import shutil
+import threading
 import unittest
+import urllib.error
 
+import yaml
 from parameterized import parameterized
 
-from action.parser import FileParser, Parser, UrlParser
+from action.parser import FileParser, Parser, UrlParser, _orjson, json_loads
 
 
-class TestParser(unittest.TestCase):
+class TestParser(unittest.TestCase):  # pylint: disable=R0904
     """Unit test of Parser Class"""
 
     class StubParser(Parser):
         """Stub of a Parser Child Class"""
 
-        def __init__(self, parsed_format=None):
-            super().__init__(parsed_format)
+        def __init__(self, parsed_format=None, key_policy="none"):
+            super().__init__(parsed_format, key_policy)
 
         def load(self):
             return "CONTENT_TO_PARSE"
@@ -66,7 +71,7 @@ class TestParser(unittest.TestCase):
         with unittest.mock.patch(method, return_value="fake") as mock:
             ret = p.parse()
             self.assertTrue(mock.called, f"{method} is called")
-            mock.assert_called_with("CONTENT_TO_PARSE")
+            mock.assert_called_with("CONTENT_TO_PARSE", "none")
             self.assertTrue(ret == "fake")
 
     def test_parse_call_unknow_parser(self):
@@ -82,7 +87,7 @@ class TestParser(unittest.TestCase):
             self.assertTrue(
                 mock.called, "action.parser.Parser._parse_generic is called"
             )
-            mock.assert_called_with("CONTENT_TO_PARSE")
+            mock.assert_called_with("CONTENT_TO_PARSE", "none")
             self.assertTrue(ret == "fake")
 
     def test_parse_ini(self):
@@ -109,6 +114,94 @@ class TestParser(unittest.TestCase):
             {"exemple": {"TEST1": "tata", "TEST2": "titi"}}.items(), ret.items()
         )
 
+    @parameterized.expand([("with_orjson", True), ("without_orjson", False)])
+    def test_json_loads(self, _, with_orjson):
+        """
+        json_loads unittest: JSON content is parsed with or without the
+        optional orjson backend, including content rejected by orjson.
+        """
+        patcher = unittest.mock.patch("action.parser._orjson", return_value=None)
+        if not with_orjson:
+            patcher.start()
+        try:
+            self.assertEqual(json_loads('{"TEST1": "tata"}'), {"TEST1": "tata"})
+            self.assertEqual(json_loads(b'{"TEST1": [1, 2.5]}'), {"TEST1": [1, 2.5]})
+            self.assertEqual(json_loads('{"TEST1": 1e400}'), {"TEST1": float("inf")})
+            with self.assertRaises(ValueError):
+                json_loads("{not json}")
+        finally:
+            if not with_orjson:
+                patcher.stop()
+
+    @parameterized.expand(
+        [
+            (
+                "json",
+                '{"a-b": {"c-d": [{"e-f": 1}]}, "g": "h-i"}',
+                {"a_b": {"c-d": [{"e-f": 1}]}, "g": "h-i"},
+                {"a_b": {"c_d": [{"e_f": 1}]}, "g": "h-i"},
+            ),
+            (
+                "yaml",
+                "a-b:\n  c-d:\n    - e-f: 1\ng: h-i\n",
+                {"a_b": {"c-d": [{"e-f": 1}]}, "g": "h-i"},
+                {"a_b": {"c_d": [{"e_f": 1}]}, "g": "h-i"},
+            ),
+            (
+                "ini",
+                "[a-b]\nc-d = e-f\n",
+                {"a_b": {"c-d": "e-f"}},
+                {"a_b": {"c_d": "e-f"}},
+            ),
+            ("env", "A-B=c-d\n", {"A_B": "c-d"}, {"A_B": "c-d"}),
+        ]
+    )
+    def test_parse_key_policy(self, parsed_format, content, top, recursive):
+        """
+        Parser.parse unittest: The dashes of the keys are replaced by
+        underscores according to the key policy, the values are unchanged.
+        """
+        for key_policy, expected in (("top", top), ("recursive", recursive)):
+            p = TestParser.StubParser(parsed_format, key_policy=key_policy)
+            p.load = unittest.mock.MagicMock(return_value=content)
+            self.assertEqual(p.parse(), expected, key_policy)
+        p = TestParser.StubParser(parsed_format)
+        p.load = unittest.mock.MagicMock(return_value=content)
+        self.assertNotEqual(p.parse(), top, "Keys are kept by default")
+
+    def test_json_loads_key_policy(self):
+        """
+        json_loads unittest: With the recursive policy, the escaped dashes are
+        normalized too, and a content without any dash is decoded as usual.
+        """
+        self.assertEqual(json_loads('{"a\\u002db": 1}', "recursive"), {"a_b": 1})
+        self.assertEqual(json_loads(b'[{"a-b": 1}]', "recursive"), [{"a_b": 1}])
+        self.assertEqual(json_loads(b'[{"a-b": 1}]', "top"), [{"a-b": 1}])
+        with unittest.mock.patch("json.loads") as loads_mock:
+            json_loads('{"TEST1": {"TEST2": 1}}', "recursive")
+        if _orjson() is not None:
+            loads_mock.assert_not_called()
+
+    def test_init_with_unknown_key_policy(self):
+        """
+        Parser.__init__ unittest: An unknown key policy raises an exception.
+        """
+        with self.assertRaises(ValueError):
+            TestParser.StubParser("json", key_policy="strange")
+
+    def test_parse_yaml_loader(self):
+        """
+        Parser._parse_yaml unittest: YAML content is parsed with the libyaml
+        loader when it is available.
+        """
+        with unittest.mock.patch("yaml.load", return_value="fake") as mock:
+            TestParser.StubParser._parse_yaml("exemple: tata")
+        loader = mock.call_args.kwargs["Loader"]
+        if yaml.__with_libyaml__:
+            self.assertIs(loader, yaml.CSafeLoader)
+        else:
+            self.assertIs(loader, yaml.SafeLoader)
+
     def test_parse_yaml(self):
         """
         Parser._parse_yaml unittest: Parse YAML content is successfull.
@@ -143,8 +236,12 @@ class TestParser(unittest.TestCase):
         TEST1 = tata
         TEST2 = titi
         """
-        test_format, ret = TestParser.StubParser._parse_generic(ini_content)
-        self.assertEqual(test_format, "ini")
+        with unittest.mock.patch(
+            "action.parser.Parser._parse_ini",
+            wraps=TestParser.StubParser._parse_ini,
+        ) as mock:
+            ret = TestParser.StubParser._parse_generic(ini_content)
+            mock.assert_called_once_with(ini_content, "none")
         self.assertEqual(
             {"exemple": {"TEST1": "tata", "TEST2": "titi"}}.items(), ret.items()
         )
@@ -154,8 +251,12 @@ class TestParser(unittest.TestCase):
         Parser._parse_generic unittest: Generic Parser recognize JSON content and parse it.
         """
         json_content = '{"exemple": {"TEST1": "tata", "TEST2": "titi"}}'
-        test_format, ret = TestParser.StubParser._parse_generic(json_content)
-        self.assertEqual(test_format, "json")
+        with unittest.mock.patch(
+            "action.parser.Parser._parse_json",
+            wraps=TestParser.StubParser._parse_json,
+        ) as mock:
+            ret = TestParser.StubParser._parse_generic(json_content)
+            mock.assert_called_once_with(json_content, "none")
         self.assertEqual(
             {"exemple": {"TEST1": "tata", "TEST2": "titi"}}.items(), ret.items()
         )
@@ -169,8 +270,12 @@ class TestParser(unittest.TestCase):
             TEST1: tata
             TEST2: titi
         """
-        test_format, ret = TestParser.StubParser._parse_generic(yaml_content)
-        self.assertEqual(test_format, "yaml")
+        with unittest.mock.patch(
+            "action.parser.Parser._parse_yaml",
+            wraps=TestParser.StubParser._parse_yaml,
+        ) as mock:
+            ret = TestParser.StubParser._parse_generic(yaml_content)
+            mock.assert_called_once_with(yaml_content, "none")
         self.assertEqual(
             {"exemple": {"TEST1": "tata", "TEST2": "titi"}}.items(), ret.items()
         )
@@ -183,10 +288,52 @@ class TestParser(unittest.TestCase):
         TEST1=tata
         TEST2=titi
         """
-        test_format, ret = TestParser.StubParser._parse_generic(env_content)
-        self.assertEqual(test_format, "env")
+        with unittest.mock.patch(
+            "action.parser.Parser._parse_env",
+            wraps=TestParser.StubParser._parse_env,
+        ) as mock:
+            ret = TestParser.StubParser._parse_generic(env_content)
+            mock.assert_called_once_with(env_content, "none")
         self.assertEqual({"TEST1": "tata", "TEST2": "titi"}.items(), ret.items())
 
+    @parameterized.expand(
+        [
+            ("[exemple]\nTEST1 = tata", "ini"),
+            ("# comment\n\n  [exemple]\nTEST1 = tata", "ini"),
+            ('{"exemple": {"TEST1": "tata"}}', "json"),
+            ('\n  [{"TEST1": "tata"}]', "json"),
+            ('["exemple"]', "json"),
+            ("TEST1=tata\nTEST2=titi", "env"),
+            ("# comment\nTEST_1.a = tata", "env"),
+            ("exemple:\n  TEST1: tata", "yaml"),
+            ("---\nexemple: [1, 2]", "yaml"),
+            ("url: http://host?a=b", "yaml"),
+            ("", "yaml"),
+        ]
+    )
+    def test_detect_format(self, content, waited_format):
+        """
+        Parser._detect_format unittest: Format is detected from the first
+        significant line of the content.
+        """
+        self.assertEqual(TestParser.StubParser._detect_format(content), waited_format)
+
+    def test_parse_generic_yaml_flow(self):
+        """
+        Parser._parse_generic unittest: Generic Parser recognize YAML flow content
+        starting like a JSON content.
+        """
+        ret = TestParser.StubParser._parse_generic("{exemple: {TEST1: tata}}")
+        self.assertEqual({"exemple": {"TEST1": "tata"}}.items(), ret.items())
+
+    def test_parse_bytes(self):
+        """
+        Parser.parse unittest: A loaded bytes content is decoded before being parsed.
+        """
+        p = TestParser.StubParser("env")
+        with unittest.mock.patch.object(p, "load", return_value=b"TEST1=tata"):
+            self.assertEqual(p.parse(), {"TEST1": "tata"})
+
     def test_parse_generic_not_managed(self):
         """
         Parser._parse_generic unittest: Generic Parser does"nt recognize/parse unformatted content.
@@ -256,6 +403,76 @@ class TestFileParser(unittest.TestCase):
         os.remove(f"file_path.{extension}")
 
 
+class TestFileParserCache(unittest.TestCase):
+    """UnitTest of FileParser Cache"""
+
+    def setUp(self):
+        with open("data.yml", "w", encoding="utf-8") as f:
+            f.write("exemple:\n  TEST1: tata\n")
+
+    def tearDown(self):
+        os.remove("data.yml")
+        shutil.rmtree(".test_cache", ignore_errors=True)
+
+    def test_parse_cached(self):
+        """
+        FileParser.parse unittest: The parsed content of an unchanged file is
+        read from the cache, without parsing.
+        """
+        p = FileParser("data.yml", cache_dir=".test_cache")
+        self.assertEqual(p.parse(), {"exemple": {"TEST1": "tata"}})
+        self.assertEqual(len(os.listdir(".test_cache")), 1)
+        self.assertEqual(p.content, "", "Raw content is not kept")
+
+        p = FileParser("data.yml", cache_dir=".test_cache")
+        with unittest.mock.patch("action.parser.Parser._parse_yaml") as parse_mock:
+            self.assertEqual(p.parse(), {"exemple": {"TEST1": "tata"}})
+            self.assertFalse(parse_mock.called, "Content is not parsed again")
+        self.assertEqual(p.format, "yml", "Format is restored from the cache")
+
+    def test_parse_modified(self):
+        """
+        FileParser.parse unittest: A modified file, or a different format,
+        is parsed again.
+        """
+        FileParser("data.yml", cache_dir=".test_cache").parse()
+        with open("data.yml", "w", encoding="utf-8") as f:
+            f.write("exemple:\n  TEST1: titi\n")
+
+        p = FileParser("data.yml", cache_dir=".test_cache")
+        self.assertEqual(p.parse(), {"exemple": {"TEST1": "titi"}})
+        p = FileParser("data.yml", "json", cache_dir=".test_cache")
+        with self.assertRaises(ValueError):
+            p.parse()
+        self.assertEqual(len(os.listdir(".test_cache")), 2)
+
+    def test_parse_version(self):
+        """
+        FileParser.parse unittest: The entries of another parser version are
+        not used.
+        """
+        FileParser("data.yml", cache_dir=".test_cache").parse()
+        with unittest.mock.patch.object(FileParser, "PARSER_VERSION", 0):
+            FileParser("data.yml", cache_dir=".test_cache").parse()
+        self.assertEqual(len(os.listdir(".test_cache")), 2)
+
+    def test_parse_invalid_cache(self):
+        """
+        FileParser.parse unittest: An invalid cache entry is ignored and
+        replaced.
+        """
+        FileParser("data.yml", cache_dir=".test_cache").parse()
+        (name,) = os.listdir(".test_cache")
+        with open(os.path.join(".test_cache", name), "wb") as f:
+            f.write(b"invalid")
+        p = FileParser("data.yml", cache_dir=".test_cache")
+        self.assertEqual(p.parse(), {"exemple": {"TEST1": "tata"}})
+        p = FileParser("data.yml", cache_dir=".test_cache")
+        with unittest.mock.patch("action.parser.Parser._parse_yaml") as parse_mock:
+            p.parse()
+            self.assertFalse(parse_mock.called, "Entry is replaced")
+
+
 class TestUrlParser(unittest.TestCase):
     """UnitTest of UrlParser Class"""
 
@@ -328,3 +545,175 @@ class TestUrlParser(unittest.TestCase):
         self.assertEqual(
             p.format, waited_format, "Load found the format from the http header"
         )
+
+    @unittest.mock.patch("time.sleep")
+    @unittest.mock.patch("urllib.request.urlopen")
+    def test_load_retry(self, mock_urlopen, mock_sleep):
+        """
+        UrlParser.load unittest: transient errors are retried with an
+        exponential backoff.
+        """
+        cm = unittest.mock.MagicMock()
+        cm.read.return_value = "CONTENT_TO_PARSE"
+        cm.__enter__.return_value = cm
+        mock_urlopen.side_effect = [
+            urllib.error.URLError("connection refused"),
+            urllib.error.HTTPError("url", 503, "Unavailable", {}, None),
+            cm,
+        ]
+
+        p = UrlParser("url", "json", retries=2, backoff=1)
+        self.assertEqual(p.load(), "CONTENT_TO_PARSE")
+        self.assertEqual(mock_urlopen.call_count, 3)
+        self.assertEqual(
+            mock_sleep.call_args_list, [unittest.mock.call(1), unittest.mock.call(2)]
+        )
+
+    @unittest.mock.patch("urllib.request.urlopen")
+    def test_parse_timings(self, mock_urlopen):
+        """
+        UrlParser.parse unittest: the time spent loading and parsing the
+        content is recorded.
+        """
+        cm = unittest.mock.MagicMock()
+        cm.read.return_value = '{"TEST": "tata"}'
+        cm.__enter__.return_value = cm
+        mock_urlopen.return_value = cm
+
+        p = UrlParser("url", "json")
+        self.assertEqual(p.source, "url")
+        self.assertEqual(p.timings, {})
+        self.assertEqual(p.parse(), {"TEST": "tata"})
+        self.assertEqual(set(p.timings), {"load", "parse"})
+        self.assertEqual(p.content, "", "Raw content is not kept")
+
+    @parameterized.expand(
+        [
+            ("exhausted", urllib.error.URLError("connection refused"), 2),
+            ("client_error", urllib.error.HTTPError("url", 404, "", {}, None), 1),
+        ]
+    )
+    @unittest.mock.patch("time.sleep")
+    @unittest.mock.patch("urllib.request.urlopen")
+    def test_load_retry_failure(  # pylint: disable=R0913
+        self, _, error, waited_calls, mock_urlopen, mock_sleep
+    ):
+        """
+        UrlParser.load unittest: the error is raised once the retries are
+        exhausted, or at once if it is not transient.
+        """
+        mock_urlopen.side_effect = error
+
+        with self.assertRaises(type(error)):
+            UrlParser("url", "json", retries=1).load()
+        self.assertEqual(mock_urlopen.call_count, waited_calls)
+        self.assertEqual(mock_sleep.call_count, waited_calls - 1)
+
+
+class CachedContentHandler(http.server.BaseHTTPRequestHandler):
+    """Http handler serving a YAML content with an ETag header"""
+
+    content = b"exemple:\n  TEST1: tata\n"
+    etag = '"v1"'
+    requests = []
+
+    def do_GET(self):  # pylint: disable=C0103
+        """Serve the content, or 304 if the given ETag is the current one"""
+        CachedContentHandler.requests.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == CachedContentHandler.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/yaml")
+        self.send_header("ETag", CachedContentHandler.etag)
+        self.end_headers()
+        self.wfile.write(CachedContentHandler.content)
+
+    def log_message(self, *args):  # pylint: disable=W0221
+        pass
+
+
+class TestUrlParserCache(unittest.TestCase):
+    """UnitTest of UrlParser Cache, against a local http server"""
+
+    def setUp(self):
+        CachedContentHandler.requests = []
+        CachedContentHandler.etag = '"v1"'
+        CachedContentHandler.content = b"exemple:\n  TEST1: tata\n"
+        self.server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), CachedContentHandler
+        )
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/data.yml"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(".test_cache", ignore_errors=True)
+
+    def test_parse_without_cache(self):
+        """
+        UrlParser.parse unittest: Without cache directory, the content is
+        fetched without conditional request.
+        """
+        self.assertEqual(UrlParser(self.url).parse(), {"exemple": {"TEST1": "tata"}})
+        self.assertEqual(UrlParser(self.url).parse(), {"exemple": {"TEST1": "tata"}})
+        self.assertEqual(CachedContentHandler.requests, [None, None])
+
+    def test_parse_not_modified(self):
+        """
+        UrlParser.parse unittest: The cached content is revalidated with a
+        conditional request and reused, without parsing, when not modified.
+        """
+        p = UrlParser(self.url, cache_dir=".test_cache")
+        self.assertEqual(p.parse(), {"exemple": {"TEST1": "tata"}})
+
+        p = UrlParser(self.url, cache_dir=".test_cache")
+        with unittest.mock.patch("action.parser.Parser._parse_yaml") as parse_mock:
+            self.assertEqual(p.parse(), {"exemple": {"TEST1": "tata"}})
+            self.assertFalse(parse_mock.called, "Content is not parsed again")
+        self.assertEqual(p.format, "yaml", "Format is restored from the cache")
+        self.assertEqual(CachedContentHandler.requests, [None, '"v1"'])
+
+    def test_parse_modified(self):
+        """
+        UrlParser.parse unittest: A modified content replaces the cached content.
+        """
+        UrlParser(self.url, cache_dir=".test_cache").parse()
+        CachedContentHandler.etag = '"v2"'
+        CachedContentHandler.content = b"exemple:\n  TEST1: titi\n"
+
+        p = UrlParser(self.url, cache_dir=".test_cache")
+        self.assertEqual(p.parse(), {"exemple": {"TEST1": "titi"}})
+        p = UrlParser(self.url, cache_dir=".test_cache")
+        self.assertEqual(p.parse(), {"exemple": {"TEST1": "titi"}})
+        self.assertEqual(CachedContentHandler.requests, [None, '"v1"', '"v2"'])
+
+    def test_parse_ttl(self):
+        """
+        UrlParser.parse unittest: During the ttl, the cached content is used
+        without any request.
+        """
+        UrlParser(self.url, cache_dir=".test_cache").parse()
+        p = UrlParser(self.url, cache_dir=".test_cache", ttl=3600)
+        self.assertEqual(p.parse(), {"exemple": {"TEST1": "tata"}})
+        self.assertEqual(CachedContentHandler.requests, [None])
+
+        p = UrlParser(self.url, cache_dir=".test_cache", ttl=0)
+        self.assertEqual(p.parse(), {"exemple": {"TEST1": "tata"}})
+        self.assertEqual(CachedContentHandler.requests, [None, '"v1"'])
+
+    def test_parse_invalid_cache(self):
+        """
+        UrlParser.parse unittest: An invalid cache entry is ignored.
+        """
+        p = UrlParser(self.url, cache_dir=".test_cache")
+        os.makedirs(".test_cache")
+        with open(
+            os.path.join(".test_cache", p._cache_name()),  # pylint: disable=W0212
+            "wb",
+        ) as f:
+            f.write(b"invalid")
+        self.assertEqual(p.parse(), {"exemple": {"TEST1": "tata"}})
+        self.assertEqual(CachedContentHandler.requests, [None])
@@ -0,0 +1,102 @@
+"""
+Unit Test of Profiler Module
+"""
+
+import json
+import os
+import time
+import unittest
+
+from jinja2 import DictLoader, Environment
+
+from action.profiler import Profiler, ProfilingLoader
+
+
+class TestProfilingLoader(unittest.TestCase):
+    """Unit Test of ProfilingLoader Class"""
+
+    def test_get_source(self):
+        """
+        ProfilingLoader.get_source unittest: sources are loaded by the wrapped
+        loader and the time spent is measured.
+        """
+        loader = ProfilingLoader(DictLoader({"a.j2": "{{ TEST }}"}))
+        env = Environment(loader=loader)
+        self.assertEqual(env.get_template("a.j2").render(TEST="tata"), "tata")
+        self.assertGreater(loader.elapsed, 0)
+        self.assertEqual(loader.list_templates(), ["a.j2"])
+
+
+class TestProfiler(unittest.TestCase):
+    """Unit Test of Profiler Class"""
+
+    def test_timed(self):
+        """
+        Profiler.timed unittest: the time spent producing the items is
+        measured, not the time spent consuming them.
+        """
+
+        def chunks():
+            time.sleep(0.02)
+            yield "a"
+            yield "b"
+
+        profiler = Profiler()
+        record = profiler.template("a.j2")
+        items = []
+        for item in profiler.timed(record, "render", chunks()):
+            time.sleep(0.05)
+            items.append(item)
+
+        self.assertEqual(items, ["a", "b"])
+        self.assertGreaterEqual(record["render"], 0.02)
+        self.assertLess(record["render"], 0.05)
+
+    def test_report(self):
+        """
+        Profiler.report unittest: templates and sources are sorted from the
+        slowest one, with their total time.
+        """
+        profiler = Profiler()
+        profiler.template("fast.j2")["render"] = 1.0
+        profiler.template("slow.j2").update(load=1.0, render=2.0)
+        profiler.add_source("data.json", "json", {"load": 0.5, "parse": 1.5})
+
+        report = profiler.report()
+        self.assertEqual(
+            [(entry["template"], entry["total"]) for entry in report["templates"]],
+            [("slow.j2", 3.0), ("fast.j2", 1.0)],
+        )
+        self.assertEqual(
+            report["sources"],
+            [
+                {
+                    "source": "data.json",
+                    "format": "json",
+                    "load": 0.5,
+                    "parse": 1.5,
+                    "total": 2.0,
+                }
+            ],
+        )
+
+    def test_summary_and_save(self):
+        """
+        Profiler.summary and Profiler.save unittest: the summary shows the top
+        slowest templates and the report is written as json.
+        """
+        profiler = Profiler()
+        profiler.phases["render"] = 3.0
+        for index in range(5):
+            profiler.template(f"{index}.j2")["render"] = float(index)
+
+        summary = profiler.summary(top=2)
+        self.assertIn("render 3.000s", summary)
+        self.assertIn("Slowest templates (2/5)", summary)
+        self.assertIn("4.j2", summary)
+        self.assertNotIn("2.j2", summary)
+
+        profiler.save("profile.json")
+        with open("profile.json", encoding="utf-8") as f:
+            self.assertEqual(json.load(f), profiler.report())
+        os.remove("profile.json")
@@ -0,0 +1,87 @@
+"""
+Unit Test of Data Provider Module
+"""
+
+import asyncio
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from action.provider import DataProvider
+
+
+class TestDataProvider(unittest.TestCase):
+    """Unit Test of DataProvider Class"""
+
+    def test_call(self):
+        """
+        DataProvider.__call__ unittest: the lookup is done once by arguments.
+        """
+        function = MagicMock(side_effect=lambda key, offset=0: key + offset)
+        provider = DataProvider(function)
+        self.assertEqual(provider(1), 1)
+        self.assertEqual(provider(1), 1)
+        self.assertEqual(provider(1, offset=2), 3)
+        self.assertEqual(function.call_count, 2)
+
+    def test_lookup_async(self):
+        """
+        DataProvider.lookup_async unittest: concurrent lookups of the same
+        arguments wait for the same call, the results are reused by the next
+        event loops.
+        """
+        started = threading.Event()
+        release = threading.Event()
+
+        def lookup(key):
+            started.set()
+            release.wait(5)
+            return key * 2
+
+        function = MagicMock(side_effect=lookup)
+        provider = DataProvider(function)
+
+        async def lookups():
+            tasks = [asyncio.create_task(provider.lookup_async(2)) for _ in range(3)]
+            await asyncio.to_thread(started.wait, 5)
+            release.set()
+            return await asyncio.gather(*tasks)
+
+        self.assertEqual(asyncio.run(lookups()), [4, 4, 4])
+        self.assertEqual(asyncio.run(provider.lookup_async(2)), 4)
+        self.assertEqual(provider(2), 4)
+        self.assertEqual(function.call_count, 1)
+
+    def test_lookup_async_concurrency(self):
+        """
+        DataProvider.lookup_async unittest: the lookups run concurrently, up
+        to the concurrency limit.
+        """
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def lookup(key):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            threading.Event().wait(0.05)
+            with lock:
+                running[0] -= 1
+            return key
+
+        async def lookups(provider):
+            return await asyncio.gather(*(provider.lookup_async(i) for i in range(6)))
+
+        self.assertEqual(asyncio.run(lookups(DataProvider(lookup, 2))), list(range(6)))
+        self.assertEqual(running[1], 2)
+
+    def test_lookup_async_error(self):
+        """
+        DataProvider.lookup_async unittest: a failed lookup is raised, and
+        done again by the next call.
+        """
+        function = MagicMock(side_effect=[ValueError("boom"), 1])
+        provider = DataProvider(function)
+        with self.assertRaises(ValueError):
+            asyncio.run(provider.lookup_async("key"))
+        self.assertEqual(asyncio.run(provider.lookup_async("key")), 1)
@@ -0,0 +1,108 @@
+"""
+Unit Test of Sandbox Module
+"""
+
+import unittest
+from unittest.mock import patch
+
+from jinja2 import DictLoader
+from jinja2.exceptions import SecurityError
+
+from action.sandbox import Budget, BudgetedEnvironment, BudgetExceeded
+
+TEMPLATES = {
+    "loops.j2": "{% for i in range(3) %}{% for j in items %}{{ j }}{% endfor %}{% endfor %}",
+    "huge.j2": "{% for i in range(100000) %}{% for j in range(100000) %}{{ j }}"
+    "{% endfor %}{% endfor %}",
+    "macro.j2": "{% macro f(n) %}{% if n %}{{ f(n - 1) }}{{ f(n - 1) }}{% endif %}"
+    "{% endmacro %}{{ f(100) }}",
+    "repeat.j2": "{{ '-' * size }}",
+    "recursive.j2": "{% for i in tree recursive %}{{ i.name }}"
+    "{{ loop(i.children) }}{% endfor %}",
+    "unsafe.j2": "{{ items.__class__.__mro__ }}",
+}
+
+
+class TestBudgetedEnvironment(unittest.TestCase):
+    """Unit Test of BudgetedEnvironment Class"""
+
+    def render(self, name, **budgets):
+        """Render a template within the given budgets"""
+        budget = Budget(**budgets)
+        env = BudgetedEnvironment(budget, loader=DictLoader(TEMPLATES))
+        template = env.get_template(name)
+        tree = [
+            {"name": 1, "children": [{"name": n, "children": []} for n in range(50)]}
+        ]
+        return "".join(
+            budget.measure(name, template.generate(items=[1, 2], size=80, tree=tree))
+        )
+
+    def test_render_within_budget(self):
+        """
+        BudgetedEnvironment unittest: a template within its budgets is rendered.
+        """
+        self.assertEqual(
+            self.render("loops.j2", max_time=10, max_output=6, max_loop=9), "121212"
+        )
+        self.assertEqual(self.render("repeat.j2", max_output=80), "-" * 80)
+
+    def test_loop_budget(self):
+        """
+        BudgetedEnvironment unittest: the iterations of all the loops are counted.
+        """
+        with self.assertRaises(BudgetExceeded) as context:
+            self.render("loops.j2", max_loop=8)
+        self.assertIn("Template loops.j2 aborted, loop budget", str(context.exception))
+        self.assertIn("9 loop iterations", str(context.exception))
+
+    def test_recursive_loop_budget(self):
+        """
+        BudgetedEnvironment unittest: the iterations of a recursive loop are
+        counted.
+        """
+        self.assertEqual(len(self.render("recursive.j2", max_loop=51)), 91)
+        with self.assertRaises(BudgetExceeded) as context:
+            self.render("recursive.j2", max_loop=5)
+        self.assertIn("6 loop iterations", str(context.exception))
+
+    def test_output_budget(self):
+        """
+        BudgetedEnvironment unittest: the output and the repetitions are
+        limited by the output budget.
+        """
+        with self.assertRaises(BudgetExceeded) as context:
+            self.render("huge.j2", max_output=1000)
+        self.assertIn("output budget exceeded", str(context.exception))
+        with self.assertRaises(BudgetExceeded):
+            self.render("repeat.j2", max_output=79)
+
+    def test_time_budget(self):
+        """
+        BudgetedEnvironment unittest: a loop or a recursion is aborted once
+        the wall time budget is spent.
+        """
+        for name in ("huge.j2", "macro.j2"):
+            with self.assertRaises(BudgetExceeded) as context:
+                self.render(name, max_time=0.05)
+            self.assertIn("wall time budget exceeded", str(context.exception))
+
+    def test_time_budget_out_of_render(self):
+        """
+        Budget.check_time unittest: the wall time is only checked during a render.
+        """
+        budget = Budget(max_time=0.01)
+        budget.check_time()
+        with patch("time.perf_counter", return_value=0.0):
+            budget.start("page.j2")
+        with self.assertRaises(BudgetExceeded):
+            budget.check_time()
+        budget.stop()
+        budget.check_time()
+
+    def test_sandbox(self):
+        """
+        BudgetedEnvironment unittest: unsafe attributes are rejected.
+        """
+        with self.assertRaises(SecurityError):
+            self.render("unsafe.j2")
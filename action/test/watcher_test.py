@@ -0,0 +1,76 @@
+"""
+Unit Test of Watcher Module
+"""
+
+import os
+import shutil
+import unittest
+from pathlib import Path
+
+from action.watcher import Watcher
+
+
+class TestWatcher(unittest.TestCase):
+    """Unit test of Watcher Class"""
+
+    def setUp(self):
+        Path(".test/directory").mkdir(parents=True, exist_ok=True)
+        Path(".test/.git").mkdir(parents=True, exist_ok=True)
+        for path in (".test/a.txt", ".test/directory/b.txt", "data.json"):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("content")
+
+    def tearDown(self):
+        shutil.rmtree(".test")
+        os.remove("data.json")
+
+    @staticmethod
+    def touch(path, content="changed"):
+        """Write a file with a modification time distinct from the previous one"""
+        mtime = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+
+    def test_changes(self):
+        """
+        Watcher.changes unittest: created, modified and removed files are
+        found, in the watched directories and files only.
+        """
+        watcher = Watcher([".test", "data.json", "missing.json"])
+        self.assertEqual(watcher.changes(), [])
+
+        self.touch(".test/directory/b.txt")
+        self.touch(".test/new.txt")
+        self.touch("data.json")
+        self.touch(".test/.git/index")
+        os.remove(".test/a.txt")
+        self.assertEqual(
+            watcher.changes(),
+            [
+                os.path.normpath(".test/a.txt"),
+                os.path.normpath(".test/directory/b.txt"),
+                os.path.normpath(".test/new.txt"),
+                "data.json",
+            ],
+        )
+        self.assertEqual(watcher.changes(), [])
+
+    def test_ignore(self):
+        """
+        Watcher.changes unittest: the changes of the ignored files are not
+        reported.
+        """
+        watcher = Watcher([".test"], ignore=lambda path: path.endswith("a.txt"))
+        self.touch(".test/a.txt")
+        self.assertEqual(watcher.changes(), [])
+
+    def test_wait(self):
+        """
+        Watcher.wait unittest: the changes are returned once found, an empty
+        list on timeout.
+        """
+        watcher = Watcher([".test"], interval=0.01)
+        self.assertEqual(watcher.wait(timeout=0.05), [])
+        self.touch(".test/a.txt")
+        self.assertEqual(watcher.wait(), [os.path.normpath(".test/a.txt")])
@@ -0,0 +1,87 @@
+"""
+Watcher Module
+"""
+
+import os
+import time
+
+from .finder import DEFAULT_EXCLUDE
+
+# Delay between two scans of the watched files, in seconds
+DEFAULT_INTERVAL = 0.5
+
+
+class Watcher:
+    """
+    Watcher of directory trees and files, by polling: each scan compares the
+    modification time and the size of every file with the previous scan.
+    The DEFAULT_EXCLUDE directories are not watched.
+    """
+
+    def __init__(self, paths, interval=DEFAULT_INTERVAL, ignore=None):
+        """
+        Parameters:
+          paths (list): watched directories and files
+          interval (float): delay between two scans, in seconds
+          ignore (callable): called with the path of a changed file, returns
+            True if the change must be ignored
+        """
+        self.paths = [os.path.normpath(path) for path in paths]
+        self.interval = interval
+        self.ignore = ignore
+        self.state = self.scan()
+
+    def scan(self):
+        """Modification time and size of each watched file, by path"""
+        state = {}
+        pending = []
+        for path in self.paths:
+            if os.path.isdir(path):
+                pending.append(path)
+            elif os.path.isfile(path):
+                stat = os.stat(path)
+                state[path] = (stat.st_mtime_ns, stat.st_size)
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as it:
+                    entries = list(it)
+            except OSError:
+                # Directory removed during the scan
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in DEFAULT_EXCLUDE:
+                            pending.append(entry.path)
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                state[os.path.normpath(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def changes(self):
+        """Paths of the files created, modified or removed since the previous scan"""
+        state = self.scan()
+        changed = [
+            path
+            for path in sorted(state.keys() | self.state.keys())
+            if state.get(path) != self.state.get(path)
+        ]
+        self.state = state
+        if self.ignore:
+            changed = [path for path in changed if not self.ignore(path)]
+        return changed
+
+    def wait(self, timeout=None):
+        """
+        Wait for some changes, scanning the files every interval.
+          Returns:
+            The changed paths, an empty list if timeout seconds elapsed first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            time.sleep(self.interval)
+            changed = self.changes()
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
@@ -0,0 +1,8 @@
+"""
+Benchmarks of the jinja2-template-action.
+The suite runs all the cases of the render pipeline and of the parsers, and
+compares them with a baseline:
+  python -m benchmark.suite
+Each other module can be run on its own, for example:
+  python -m benchmark.parser_detection
+"""
@@ -0,0 +1,77 @@
+"""
+Benchmark of the async rendering.
+
+Render templates each calling a data provider whose lookups wait for a
+simulated latency, as a slow url would, with and without the async mode.
+  python -m benchmark.async_render [--count N] [--latency SECONDS] [--repeat N]
+"""
+
+import argparse
+import tempfile
+import time
+
+from action.main import Main
+
+from .generators import flat_tree
+from .suite import measure
+
+
+def lookup(key, latency):
+    """Provider: wait for the latency, as a network request would"""
+    time.sleep(latency)
+    return {"key": key}
+
+
+def render(directory, latency, enable_async, connections):
+    """Render the tree, each template calling the provider"""
+    m = Main(basepath=directory, keep_template=True, enable_async=enable_async)
+    m.add_provider("lookup", lambda key: lookup(key, latency), connections)
+    m.add_variables("SECTION_0=")
+    m.render_all()
+
+
+def run(count, latency, repeat):
+    """Measure the renders in each mode, return a list of results"""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for index, path in enumerate(flat_tree(directory, count)):
+            # Two templates look up each key
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(f"{{{{ lookup({index // 2}).key }}}}\n")
+        for mode, enable_async, connections in (
+            ("sync", False, None),
+            ("async", True, 4),
+            ("async", True, 16),
+        ):
+            results.append(
+                {
+                    "mode": mode,
+                    "connections": connections,
+                    "time": measure(
+                        lambda options: render(directory, latency, *options),
+                        (enable_async, connections),
+                        repeat,
+                    ),
+                }
+            )
+    return results
+
+
+def main():
+    """Run the benchmark and print the results"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=100, help="number of templates")
+    parser.add_argument("--latency", type=float, default=0.02, help="in seconds")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'connections':>12}{'time (s)':>10}")
+    for result in run(args.count, args.latency, args.repeat):
+        print(
+            f"{result['mode']:<8}{result['connections'] or '':>12}"
+            f"{result['time']:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark of the precompiled template bundles.
+
+Load every template of a generated tree, in a new environment on each run,
+from its source (parsed and compiled) and from a zip or a directory bundle.
+  python -m benchmark.bundle [--count N] [--repeat N]
+"""
+
+import argparse
+import os
+import tempfile
+
+from action.main import Main
+
+from .generators import flat_tree, include_chain, large_loop
+from .suite import measure
+
+# Bundles: (name, compressed), None loading the templates from their source
+BUNDLES = [("source", None), ("zip", True), ("directory", False)]
+
+
+def load_all(directory, names, bundle):
+    """Load and compile each template in a new environment"""
+    m = Main(basepath=directory, keep_template=True, bundle=bundle)
+    for name in names:
+        m.env.get_template(name)
+
+
+def run(count, repeat):
+    """Measure the load of the templates with each bundle, return a list of results"""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        templates = flat_tree(directory, count)
+        templates += include_chain(directory, 10, count // 10)
+        templates.append(large_loop(directory, 100))
+        m = Main(basepath=directory, keep_template=True)
+        names = [m.template_name(template) for template in templates]
+        names += [f"chain/level{level}.txt" for level in range(10)]
+        for name, compress in BUNDLES:
+            bundle = None
+            if compress is not None:
+                bundle = os.path.join(directory, f"bundle.{name}")
+                m.compile_bundle(bundle, compress)
+            results.append(
+                {
+                    "bundle": name,
+                    "templates": len(names),
+                    "time": measure(
+                        lambda bundle: load_all(directory, names, bundle),
+                        bundle,
+                        repeat,
+                    ),
+                }
+            )
+    return results
+
+
+def main():
+    """Run the benchmark and print the results"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=500, help="number of templates")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = run(args.count, args.repeat)
+    source = results[0]["time"]
+    print(f"{'bundle':<12}{'templates':>10}{'time (s)':>10}{'speedup':>9}")
+    for result in results:
+        print(
+            f"{result['bundle']:<12}{result['templates']:>10}"
+            f"{result['time']:>10.3f}{source / result['time']:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
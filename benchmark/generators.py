@@ -0,0 +1,141 @@
+"""
+Generators of the synthetic data and template trees used by the benchmarks.
+All generators are deterministic: the same arguments give the same content.
+"""
+
+import configparser
+import json
+import os
+import random
+
+import yaml
+
+
+def generate_data(size, seed=0):
+    """Generate nested data whose JSON serialization is about size bytes"""
+    rng = random.Random(seed)
+    data = {}
+    length = 0
+    index = 0
+    while length < size:
+        section = {f"KEY_{i}": f"value_{rng.randrange(10**9)}" for i in range(20)}
+        data[f"SECTION_{index}"] = section
+        length += len(json.dumps(section)) + 16
+        index += 1
+    return data
+
+
+def generate_nested(size, depth=6, seed=0, dashed_keys=False, dashed_values=False):
+    """
+    Generate deeply nested data, as a large event payload, whose JSON
+    serialization is about size bytes. Keys and values have dashes if asked.
+    """
+    rng = random.Random(seed)
+    separator = "-" if dashed_keys else "_"
+
+    def value():
+        number = rng.randrange(10**6)
+        return f"2024-01-{number % 28 + 1:02d}" if dashed_values else f"v{number}"
+
+    def node(level):
+        if level == depth:
+            return {f"leaf{separator}{i}": value() for i in range(4)}
+        return {f"node{separator}{i}": node(level + 1) for i in range(2)} | {
+            "items": [value(), {f"item{separator}id": rng.randrange(100)}]
+        }
+
+    data = {}
+    length = 0
+    while length < size:
+        section = node(0)
+        data[f"section{separator}{len(data)}"] = section
+        length += len(json.dumps(section))
+    return data
+
+
+def generate_content(content_format, size, seed=0):
+    """Generate a content of the given format and of about size bytes"""
+    data = generate_data(size, seed)
+    if content_format == "json":
+        return json.dumps(data, indent=1)
+    if content_format in ("yaml", "yml"):
+        return yaml.safe_dump(data)
+    if content_format == "ini":
+        config = configparser.ConfigParser()
+        config.optionxform = str
+        config.read_dict(data)
+        lines = []
+        for section, values in config.items():
+            if section != config.default_section:
+                lines.append(f"[{section}]")
+                lines.extend(f"{key} = {value}" for key, value in values.items())
+        return "\n".join(lines)
+    return "\n".join(
+        f"{section}_{key}={value}"
+        for section, values in data.items()
+        for key, value in values.items()
+    )
+
+
+def write_data_file(directory, content_format, size, seed=0):
+    """Write a data file of the given format and size, return its path"""
+    path = os.path.join(directory, f"data.{content_format}")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(generate_content(content_format, size, seed))
+    return path
+
+
+def _write(directory, name, content):
+    path = os.path.join(directory, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def flat_tree(directory, count, width=10):
+    """
+    Write count templates, spread in sub directories of width templates,
+    each one reading a few variables of the SECTION_0 section of the data.
+    Returns the paths of the templates.
+    """
+    return [
+        _write(
+            directory,
+            f"dir{index // width}/file{index}.txt.j2",
+            f"# file {index}\n"
+            + "".join(
+                f"{{{{ SECTION_0.KEY_{key} }}}} {{{{ {index} * {key} }}}}\n"
+                for key in range(10)
+            ),
+        )
+        for index in range(count)
+    ]
+
+
+def include_chain(directory, depth, count=1):
+    """
+    Write a chain of depth included templates (without the rendering
+    extension, so they are not rendered themselves) and count templates
+    including the head of the chain. Returns the paths of the templates.
+    """
+    for level in range(depth):
+        include = (
+            f'{{% include "chain/level{level + 1}.txt" %}}' if level + 1 < depth else ""
+        )
+        _write(directory, f"chain/level{level}.txt", f"level {level}\n{include}")
+    return [
+        _write(directory, f"chained{index}.txt.j2", '{% include "chain/level0.txt" %}')
+        for index in range(count)
+    ]
+
+
+def large_loop(directory, iterations):
+    """Write a template looping iterations times, return its path"""
+    return _write(
+        directory,
+        "loop.txt.j2",
+        f"{{% for i in range({iterations}) %}}"
+        "{{ i }} {{ SECTION_0.KEY_0 }} {{ loop.index is even }}\n"
+        "{% endfor %}",
+    )
@@ -0,0 +1,100 @@
+"""
+Benchmark of the key normalization policies.
+
+Decode deeply nested payloads with the top level normalization, and with the
+recursive one, applied by the decoders or by a walk of the decoded tree, with
+each json backend and with the yaml loader.
+  python -m benchmark.key_policy [--size MEGABYTES] [--repeat N]
+"""
+
+import argparse
+import json
+from contextlib import nullcontext
+from unittest.mock import patch
+
+import yaml
+
+from action.parser import Parser, json_loads, normalize_keys
+
+from .generators import generate_nested
+from .suite import measure
+
+# Payloads: (name, dashed keys, dashed values)
+PAYLOADS = [
+    ("plain", False, False),
+    ("dashed_values", False, True),
+    ("dashed_keys", True, True),
+]
+
+
+def methods(parse):
+    """Normalizations of a content parsed by parse(content, key_policy)"""
+    return [
+        ("top", lambda content: parse(content, "top")),
+        ("recursive", lambda content: parse(content, "recursive")),
+        ("walk", lambda content: normalize_keys(parse(content, "none"), "recursive")),
+    ]
+
+
+def backends():
+    """Decoders by name: list of (name, parse, size ratio, without orjson)"""
+    return [
+        ("json", json_loads, 1, False),
+        ("json (stdlib)", json_loads, 1, True),
+        # The yaml loader being much slower, its payloads are smaller
+        ("yaml", Parser._parse_yaml, 1 / 8, False),  # pylint: disable=W0212
+    ]
+
+
+def run(size, repeat):
+    """Measure each policy on each payload and backend, return a list of results"""
+    results = []
+    for payload, dashed_keys, dashed_values in PAYLOADS:
+        data = generate_nested(
+            size, dashed_keys=dashed_keys, dashed_values=dashed_values
+        )
+        for backend, parse, ratio, without_orjson in backends():
+            if backend == "yaml":
+                small = generate_nested(
+                    size * ratio, dashed_keys=dashed_keys, dashed_values=dashed_values
+                )
+                content = yaml.safe_dump(small)
+            else:
+                content = json.dumps(data).encode("utf-8")
+            with (
+                patch("action.parser._orjson", return_value=None)
+                if without_orjson
+                else nullcontext()
+            ):
+                for method, function in methods(parse):
+                    results.append(
+                        {
+                            "payload": payload,
+                            "backend": backend,
+                            "method": method,
+                            "size": len(content),
+                            "time": measure(function, content, repeat),
+                        }
+                    )
+    return results
+
+
+def main():
+    """Run the benchmark and print the results"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=float, default=4, help="payload size in MB")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'payload':<15}{'backend':<15}{'method':<11}{'size (MB)':>10}{'time (s)':>10}"
+    )
+    for result in run(int(args.size * 1024 * 1024), args.repeat):
+        print(
+            f"{result['payload']:<15}{result['backend']:<15}{result['method']:<11}"
+            f"{result['size'] / 1024 / 1024:>10.1f}{result['time']:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark of the lazy loading of the context sections.
+
+Render a template reading one of several large json sections, loading every
+section first (as before) or only the section read by the template. No data
+file nor url is declared: they would be loaded by any read variable.
+  python -m benchmark.lazy_context [--size MEGABYTES] [--sections N]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from action.main import Main
+
+from .generators import generate_data
+
+
+def render(directory, sections, eager):
+    """Render the template, return the elapsed time and the memory peak"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    m = Main(basepath=directory, keep_template=True)
+    for index in range(sections):
+        m.add_json_file(f"section{index}", os.path.join(directory, f"{index}.json"))
+    if eager:
+        m.data.load_all()
+    m.render_all()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def run(size, sections):
+    """Measure both loadings, return a list of results"""
+    directory = tempfile.mkdtemp()
+    try:
+        for index in range(sections):
+            with open(
+                os.path.join(directory, f"{index}.json"), "w", encoding="utf-8"
+            ) as f:
+                json.dump(generate_data(size, seed=index), f)
+        with open(os.path.join(directory, "out.txt.j2"), "w", encoding="utf-8") as f:
+            f.write("{{ section0.SECTION_0.KEY_0 }}")
+        results = []
+        for name, eager in (("eager", True), ("lazy", False)):
+            elapsed, peak = render(directory, sections, eager)
+            results.append({"loading": name, "time": elapsed, "peak": peak})
+        return results
+    finally:
+        shutil.rmtree(directory)
+
+
+def main():
+    """Run the benchmark and print the results"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=float, default=4, help="section size in MB")
+    parser.add_argument("--sections", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'loading':<8}{'time (s)':>10}{'peak (MB)':>12}")
+    for result in run(int(args.size * 1024 * 1024), args.sections):
+        print(
+            f"{result['loading']:<8}{result['time']:>10.3f}"
+            f"{result['peak'] / 1024 / 1024:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
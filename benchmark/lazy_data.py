@@ -0,0 +1,86 @@
+"""
+Benchmark of the lazy data files.
+
+Render a template reading one value of a large json or yaml data file, parsing
+the whole file (as before) or only the value read by the template.
+  python -m benchmark.lazy_data [--size MEGABYTES]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import yaml
+
+from action.main import Main
+
+from .generators import generate_data
+
+
+def render(directory, data_file, lazy):
+    """Render the template, return the elapsed time and the memory peak"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    m = Main(basepath=directory, keep_template=True)
+    m.add_data_file(data_file, lazy=lazy)
+    m.render_all()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def run(size):
+    """Measure both loadings of each format, return a list of results"""
+    directory = tempfile.mkdtemp()
+    try:
+        data = generate_data(size)
+        data_files = {
+            "json": os.path.join(directory, "data.json"),
+            "yaml": os.path.join(directory, "data.yml"),
+        }
+        with open(data_files["json"], "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        with open(data_files["yaml"], "w", encoding="utf-8") as f:
+            yaml.safe_dump(data, f)
+        templates = os.path.join(directory, "templates")
+        os.mkdir(templates)
+        with open(os.path.join(templates, "out.txt.j2"), "w", encoding="utf-8") as f:
+            f.write("{{ SECTION_0.KEY_0 }}")
+        results = []
+        for file_format, data_file in data_files.items():
+            for name, lazy in (("eager", False), ("lazy", True)):
+                elapsed, peak = render(templates, data_file, lazy)
+                results.append(
+                    {
+                        "format": file_format,
+                        "loading": name,
+                        "time": elapsed,
+                        "peak": peak,
+                    }
+                )
+        return results
+    finally:
+        shutil.rmtree(directory)
+
+
+def main():
+    """Run the benchmark and print the results"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=float, default=16, help="data size in MB")
+    args = parser.parse_args()
+
+    print(f"{'format':<8}{'loading':<8}{'time (s)':>10}{'peak (MB)':>12}")
+    for result in run(int(args.size * 1024 * 1024)):
+        print(
+            f"{result['format']:<8}{result['loading']:<8}{result['time']:>10.3f}"
+            f"{result['peak'] / 1024 / 1024:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
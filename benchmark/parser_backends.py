@@ -0,0 +1,71 @@
+"""
+Benchmark of the YAML and JSON backends used by the Parser.
+
+Compare the pure python YAML loader with the libyaml one, and the json
+standard module with the optional orjson backend.
+  python -m benchmark.parser_backends [--size MEGABYTES] [--repeat N]
+"""
+
+import argparse
+import json
+
+import yaml
+
+from .generators import generate_content
+from .suite import measure
+
+
+def backends():
+    """Available backends by format: list of (format, name, function)"""
+    found = [
+        ("yaml", "SafeLoader", lambda c: yaml.load(c, Loader=yaml.SafeLoader)),
+        ("json", "json", json.loads),
+    ]
+    if yaml.__with_libyaml__:
+        found.append(
+            ("yaml", "CSafeLoader", lambda c: yaml.load(c, Loader=yaml.CSafeLoader))
+        )
+    try:
+        import orjson  # pylint: disable=C0415
+    except ImportError:
+        return found
+    found.append(("json", "orjson", orjson.loads))  # pylint: disable=E1101
+    return found
+
+
+def run(size, repeat):
+    """Measure each available backend, return a list of results"""
+    contents = {}
+    results = []
+    for content_format, name, function in backends():
+        if content_format not in contents:
+            contents[content_format] = generate_content(content_format, size)
+        content = contents[content_format]
+        results.append(
+            {
+                "format": content_format,
+                "backend": name,
+                "size": len(content),
+                "time": measure(function, content, repeat),
+            }
+        )
+    return results
+
+
+def main():
+    """Run the benchmark and print the results"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=float, default=4, help="content size in MB")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'format':<8}{'backend':<14}{'size (MB)':>10}{'time (s)':>10}")
+    for result in run(int(args.size * 1024 * 1024), args.repeat):
+        print(
+            f"{result['format']:<8}{result['backend']:<14}"
+            f"{result['size'] / 1024 / 1024:>10.1f}{result['time']:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark of the automatic format detection of Parser._parse_generic.
+
+Compare the single pass detection with the previous cascade, which tried to
+parse the content as INI, then JSON, then ENV and finally YAML.
+  python -m benchmark.parser_detection [--size MEGABYTES] [--repeat N]
+"""
+
+import argparse
+import configparser
+import json
+
+import yaml
+
+from action.parser import Parser
+
+from .generators import generate_content
+from .suite import measure
+
+
+def legacy_parse_generic(content):
+    """Previous implementation of Parser._parse_generic"""
+    try:
+        return Parser._parse_ini(content)  # pylint: disable=W0212
+    except configparser.Error:
+        pass
+    try:
+        return Parser._parse_json(content)  # pylint: disable=W0212
+    except json.JSONDecodeError:
+        pass
+    try:
+        return Parser._parse_env(content)  # pylint: disable=W0212
+    except ValueError:
+        pass
+    try:
+        return Parser._parse_yaml(content)  # pylint: disable=W0212
+    except yaml.YAMLError:
+        pass
+    raise ValueError("File format is not automatically recognized")
+
+
+def run(size, repeat, formats=("ini", "json", "env", "yaml")):
+    """Measure both implementations on each format, return a list of results"""
+    results = []
+    for content_format in formats:
+        content = generate_content(content_format, size)
+        single_pass = Parser._parse_generic  # pylint: disable=W0212
+        assert legacy_parse_generic(content) == single_pass(content)
+        results.append(
+            {
+                "format": content_format,
+                "size": len(content),
+                "cascade": measure(legacy_parse_generic, content, repeat),
+                "single_pass": measure(single_pass, content, repeat),
+            }
+        )
+    return results
+
+
+def main():
+    """Run the benchmark and print the results"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=float, default=4, help="content size in MB")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'format':<8}{'size (MB)':>10}{'cascade (s)':>14}{'single (s)':>14}")
+    for result in run(int(args.size * 1024 * 1024), args.repeat):
+        print(
+            f"{result['format']:<8}{result['size'] / 1024 / 1024:>10.1f}"
+            f"{result['cascade']:>14.3f}{result['single_pass']:>14.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark of the cold start of the action.
+
+Measure the startup cases of the suite, then list the modules whose import
+is the slowest when the cli renders a single template.
+  python -m benchmark.startup [--repeat N] [--top N]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from .suite import ENTRYPOINT, run
+
+
+def import_times(directory):
+    """Cumulative import time of each module imported by a render, in seconds"""
+    with open(os.path.join(directory, "out.txt.j2"), "w", encoding="utf-8") as f:
+        f.write("{{ env.HOME }}")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", ENTRYPOINT, "--keep_template"],
+        check=True,
+        capture_output=True,
+        cwd=directory,
+        text=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        times[module.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def main():
+    """Run the benchmark and print the results"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    print(f"{'case':<28}{'best (s)':>10}{'median (s)':>12}")
+    for name, result in run(args.repeat, pattern="startup/*").items():
+        print(f"{name:<28}{result['best']:>10.4f}{result['median']:>12.4f}")
+
+    directory = tempfile.mkdtemp()
+    try:
+        times = import_times(directory)
+    finally:
+        shutil.rmtree(directory)
+    print(f"\n{'module':<40}{'import (s)':>12}")
+    for module, elapsed in sorted(times.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"{module:<40}{elapsed:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
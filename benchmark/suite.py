@@ -0,0 +1,269 @@
+"""
+Benchmark suite of the render pipeline and of the parsers.
+
+Each case runs on synthetic templates and data generated in a temporary
+directory, without any network access. Results can be saved as a baseline,
+and compared to a baseline to detect the regressions.
+  python -m benchmark.suite [--repeat N] [--scale X] [--filter PATTERN]
+                            [--output FILE] [--compare FILE] [--threshold R]
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import jinja2
+
+from action.main import Main
+from action.parser import FileParser, Parser
+
+from .generators import flat_tree, include_chain, large_loop, write_data_file
+
+VERSION = 1
+# Cli of the action, run as a new process by the startup cases
+ENTRYPOINT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "entrypoint.py"
+)
+# Relative slowdown above which a case is reported as a regression
+DEFAULT_THRESHOLD = 0.25
+
+
+def measure(function, argument, repeat):
+    """Best execution time of function(argument) on repeat runs, in seconds"""
+    return min(measure_all(function, argument, repeat))
+
+
+def measure_all(function, argument, repeat):
+    """Execution times of function(argument) on repeat runs, in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(argument)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _render_all(directory):
+    m = Main(basepath=directory, keep_template=True)
+    m.add_data_file(os.path.join(directory, "data.json"))
+    m.render_all()
+
+
+def _render_file(path):
+    m = Main(basepath=os.path.dirname(path), keep_template=True)
+    m.add_data_file(os.path.join(os.path.dirname(path), "data.json"))
+    m.render_file(path)
+
+
+def render_cases(scale):
+    """
+    Cases of the render pipeline: list of (name, setup, function), setup
+    writing the templates in a directory and returning the function argument
+    """
+
+    def tree(generator, *args):
+        def setup(directory):
+            write_data_file(directory, "json", 64 * 1024)
+            generator(directory, *args)
+            return directory
+
+        return setup
+
+    def single(generator, *args):
+        def setup(directory):
+            write_data_file(directory, "json", 64 * 1024)
+            return generator(directory, *args)
+
+        return setup
+
+    count = max(1, int(200 * scale))
+    return [
+        ("render_all/flat", tree(flat_tree, count), _render_all),
+        (
+            "render_all/include_chain",
+            tree(include_chain, max(1, int(50 * scale)), max(1, int(20 * scale))),
+            _render_all,
+        ),
+        ("render_all/large_loop", tree(large_loop, int(20000 * scale)), _render_all),
+        (
+            "render_file/large_loop",
+            single(large_loop, int(20000 * scale)),
+            _render_file,
+        ),
+    ]
+
+
+def parser_cases(scale):
+    """
+    Cases of the parsers: one for each format of Parser.FORMATS, parsed or
+    read from the parsed data cache
+    """
+
+    def setup(content_format):
+        return lambda directory: write_data_file(
+            directory, content_format, int(1024 * 1024 * scale)
+        )
+
+    def parse(content_format):
+        return lambda path: FileParser(path, content_format).parse()
+
+    def setup_cached(content_format):
+        def setup_file(directory):
+            path = setup(content_format)(directory)
+            parse_cached(content_format)(path)
+            return path
+
+        return setup_file
+
+    def parse_cached(content_format):
+        return lambda path: FileParser(
+            path, content_format, os.path.join(os.path.dirname(path), "cache")
+        ).parse()
+
+    return [
+        (f"parse/{content_format}", setup(content_format), parse(content_format))
+        for content_format in Parser.FORMATS
+    ] + [
+        (
+            f"parse_cached/{content_format}",
+            setup_cached(content_format),
+            parse_cached(content_format),
+        )
+        for content_format in Parser.FORMATS
+    ]
+
+
+def _run_process(command):
+    """Run a command, given as (arguments, working directory)"""
+    arguments, directory = command
+    subprocess.run(arguments, check=True, capture_output=True, cwd=directory)
+
+
+def startup_cases():
+    """
+    Cold start cases: a new python process printing the cli help, or
+    rendering a single template, compared to the startup of python itself
+    """
+
+    def command(*arguments):
+        return lambda directory: ([sys.executable, *arguments], directory)
+
+    def render(data):
+        def setup(directory):
+            with open(
+                os.path.join(directory, "out.txt.j2"), "w", encoding="utf-8"
+            ) as f:
+                f.write("{{ env.HOME }} {{ SECTION_0 is defined }}")
+            arguments = [sys.executable, ENTRYPOINT, "--keep_template"]
+            if data:
+                arguments.append(
+                    f"--data_file={write_data_file(directory, data, 1024)}"
+                )
+            return arguments, directory
+
+        return setup
+
+    return [
+        ("startup/python", command("-c", "pass"), _run_process),
+        ("startup/help", command(ENTRYPOINT, "--help"), _run_process),
+        ("startup/render", render(None), _run_process),
+        ("startup/render_yaml", render("yaml"), _run_process),
+    ]
+
+
+def run(repeat=5, scale=1.0, pattern="*"):
+    """Run the cases matching pattern, return the results by case name"""
+    results = {}
+    cases = render_cases(scale) + parser_cases(scale) + startup_cases()
+    for name, setup, function in cases:
+        if not fnmatch.fnmatchcase(name, pattern):
+            continue
+        directory = tempfile.mkdtemp()
+        try:
+            argument = setup(directory)
+            times = measure_all(function, argument, repeat)
+        finally:
+            shutil.rmtree(directory)
+        results[name] = {"best": min(times), "median": statistics.median(times)}
+    return results
+
+
+def report(results, repeat, scale):
+    """Report of a run, as a json serializable dict"""
+    return {
+        "version": VERSION,
+        "python": platform.python_version(),
+        "jinja2": jinja2.__version__,
+        "repeat": repeat,
+        "scale": scale,
+        "results": results,
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare the best times of the results with a baseline report.
+      Returns:
+        A list of (name, best, baseline best, ratio, regression) for the cases
+        found in both, regression being True when the case is slower than the
+        baseline by more than threshold
+    """
+    comparison = []
+    for name, result in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if reference is None:
+            continue
+        ratio = result["best"] / reference["best"] if reference["best"] else 1.0
+        comparison.append(
+            (name, result["best"], reference["best"], ratio, ratio > 1 + threshold)
+        )
+    return comparison
+
+
+def main():
+    """Run the benchmark suite, print the results and compare them if requested"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="size factor")
+    parser.add_argument("--filter", default="*", help="glob pattern of the cases")
+    parser.add_argument("--output", help="json file where the results are saved")
+    parser.add_argument("--compare", help="json file of the baseline results")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.scale, args.filter)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report(results, args.repeat, args.scale), f, indent=1)
+
+    if not args.compare:
+        print(f"{'case':<28}{'best (s)':>10}{'median (s)':>12}")
+        for name, result in results.items():
+            print(f"{name:<28}{result['best']:>10.4f}{result['median']:>12.4f}")
+        return 0
+
+    with open(args.compare, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("scale") != args.scale:
+        print("Warning: the baseline was run with another scale", file=sys.stderr)
+    print(f"{'case':<28}{'best (s)':>10}{'baseline (s)':>14}{'ratio':>8}")
+    regressions = 0
+    for name, best, reference, ratio, regression in compare(
+        results, baseline, args.threshold
+    ):
+        regressions += regression
+        flag = "  REGRESSION" if regression else ""
+        print(f"{name:<28}{best:>10.4f}{reference:>14.4f}{ratio:>8.2f}{flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,54 +3,260 @@ CLI Entrypoint
 """
 
 import os
-from pathlib import Path
 
 import click
 
-from action.main import Main
+from action.main import DEFAULT_MAX_CONNECTIONS, Main
+from action.matrix import DEFAULT_OUTPUT, load_matrix
+from action.parser import KEY_POLICIES, UrlParser
+from action.sandbox import BudgetExceeded
+from action.watcher import DEFAULT_INTERVAL
 
 
-@click.command()
+def url_sources(urls, formats):
+    """
+    Pair each url with its format.
+    A single format applies to all the urls, otherwise the formats are given
+    in the order of the urls. The `automatic` format means detection.
+    """
+    if len(formats) == 1:
+        formats = formats * len(urls)
+    elif not formats:
+        formats = [None] * len(urls)
+    elif len(formats) != len(urls):
+        raise click.BadParameter(
+            "give either one format for all urls or one format by url",
+            param_hint="--data_url_format",
+        )
+    return [
+        (url, None if data_format in (None, "automatic") else data_format)
+        for url, data_format in zip(urls, formats)
+    ]
+
+
+def watch_templates(m, interval):
+    """Render the templates again on each change, until interrupted"""
+    try:
+        for changed, result in m.watch(interval):
+            if changed:
+                click.echo(f"Changed: {', '.join(changed)}")
+            if isinstance(result, Exception):
+                click.echo(f"Error: {result}", err=True)
+            else:
+                click.echo(
+                    f"Rendered files: {result['changed']} changed, "
+                    f"{result['unchanged']} unchanged, {result['skipped']} skipped"
+                )
+    except KeyboardInterrupt:
+        pass
+
+
+@click.group(invoke_without_command=True)
 @click.option("--keep_template", is_flag=True)
 @click.option("--var_file", default=None)
 @click.option("--context", multiple=True, default=[])
 @click.option("--data_file", default=None)
 @click.option("--data_format", default=None)
-@click.option("--data_url", default=None)
-@click.option("--data_url_format", default=None)
+@click.option("--data_file_lazy", is_flag=True)
+@click.option("--data_url", multiple=True, default=[])
+@click.option("--data_url_format", multiple=True, default=[])
+@click.option("--data_url_provider", default=None)
+@click.option("--data_url_ttl", type=click.IntRange(min=0), default=None)
+@click.option(
+    "--data_url_timeout",
+    type=click.IntRange(min=1),
+    default=UrlParser.DEFAULT_TIMEOUT,
+)
+@click.option(
+    "--data_url_retries",
+    type=click.IntRange(min=0),
+    default=UrlParser.DEFAULT_RETRIES,
+)
+@click.option(
+    "--data_url_connections",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_CONNECTIONS,
+)
 @click.option("--undefined_behaviour", default="Undefined")
-def main(  # pylint: disable=R0913
+@click.option("--key_policy", type=click.Choice(KEY_POLICIES), default="top")
+@click.option("--jobs", type=click.IntRange(min=0), default=1)
+@click.option("--cache_dir", default=None)
+@click.option("--cache_max_size", type=click.IntRange(min=0), default=100)
+@click.option("--manifest", default=None)
+@click.option("--include", multiple=True, default=[])
+@click.option("--exclude", multiple=True, default=[])
+@click.option("--gitignore", is_flag=True)
+@click.option("--stream", is_flag=True)
+@click.option("--profile", default=None)
+@click.option("--plan", is_flag=True)
+@click.option("--graph", default=None)
+@click.option("--profile_top", type=click.IntRange(min=0), default=10)
+@click.option("--matrix", default=None)
+@click.option("--matrix_output", default=DEFAULT_OUTPUT)
+@click.option("--watch", is_flag=True)
+@click.option(
+    "--watch_interval", type=click.FloatRange(min=0.01), default=DEFAULT_INTERVAL
+)
+@click.option("--bundle", default=None)
+@click.option("--sandbox", is_flag=True)
+@click.option("--max_time", type=click.FloatRange(min=0, min_open=True), default=None)
+@click.option("--max_output", type=click.IntRange(min=1), default=None)
+@click.option("--max_loop", type=click.IntRange(min=1), default=None)
+@click.option("--enable_async", is_flag=True)
+@click.option("--github_output", default=None)
+@click.pass_context
+def main(  # pylint: disable=R0912,R0913,R0914
+    ctx,
     keep_template,
     var_file,
     context,
     data_file,
     data_format,
+    data_file_lazy,
     data_url,
     data_url_format,
+    data_url_provider,
+    data_url_ttl,
+    data_url_timeout,
+    data_url_retries,
+    data_url_connections,
     undefined_behaviour,
+    key_policy,
+    jobs,
+    cache_dir,
+    cache_max_size,
+    manifest,
+    include,
+    exclude,
+    gitignore,
+    stream,
+    profile,
+    profile_top,
+    plan,
+    graph,
+    matrix,
+    matrix_output,
+    watch,
+    watch_interval,
+    bundle,
+    sandbox,
+    max_time,
+    max_output,
+    max_loop,
+    enable_async,
+    github_output,
 ):
-    """Main CLI Method"""
-    m = Main(keep_template=keep_template, undefined=undefined_behaviour)
+    """Main CLI Method: render the templates, unless a command is given"""
+    if ctx.invoked_subcommand:
+        # Options of the templates environment, shared with the commands
+        ctx.obj = {
+            "undefined": undefined_behaviour,
+            "include": include,
+            "exclude": exclude,
+            "gitignore": gitignore,
+            "sandbox": sandbox,
+            "enable_async": enable_async,
+        }
+        return
+    sources = url_sources(data_url, data_url_format)
+    if matrix and manifest:
+        raise click.UsageError("--manifest can not be used with --matrix")
+    if matrix and watch:
+        raise click.UsageError("--watch can not be used with --matrix")
+    if not sandbox and (max_time or max_output or max_loop):
+        raise click.UsageError("--max_time, --max_output and --max_loop need --sandbox")
+    if enable_async and (sandbox or stream):
+        raise click.UsageError(
+            "--enable_async can not be used with --sandbox nor --stream"
+        )
+    m = Main(
+        # Watched templates are rendered again: they must be kept
+        keep_template=keep_template or watch,
+        undefined=undefined_behaviour,
+        jobs=jobs,
+        cache_dir=cache_dir,
+        cache_max_size=cache_max_size * 1024 * 1024,
+        manifest=manifest,
+        include=include,
+        exclude=exclude,
+        gitignore=gitignore,
+        stream=stream,
+        profile=bool(profile),
+        plan=plan,
+        graph_file=graph,
+        key_policy=key_policy,
+        bundle=bundle,
+        sandbox=sandbox,
+        max_time=max_time,
+        max_output=max_output * 1024 * 1024 if max_output else None,
+        max_loop=max_loop,
+        enable_async=enable_async,
+    )
 
     if var_file:
         with open(var_file, encoding="utf-8") as f:
             variables = f.read()
         m.add_variables(variables)
 
-    for context_file in context:
-        section = Path(os.path.basename(context_file)).stem
-        with open(context_file, encoding="utf-8") as f:
-            content = f.read()
-        if content not in ("", "null\n"):
-            m.add_json_section(section, content)
+    if context:
+        m.add_json_files(context)
 
     if data_file:
-        m.add_data_file(data_file, data_format)
+        m.add_data_file(data_file, data_format, lazy=data_file_lazy)
+
+    if sources:
+        m.add_data_urls(
+            sources,
+            ttl=data_url_ttl,
+            timeout=data_url_timeout,
+            retries=data_url_retries,
+            max_connections=data_url_connections,
+        )
+
+    if data_url_provider:
+        m.add_data_url_provider(
+            data_url_provider,
+            ttl=data_url_ttl,
+            timeout=data_url_timeout,
+            retries=data_url_retries,
+            max_connections=data_url_connections,
+        )
+
+    if watch:
+        watch_templates(m, watch_interval)
+        return
+    try:
+        if matrix:
+            data_cache_dir = os.path.join(cache_dir, "data") if cache_dir else None
+            contexts = load_matrix(
+                matrix, cache_dir=data_cache_dir, key_policy=key_policy
+            )
+            counts = m.render_matrix(contexts, matrix_output)
+        else:
+            counts = m.render_all()
+    except BudgetExceeded as e:
+        raise click.ClickException(str(e)) from e
+    click.echo(
+        f"Rendered files: {counts['changed']} changed, "
+        f"{counts['unchanged']} unchanged, {counts['skipped']} skipped"
+    )
+    if profile:
+        click.echo(m.profiler.summary(profile_top))
+        m.profiler.save(profile)
+    if github_output:
+        with open(github_output, "a", encoding="utf-8") as f:
+            for status in ("changed", "unchanged", "skipped"):
+                f.write(f"{status}={counts[status]}\n")
 
-    if data_url:
-        m.add_data_url(data_url, data_url_format)
 
-    m.render_all()
+@main.command("compile")
+@click.argument("target")
+@click.option("--directory", is_flag=True)
+@click.pass_obj
+def compile_bundle(options, target, directory):
+    """Compile the templates in a bundle, a zip file or a directory"""
+    count = Main(**options).compile_bundle(target, compress=not directory)
+    click.echo(f"Compiled templates: {count}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,41 @@
+"""UnitTest of the benchmark suite"""
+
+import unittest
+
+from benchmark.suite import compare, run
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    """
+    benchmark/suite.py Unit Test.
+    The cases are run at a tiny scale, only to check that they still work.
+    """
+
+    def test_run(self):
+        """
+        benchmark.suite.run unittest: every case matching the filter is run.
+        """
+        results = run(repeat=1, scale=0.01)
+        self.assertIn("render_all/include_chain", results)
+        self.assertIn("parse/yaml", results)
+        for result in results.values():
+            self.assertLessEqual(result["best"], result["median"])
+
+        results = run(repeat=1, scale=0.01, pattern="parse/*")
+        self.assertTrue(all(name.startswith("parse/") for name in results))
+
+    def test_compare(self):
+        """
+        benchmark.suite.compare unittest: cases slower than the baseline by
+        more than the threshold are regressions, unknown cases are ignored.
+        """
+        baseline = {"results": {"fast": {"best": 1.0}, "slow": {"best": 1.0}}}
+        results = {
+            "fast": {"best": 1.1},
+            "slow": {"best": 1.5},
+            "new": {"best": 1.0},
+        }
+        self.assertEqual(
+            compare(results, baseline, threshold=0.25),
+            [("fast", 1.1, 1.0, 1.1, False), ("slow", 1.5, 1.0, 1.5, True)],
+        )
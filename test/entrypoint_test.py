@@ -2,11 +2,12 @@
 
 import os
 import unittest
-from unittest.mock import call, patch
+from unittest.mock import MagicMock, call, patch
 
 from click.testing import CliRunner
 from parameterized import parameterized
 
+from action.sandbox import BudgetExceeded
 from entrypoint import main
 
 
@@ -52,6 +53,347 @@ class TestEntrypoint(unittest.TestCase):
         runner.invoke(main)
         self.assertEqual("Undefined", main_class_mock.call_args.kwargs.get("undefined"))
 
+    @patch("entrypoint.Main", spec=True)
+    def test_main_key_policy(self, main_class_mock):
+        """
+        entrypoint.main unittest: If key_policy option is used on the cli,
+        main class must be initialized with the given policy, if not the
+        'top' policy is used. An unknown policy is rejected.
+        """
+        runner = CliRunner()
+        runner.invoke(main, ["--key_policy=recursive"])
+        self.assertEqual(
+            "recursive", main_class_mock.call_args.kwargs.get("key_policy")
+        )
+
+        runner.invoke(main)
+        self.assertEqual("top", main_class_mock.call_args.kwargs.get("key_policy"))
+
+        main_class_mock.reset_mock()
+        result = runner.invoke(main, ["--key_policy=strange"])
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertFalse(main_class_mock.called)
+
+    @patch("entrypoint.Main", spec=True)
+    def test_main_jobs(self, main_class_mock):
+        """
+        entrypoint.main unittest: If jobs option is used on the cli,
+        main class must be initialized with the given number of jobs, if not
+        only one job is used.
+        """
+        # Call the Method with jobs
+        runner = CliRunner()
+        runner.invoke(main, ["--jobs=4"])
+
+        self.assertEqual(4, main_class_mock.call_args.kwargs.get("jobs"))
+
+        # Call the Method without jobs
+        runner.invoke(main)
+        self.assertEqual(1, main_class_mock.call_args.kwargs.get("jobs"))
+
+    @patch("entrypoint.Main", spec=True)
+    def test_main_cache_dir(self, main_class_mock):
+        """
+        entrypoint.main unittest: If cache_dir option is used on the cli,
+        main class must be initialized with the given cache directory and
+        the maximum size converted in bytes, if not no cache is used.
+        """
+        runner = CliRunner()
+        runner.invoke(main, ["--cache_dir=my_cache", "--cache_max_size=2"])
+
+        self.assertEqual("my_cache", main_class_mock.call_args.kwargs.get("cache_dir"))
+        self.assertEqual(
+            2 * 1024 * 1024, main_class_mock.call_args.kwargs.get("cache_max_size")
+        )
+
+        runner.invoke(main)
+        self.assertIsNone(main_class_mock.call_args.kwargs.get("cache_dir"))
+
+    @patch("entrypoint.Main", spec=True)
+    def test_main_manifest(self, main_class_mock):
+        """
+        entrypoint.main unittest: If manifest option is used on the cli,
+        main class must be initialized with the given manifest, if not
+        no manifest is used.
+        """
+        runner = CliRunner()
+        runner.invoke(main, ["--manifest=manifest.json"])
+
+        self.assertEqual(
+            "manifest.json", main_class_mock.call_args.kwargs.get("manifest")
+        )
+
+        runner.invoke(main)
+        self.assertIsNone(main_class_mock.call_args.kwargs.get("manifest"))
+
+    @patch("entrypoint.Main", spec=True)
+    def test_main_include_exclude(self, main_class_mock):
+        """
+        entrypoint.main unittest: If include, exclude and gitignore options are used
+        on the cli, main class must be initialized with the given patterns.
+        """
+        runner = CliRunner()
+        runner.invoke(
+            main,
+            ["--include=*.j2", "--include=a/*", "--exclude=build/", "--gitignore"],
+        )
+
+        kwargs = main_class_mock.call_args.kwargs
+        self.assertEqual(("*.j2", "a/*"), kwargs.get("include"))
+        self.assertEqual(("build/",), kwargs.get("exclude"))
+        self.assertTrue(kwargs.get("gitignore"))
+
+        runner.invoke(main)
+        kwargs = main_class_mock.call_args.kwargs
+        self.assertEqual((), kwargs.get("include"))
+        self.assertEqual((), kwargs.get("exclude"))
+        self.assertFalse(kwargs.get("gitignore"))
+
+    @patch("entrypoint.Main", spec=True)
+    def test_main_stream(self, main_class_mock):
+        """
+        entrypoint.main unittest: If stream option is used on the cli,
+        main class must be initialized with the stream property to true.
+        """
+        runner = CliRunner()
+        runner.invoke(main, ["--stream"])
+        self.assertTrue(main_class_mock.call_args.kwargs.get("stream"))
+
+        runner.invoke(main)
+        self.assertFalse(main_class_mock.call_args.kwargs.get("stream"))
+
+    @patch("entrypoint.Main", spec=True)
+    def test_main_plan_graph(self, main_class_mock):
+        """
+        entrypoint.main unittest: If plan and graph options are used on the cli,
+        main class must be initialized with the plan and the graph file.
+        """
+        runner = CliRunner()
+        runner.invoke(main, ["--plan", "--graph=graph.json"])
+        self.assertTrue(main_class_mock.call_args.kwargs.get("plan"))
+        self.assertEqual(
+            main_class_mock.call_args.kwargs.get("graph_file"), "graph.json"
+        )
+
+        runner.invoke(main)
+        self.assertFalse(main_class_mock.call_args.kwargs.get("plan"))
+        self.assertIsNone(main_class_mock.call_args.kwargs.get("graph_file"))
+
+    @patch("entrypoint.Main", spec=True)
+    def test_main_bundle(self, main_class_mock):
+        """
+        entrypoint.main unittest: If bundle option is used on the cli,
+        main class must be initialized with the bundle.
+        """
+        runner = CliRunner()
+        runner.invoke(main, ["--bundle=templates.zip"])
+        self.assertEqual(
+            main_class_mock.call_args.kwargs.get("bundle"), "templates.zip"
+        )
+
+        runner.invoke(main)
+        self.assertIsNone(main_class_mock.call_args.kwargs.get("bundle"))
+
+    @patch("entrypoint.Main", spec=True)
+    def test_main_sandbox(self, main_class_mock):
+        """
+        entrypoint.main unittest: If sandbox and budget options are used on the
+        cli, main class must be initialized with them, the output size being
+        converted to characters. A template exceeding a budget is reported.
+        """
+        mock_instance = main_class_mock.return_value
+        mock_instance.render_all.side_effect = BudgetExceeded("Template a aborted")
+        runner = CliRunner()
+        result = runner.invoke(
+            main, ["--sandbox", "--max_time=1.5", "--max_output=2", "--max_loop=10"]
+        )
+        kwargs = main_class_mock.call_args.kwargs
+        self.assertTrue(kwargs.get("sandbox"))
+        self.assertEqual(kwargs.get("max_time"), 1.5)
+        self.assertEqual(kwargs.get("max_output"), 2 * 1024 * 1024)
+        self.assertEqual(kwargs.get("max_loop"), 10)
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("Error: Template a aborted", result.output)
+
+        result = runner.invoke(main, ["--max_loop=10"])
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn("need --sandbox", result.output)
+
+        runner.invoke(main)
+        self.assertFalse(main_class_mock.call_args.kwargs.get("sandbox"))
+        self.assertIsNone(main_class_mock.call_args.kwargs.get("max_output"))
+
+    @patch("entrypoint.Main", spec=True)
+    def test_main_async(self, main_class_mock):
+        """
+        entrypoint.main unittest: If enable_async option is used on the cli,
+        main class must be initialized with it, and the url provider is added
+        with the data_url options. The async mode does not support the sandbox
+        nor the stream modes.
+        """
+        mock_instance = main_class_mock.return_value
+        runner = CliRunner()
+        result = runner.invoke(
+            main,
+            [
+                "--enable_async",
+                "--data_url_provider=fetch",
+                "--data_url_ttl=60",
+                "--data_url_connections=4",
+            ],
+        )
+        self.assertEqual(result.exit_code, 0)
+        self.assertTrue(main_class_mock.call_args.kwargs.get("enable_async"))
+        mock_instance.add_data_url_provider.assert_called_once_with(
+            "fetch",
+            ttl=60,
+            timeout=30,
+            retries=2,
+            max_connections=4,
+        )
+
+        for option in ("--sandbox", "--stream"):
+            result = runner.invoke(main, ["--enable_async", option])
+            self.assertNotEqual(result.exit_code, 0)
+            self.assertIn("can not be used with --sandbox nor --stream", result.output)
+
+        mock_instance.reset_mock()
+        runner.invoke(main)
+        self.assertFalse(main_class_mock.call_args.kwargs.get("enable_async"))
+        mock_instance.add_data_url_provider.assert_not_called()
+
+    @patch("entrypoint.Main", spec=True)
+    def test_compile(self, main_class_mock):
+        """
+        entrypoint.compile unittest: the templates selected by the options of
+        the cli are compiled in the bundle, without being rendered.
+        """
+        mock_instance = main_class_mock.return_value
+        mock_instance.compile_bundle.return_value = 3
+        runner = CliRunner()
+        result = runner.invoke(main, ["--exclude=base/*", "compile", "templates.zip"])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(main_class_mock.call_args.kwargs.get("exclude"), ("base/*",))
+        mock_instance.compile_bundle.assert_called_once_with(
+            "templates.zip", compress=True
+        )
+        mock_instance.render_all.assert_not_called()
+        self.assertIn("Compiled templates: 3", result.output)
+
+        runner.invoke(main, ["--sandbox", "compile", "--directory", "templates"])
+        mock_instance.compile_bundle.assert_called_with("templates", compress=False)
+        self.assertTrue(main_class_mock.call_args.kwargs.get("sandbox"))
+
+    @patch("entrypoint.load_matrix")
+    @patch("entrypoint.Main", spec=True)
+    def test_main_matrix(self, main_class_mock, load_matrix_mock):
+        """
+        entrypoint.main unittest: If matrix option is used on the cli, the
+        files are rendered once by context of the matrix, in the given output.
+        """
+        mock_instance = main_class_mock.return_value
+        mock_instance.render_matrix.return_value = {
+            "changed": 2,
+            "unchanged": 0,
+            "skipped": 0,
+        }
+        runner = CliRunner()
+        result = runner.invoke(
+            main, ["--matrix=matrix.yml", "--matrix_output={{ name }}.txt"]
+        )
+
+        load_matrix_mock.assert_called_once_with(
+            "matrix.yml", cache_dir=None, key_policy="top"
+        )
+        mock_instance.render_matrix.assert_called_once_with(
+            load_matrix_mock.return_value, "{{ name }}.txt"
+        )
+        mock_instance.render_all.assert_not_called()
+        self.assertIn("2 changed", result.output)
+
+        result = runner.invoke(main, ["--matrix=matrix.yml", "--manifest=m.json"])
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn("--manifest can not be used with --matrix", result.output)
+
+    @patch("entrypoint.Main", spec=True)
+    def test_main_watch(self, main_class_mock):
+        """
+        entrypoint.main unittest: If watch option is used on the cli, the
+        templates are kept and the result of each render is printed.
+        """
+        mock_instance = main_class_mock.return_value
+        mock_instance.watch.return_value = iter(
+            [
+                (None, {"changed": 2, "unchanged": 0, "skipped": 0}),
+                (["page.j2"], ValueError("boom")),
+            ]
+        )
+        runner = CliRunner()
+        result = runner.invoke(main, ["--watch", "--watch_interval=0.1"])
+
+        self.assertTrue(main_class_mock.call_args.kwargs.get("keep_template"))
+        mock_instance.watch.assert_called_once_with(0.1)
+        mock_instance.render_all.assert_not_called()
+        self.assertIn("2 changed", result.output)
+        self.assertIn("Changed: page.j2", result.output)
+        self.assertIn("Error: boom", result.output)
+
+    @patch("entrypoint.Main", spec=True)
+    def test_main_data_file_lazy(self, main_class_mock):
+        """
+        entrypoint.main unittest: If data_file_lazy option is used, the data
+        file is added as a lazy source.
+        """
+        runner = CliRunner()
+        runner.invoke(main, ["--data_file=my_file.json", "--data_file_lazy"])
+        main_class_mock.return_value.add_data_file.assert_called_with(
+            "my_file.json", None, lazy=True
+        )
+
+    @patch("entrypoint.Main", spec=True)
+    def test_main_github_output(self, main_class_mock):
+        """
+        entrypoint.main unittest: Counts of rendered files are printed and,
+        if github_output option is used, written in the given file.
+        """
+        mock_instance = main_class_mock.return_value
+        mock_instance.render_all.return_value = {
+            "changed": 1,
+            "unchanged": 2,
+            "skipped": 3,
+        }
+
+        runner = CliRunner()
+        result = runner.invoke(main, ["--github_output=output.txt"])
+
+        self.assertIn("1 changed, 2 unchanged, 3 skipped", result.output)
+        with open("output.txt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "changed=1\nunchanged=2\nskipped=3\n")
+        os.remove("output.txt")
+
+    @patch("entrypoint.Main", spec=True)
+    def test_main_profile(self, main_class_mock):
+        """
+        entrypoint.main unittest: If profile option is used, main class is
+        initialized with profiling, then the summary is printed and the report
+        written in the given file.
+        """
+        mock_instance = main_class_mock.return_value
+        mock_instance.profiler = MagicMock()
+        mock_instance.profiler.summary.return_value = "my summary"
+
+        runner = CliRunner()
+        result = runner.invoke(main, ["--profile=profile.json", "--profile_top=3"])
+
+        self.assertTrue(main_class_mock.call_args.kwargs.get("profile"))
+        self.assertIn("my summary", result.output)
+        mock_instance.profiler.summary.assert_called_with(3)
+        mock_instance.profiler.save.assert_called_with("profile.json")
+
+        runner.invoke(main)
+        self.assertFalse(main_class_mock.call_args.kwargs.get("profile"))
+
     @patch("entrypoint.Main", spec=True)
     def test_main_en_var(self, main_class_mock):
         """
@@ -88,95 +430,51 @@ class TestEntrypoint(unittest.TestCase):
     @patch("entrypoint.Main", spec=True)
     def test_main_context_one(self, main_class_mock):
         """
-        entrypoint.main unittest: If one context file is given add_json_section
-        method is called with its content for the context defiend by the name of the file.
+        entrypoint.main unittest: If one context file is given add_json_files
+        method is called with its path, the section being named by Main.
         """
         # Get the mock instance for main_class_mock
         mock_instance = main_class_mock.return_value
-        # Add Some Content in a context file
-        with open("my_context.txt", "w", encoding="utf-8") as out:
-            out.write("test_content")
-            out.flush()
 
         # Call the Method (click)
         runner = CliRunner()
-        runner.invoke(main, ["--context=my_context.txt"])
+        runner.invoke(main, ["--context=dir/my_context.txt"])
 
-        mock_instance.add_json_section.assert_called_with("my_context", "test_content")
+        mock_instance.add_json_files.assert_called_with(("dir/my_context.txt",))
         self.assertTrue(mock_instance.render_all.called, "render_all is called")
 
         # Remove the previous env var
-        mock_instance.add_json_section.reset_mock()
-        os.remove("my_context.txt")
+        mock_instance.add_json_files.reset_mock()
 
         # Call the Method (click)
         runner = CliRunner()
         runner.invoke(main)
 
-        self.assertTrue(
-            call("my_context", "test_content")
-            not in mock_instance.add_json_section.mock_calls,
-            "add_json_section is not called for the previous context",
+        self.assertFalse(
+            mock_instance.add_json_files.called,
+            "add_json_files is not called for the previous context",
         )
         self.assertTrue(mock_instance.render_all.called, "render_all is called")
 
-    @parameterized.expand([(""), ("none\n")])
-    @patch("entrypoint.Main", spec=True)
-    def test_main_context_null(self, content, main_class_mock):
-        """
-        entrypoint.main unittest: If context file content is empty or
-        contains "null\n",add_json_section method is NOT called.
-        """
-        # Get the mock instance for main_class_mock
-        mock_instance = main_class_mock.return_value
-        # Add Some Content in a context file
-        with open("my_context.txt", "w", encoding="utf-8") as out:
-            out.write(content)
-            out.flush()
-
-        # Call the Method (click)
-        runner = CliRunner()
-        runner.invoke(main, ["--context=my_context.txt"])
-
-        self.assertTrue(
-            call("my_context", "test_content")
-            not in mock_instance.add_json_section.mock_calls,
-            "add_json_section is not called for the previous context",
-        )
-        self.assertTrue(mock_instance.render_all.called, "render_all is called")
-
-        # Remove the file
-        os.remove("my_context.txt")
-
     @patch("entrypoint.Main", spec=True)
     def test_main_context_multiple(self, main_class_mock):
         """
-        entrypoint.main unittest: If multiple context file is given add_json_section method is
-        called with each file content for the each context defined by the name of each file.
+        entrypoint.main unittest: If multiple context file is given add_json_files
+        method is called once with all the file paths, to load them in one pass.
         """
         # Get the mock instance for main_class_mock
         mock_instance = main_class_mock.return_value
-        # Add Some Content in a context file
-        with open("my_context1.txt", "w", encoding="utf-8") as out:
-            out.write("this is")
-            out.flush()
-        with open("my_context2.txt", "w", encoding="utf-8") as out:
-            out.write("so funny")
-            out.flush()
 
         # Call the Method (click)
         runner = CliRunner()
         runner.invoke(main, ["--context=my_context1.txt", "--context=my_context2.txt"])
 
         # Test
-        calls = [call("my_context1", "this is"), call("my_context2", "so funny")]
-        mock_instance.add_json_section.assert_has_calls(calls, any_order=True)
+        mock_instance.add_json_files.assert_called_once_with(
+            ("my_context1.txt", "my_context2.txt")
+        )
         self.assertTrue(mock_instance.render_all.called, "render_all is called")
 
-        # Clean
-        os.remove("my_context1.txt")
-        os.remove("my_context2.txt")
-
     @patch("entrypoint.Main", spec=True)
     def test_main_data_file_no_format(self, main_class_mock):
         """
@@ -190,7 +488,7 @@ class TestEntrypoint(unittest.TestCase):
         runner = CliRunner()
         runner.invoke(main, ["--data_file=my_file.json"])
 
-        mock_instance.add_data_file.assert_called_with("my_file.json", None)
+        mock_instance.add_data_file.assert_called_with("my_file.json", None, lazy=False)
         self.assertTrue(mock_instance.render_all.called, "render_all is called")
 
         # Remove the previous env var
@@ -201,7 +499,8 @@ class TestEntrypoint(unittest.TestCase):
         runner.invoke(main)
 
         self.assertTrue(
-            call("my_file.json", None) not in mock_instance.add_data_file.mock_calls,
+            call("my_file.json", None, lazy=False)
+            not in mock_instance.add_data_file.mock_calls,
             "add_data_file is not called for the previous context",
         )
         self.assertTrue(mock_instance.render_all.called, "render_all is called")
@@ -219,7 +518,9 @@ class TestEntrypoint(unittest.TestCase):
         runner = CliRunner()
         runner.invoke(main, ["--data_file=my_file.json", "--data_format=my_format"])
 
-        mock_instance.add_data_file.assert_called_with("my_file.json", "my_format")
+        mock_instance.add_data_file.assert_called_with(
+            "my_file.json", "my_format", lazy=False
+        )
         self.assertTrue(mock_instance.render_all.called, "render_all is called")
 
         # Remove the previous env var
@@ -230,7 +531,7 @@ class TestEntrypoint(unittest.TestCase):
         runner.invoke(main)
 
         self.assertTrue(
-            call("my_file.json", "my_format")
+            call("my_file.json", "my_format", lazy=False)
             not in mock_instance.add_data_file.mock_calls,
             "add_data_file is not called for the previous context",
         )
@@ -240,7 +541,7 @@ class TestEntrypoint(unittest.TestCase):
     def test_main_url_file_no_format(self, main_class_mock):
         """
         entrypoint.main unittest: If data_url parameter is defined,
-        add_data_url method is called with the url.
+        add_data_urls method is called with the url.
         """
         # Get the mock instance for main_class_mock
         mock_instance = main_class_mock.return_value
@@ -249,19 +550,21 @@ class TestEntrypoint(unittest.TestCase):
         runner = CliRunner()
         runner.invoke(main, ["--data_url=my_url"])
 
-        mock_instance.add_data_url.assert_called_with("my_url", None)
+        mock_instance.add_data_urls.assert_called_with(
+            [("my_url", None)], ttl=None, timeout=30, retries=2, max_connections=4
+        )
         self.assertTrue(mock_instance.render_all.called, "render_all is called")
 
         # Remove the previous env var
-        mock_instance.add_data_url.reset_mock()
+        mock_instance.add_data_urls.reset_mock()
 
         # Call the Method (click)
         runner = CliRunner()
         runner.invoke(main)
 
-        self.assertTrue(
-            call("my_url", None) not in mock_instance.add_data_url.mock_calls,
-            "add_data_url is not called for the previous context",
+        self.assertFalse(
+            mock_instance.add_data_urls.called,
+            "add_data_urls is not called for the previous context",
         )
         self.assertTrue(mock_instance.render_all.called, "render_all is called")
 
@@ -269,7 +572,7 @@ class TestEntrypoint(unittest.TestCase):
     def test_main_urlfile_with_format(self, main_class_mock):
         """
         entrypoint.main unittest: If data_url parameter and data_url_format
-        are defined, add_data_url method is called with the url and the format.
+        are defined, add_data_urls method is called with the url and the format.
         """
         # Get the mock instance for main_class_mock
         mock_instance = main_class_mock.return_value
@@ -278,18 +581,93 @@ class TestEntrypoint(unittest.TestCase):
         runner = CliRunner()
         runner.invoke(main, ["--data_url=my_url", "--data_url_format=my_format"])
 
-        mock_instance.add_data_url.assert_called_with("my_url", "my_format")
+        mock_instance.add_data_urls.assert_called_with(
+            [("my_url", "my_format")],
+            ttl=None,
+            timeout=30,
+            retries=2,
+            max_connections=4,
+        )
         self.assertTrue(mock_instance.render_all.called, "render_all is called")
 
         # Remove the previous env var
-        mock_instance.add_data_url.reset_mock()
+        mock_instance.add_data_urls.reset_mock()
 
         # Call the Method (click)
         runner = CliRunner()
         runner.invoke(main)
 
-        self.assertTrue(
-            call("my_url", "my_format") not in mock_instance.add_data_url.mock_calls,
-            "add_data_file is not called for the previous context",
+        self.assertFalse(
+            mock_instance.add_data_urls.called,
+            "add_data_urls is not called for the previous context",
         )
         self.assertTrue(mock_instance.render_all.called, "render_all is called")
+
+    @parameterized.expand(
+        [
+            (["json"], [("url1", "json"), ("url2", "json")]),
+            (["json", "automatic"], [("url1", "json"), ("url2", None)]),
+            ([], [("url1", None), ("url2", None)]),
+        ]
+    )
+    @patch("entrypoint.Main", spec=True)
+    def test_main_multiple_urls(self, formats, sources, main_class_mock):
+        """
+        entrypoint.main unittest: data_url can be repeated, a single format
+        applies to all urls, otherwise formats are paired with urls in order.
+        """
+        mock_instance = main_class_mock.return_value
+
+        runner = CliRunner()
+        result = runner.invoke(
+            main,
+            ["--data_url=url1", "--data_url=url2"]
+            + [f"--data_url_format={f}" for f in formats]
+            + [
+                "--data_url_timeout=5",
+                "--data_url_retries=0",
+                "--data_url_connections=8",
+            ],
+        )
+
+        self.assertEqual(result.exit_code, 0)
+        mock_instance.add_data_urls.assert_called_with(
+            sources, ttl=None, timeout=5, retries=0, max_connections=8
+        )
+
+    @patch("entrypoint.Main", spec=True)
+    def test_main_multiple_urls_bad_formats(self, main_class_mock):
+        """
+        entrypoint.main unittest: the number of formats must match the urls.
+        """
+        mock_instance = main_class_mock.return_value
+
+        runner = CliRunner()
+        result = runner.invoke(
+            main,
+            [
+                "--data_url=url1",
+                "--data_url=url2",
+                "--data_url=url3",
+                "--data_url_format=json",
+                "--data_url_format=yaml",
+            ],
+        )
+
+        self.assertEqual(result.exit_code, 2)
+        self.assertFalse(mock_instance.render_all.called, "render_all is not called")
+
+    @patch("entrypoint.Main", spec=True)
+    def test_main_url_file_ttl(self, main_class_mock):
+        """
+        entrypoint.main unittest: If data_url parameter and data_url_ttl
+        are defined, add_data_urls method is called with the url and the ttl.
+        """
+        mock_instance = main_class_mock.return_value
+
+        runner = CliRunner()
+        runner.invoke(main, ["--data_url=my_url", "--data_url_ttl=60"])
+
+        mock_instance.add_data_urls.assert_called_with(
+            [("my_url", None)], ttl=60, timeout=30, retries=2, max_connections=4
+        )